@@ -91,9 +91,10 @@ export const chatAPI = {
     return response.data;
   },
   
-  getChatHistory: async () => {
-    const response = await api.get('/chat/history');
-    return response.data;
+  // History is cursor-paginated (newest first); pass the `cursor` value from a page's `next` link to load older chats
+  getChatHistory: async (cursor?: string) => {
+    const response = await api.get('/chat/history', { params: cursor ? { cursor } : undefined });
+    return response.data.results;
   },
 };
 
@@ -49,12 +49,26 @@ INSTALLED_APPS = [
     'careeradvisor',
 ]
 
+# JSON is rendered and parsed with orjson when it is installed
+# (pip install orjson); JSON_BACKEND=stdlib forces the standard library.
+
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'orjson')
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'careeradvisor.authentication.JWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'careeradvisor.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'careeradvisor.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
@@ -64,7 +78,20 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# JWT user resolution (careeradvisor.authentication). Users are cached per
+# process for USER_CACHE_TTL seconds (0 disables) and evicted when saved or
+# deleted. Read-only views (home, chat history) trust the token's claims and
+# skip the user query altogether unless AUTH_STATELESS_READS=false.
+
+AUTH = {
+    'USER_CACHE_TTL': int(os.getenv('AUTH_USER_CACHE_TTL', 60)),
+    'USER_CACHE_SIZE': 10000,
+    'STATELESS_READS': os.getenv('AUTH_STATELESS_READS', 'true').lower() == 'true',
+}
+
 MIDDLEWARE = [
+    'careeradvisor.tracing.TracingMiddleware',
+    'careeradvisor.payloads.PayloadMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -86,17 +113,20 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_ALL_ORIGINS = True  # For development only - change to False in production
-CORS_ALLOWED_HEADERS = [
+CORS_ALLOW_HEADERS = [
     'accept',
     'accept-encoding',
     'authorization',
     'content-type',
     'dnt',
+    'if-none-match',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
+# Lets the frontend read validators for If-None-Match revalidation
+CORS_EXPOSE_HEADERS = ['ETag']
 CORS_ALLOW_METHODS = [
     'DELETE',
     'GET',
@@ -128,12 +158,215 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+#
+# DB_ENGINE=sqlite (default) tunes every new connection for concurrent web
+# traffic: WAL journaling so readers never block the writer, synchronous=NORMAL
+# (durable at WAL checkpoints), a busy timeout instead of immediate "database
+# is locked" errors, memory-mapped reads, and IMMEDIATE transactions so an
+# atomic block takes the write lock up front rather than failing to upgrade
+# a read lock.
+#
+# Either engine keeps connections open for DB_CONN_MAX_AGE seconds and
+# health-checks them before reuse. DB_ENGINE=postgres needs
+# pip install "psycopg[binary]" (and "psycopg[pool]" for DB_POOL). With
+# DB_POOL=true, psycopg's connection pool (DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE
+# per process) is used instead of persistent connections.
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'true').lower() == 'true',
+            'OPTIONS': {
+                'init_command': (
+                    f"PRAGMA journal_mode={os.getenv('SQLITE_JOURNAL_MODE', 'WAL')};"
+                    f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')};"
+                    f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))};"
+                ),
+                # Seconds to wait on a locked database (sqlite3's busy timeout)
+                'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 5)),
+                'transaction_mode': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+            },
+        }
+    }
+elif DB_ENGINE == 'postgres':
+    DB_POOL = os.getenv('DB_POOL', 'false').lower() == 'true'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'careeradvisor'),
+            'USER': os.getenv('DB_USER', 'careeradvisor'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # The pool hands out connections itself; Django must close them after each request
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'true').lower() == 'true',
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                } if DB_POOL else False,
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+            },
+        }
+    }
+else:
+    raise ValueError("DB_ENGINE must be 'sqlite' or 'postgres'")
+
 
-DATABASES = {
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The "responses" alias is the shared tier of careeradvisor.cache. Pick the
+# backend with RESPONSE_CACHE_BACKEND=locmem|file|db (db needs
+# `python manage.py createcachetable`).
+
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'careeradvisor-responses',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'responses')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', 'careeradvisor_response_cache'),
+    },
+}
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': RESPONSE_CACHE_BACKENDS[os.getenv('RESPONSE_CACHE_BACKEND', 'locmem')],
+}
+
+RESPONSE_CACHE = {
+    'colleges': {
+        'ALIAS': 'responses',
+        'TTL': int(os.getenv('COLLEGE_CACHE_TTL', 24 * 60 * 60)),
+        'STALE_TTL': int(os.getenv('COLLEGE_CACHE_STALE_TTL', 7 * 24 * 60 * 60)),
+        'MAXSIZE': 1024,
+    },
+}
+
+# Logging and request tracing (careeradvisor.tracing). Application logs are
+# JSON lines written to stdout from a background thread. Per-stage request
+# timings are logged and recorded on /metrics for a TRACE_SAMPLE_RATE share of
+# requests, and always for requests slower than TRACE_SLOW_REQUEST_SECONDS.
+
+TRACING = {
+    'SAMPLE_RATE': float(os.getenv('TRACE_SAMPLE_RATE', 0.1)),
+    'SLOW_REQUEST_SECONDS': float(os.getenv('TRACE_SLOW_REQUEST_SECONDS', 2.0)),
+}
+
+# /metrics answers staff users and scrapers from these comma-separated
+# addresses (REMOTE_ADDR, so list the proxy when one sits in front).
+
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'careeradvisor.tracing.JsonFormatter',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'careeradvisor.tracing.BackgroundStreamHandler',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'careeradvisor': {
+            'handlers': ['console'],
+            'level': os.getenv('LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Batch chat endpoint (careeradvisor.chat_batch): up to MAX_MESSAGES per call,
+# answered on CONCURRENCY threads. Items hitting the Gemini rate limit wait up
+# to THROTTLE_WAIT seconds in total before falling back.
+
+CHAT_BATCH = {
+    'MAX_MESSAGES': int(os.getenv('CHAT_BATCH_MAX_MESSAGES', 500)),
+    'CONCURRENCY': int(os.getenv('CHAT_BATCH_CONCURRENCY', 16)),
+    'THROTTLE_WAIT': int(os.getenv('CHAT_BATCH_THROTTLE_WAIT', 30)),
+}
+
+# Conversation memory (careeradvisor.conversations). Prompts in a conversation
+# carry the most recent turns within HISTORY_TOKENS (at most MAX_TURNS rows)
+# plus a rolling summary of older turns capped at SUMMARY_TOKENS, updated on
+# WORKERS background threads.
+
+CONVERSATIONS = {
+    'HISTORY_TOKENS': int(os.getenv('CONVERSATION_HISTORY_TOKENS', 1200)),
+    'SUMMARY_TOKENS': int(os.getenv('CONVERSATION_SUMMARY_TOKENS', 300)),
+    'MAX_TURNS': int(os.getenv('CONVERSATION_MAX_TURNS', 12)),
+    'WORKERS': 2,
+}
+
+# Response payloads (careeradvisor.payloads). Responses of at least
+# COMPRESS_MIN_SIZE bytes are compressed with brotli (pip install brotli) or
+# gzip as the client accepts; search and chat history responses carry ETags
+# and answer a matching If-None-Match with 304 (GET) or 412 (POST searches).
+
+PAYLOADS = {
+    'COMPRESS_MIN_SIZE': int(os.getenv('RESPONSE_COMPRESS_MIN_SIZE', 1024)),
+    'BROTLI_QUALITY': int(os.getenv('RESPONSE_BROTLI_QUALITY', 4)),
+}
+
+# Chat history archive (careeradvisor.chat_archive). `python manage.py
+# archive_chats` (with --every SECONDS as a scheduled loop) moves chats older
+# than AFTER_DAYS into zlib-compressed segments of SEGMENT_SIZE chats; the
+# chat history endpoint pages through them after the recent ones.
+
+CHAT_ARCHIVE = {
+    'AFTER_DAYS': int(os.getenv('CHAT_ARCHIVE_AFTER_DAYS', 180)),
+    'SEGMENT_SIZE': int(os.getenv('CHAT_ARCHIVE_SEGMENT_SIZE', 500)),
+    'COMPRESSION_LEVEL': 6,
+}
+
+# Gemini prompt templates (careeradvisor.prompts). A template's static system
+# part is sent as cached content once it reaches CONTEXT_CACHE_MIN_TOKENS
+# (Gemini's minimum for context caching), re-uploaded every CONTEXT_CACHE_TTL
+# seconds; smaller ones go out as the model's system_instruction.
+
+PROMPTS = {
+    'CONTEXT_CACHE_MIN_TOKENS': int(os.getenv('PROMPT_CONTEXT_CACHE_MIN_TOKENS', 32768)),
+    'CONTEXT_CACHE_TTL': int(os.getenv('PROMPT_CONTEXT_CACHE_TTL', 3600)),
+}
+
+# Intents and canned answers for the rule-based chatbot fallback.
+
+CHATBOT_INTENTS_FILE = os.getenv('CHATBOT_INTENTS_FILE', str(BASE_DIR / 'careeradvisor' / 'intents.json'))
+
+# Semantic answer cache for the chatbot (careeradvisor.semantic_cache).
+# Messages whose hashed bag-of-words embedding has cosine similarity of at
+# least SEMANTIC_CACHE_THRESHOLD with an earlier question reuse its answer.
+# It is on by default and shared by all users; raise the threshold to reuse
+# answers only for near-identical questions.
+# The index is saved to SEMANTIC_CACHE_PATH every SAVE_EVERY new answers and
+# rebuilt with `python manage.py rebuild_semantic_index`.
+
+SEMANTIC_CACHE = {
+    'ENABLED': os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true',
+    'THRESHOLD': float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.85)),
+    'DIMENSIONS': int(os.getenv('SEMANTIC_CACHE_DIMENSIONS', 1024)),
+    'MAX_ENTRIES': int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', 20000)),
+    'SAVE_EVERY': 50,
+    'PATH': os.getenv('SEMANTIC_CACHE_PATH', str(BASE_DIR / '.cache' / 'semantic_index.npz')),
 }
 
 
@@ -156,6 +389,40 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing (careeradvisor.hashers). PASSWORD_HASHING_ALGORITHM is
+# pbkdf2, scrypt, argon2 (pip install argon2-cffi) or bcrypt (pip install
+# bcrypt); the cost settings default to Django's. Stored hashes of any of them
+# verify, and are re-hashed with the current algorithm and cost on the next
+# login. At most CONCURRENCY hashes run at once per process (default: one
+# per core); requests wait up to QUEUE_TIMEOUT seconds for a turn, then 503.
+
+PASSWORD_HASHING = {
+    'PBKDF2_ITERATIONS': int(os.getenv('PBKDF2_ITERATIONS', 0)) or None,
+    'ARGON2_TIME_COST': int(os.getenv('ARGON2_TIME_COST', 0)) or None,
+    'ARGON2_MEMORY_COST': int(os.getenv('ARGON2_MEMORY_COST', 0)) or None,
+    'ARGON2_PARALLELISM': int(os.getenv('ARGON2_PARALLELISM', 0)) or None,
+    'BCRYPT_ROUNDS': int(os.getenv('BCRYPT_ROUNDS', 0)) or None,
+    'SCRYPT_WORK_FACTOR': int(os.getenv('SCRYPT_WORK_FACTOR', 0)) or None,
+    'CONCURRENCY': int(os.getenv('PASSWORD_HASHING_CONCURRENCY', 0)) or None,
+    'QUEUE_TIMEOUT': float(os.getenv('PASSWORD_HASHING_QUEUE_TIMEOUT', 5)),
+}
+
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'careeradvisor.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'careeradvisor.hashers.ScryptPasswordHasher',
+    'argon2': 'careeradvisor.hashers.Argon2PasswordHasher',
+    'bcrypt': 'careeradvisor.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHING_ALGORITHM = os.getenv('PASSWORD_HASHING_ALGORITHM', 'pbkdf2')
+if PASSWORD_HASHING_ALGORITHM not in PASSWORD_HASHER_CLASSES:
+    raise ValueError(f"PASSWORD_HASHING_ALGORITHM must be one of {', '.join(PASSWORD_HASHER_CLASSES)}")
+
+# Preferred hasher first; the rest (and Django's SHA1 PBKDF2) only verify
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHING_ALGORITHM]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHING_ALGORITHM
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -176,4 +443,113 @@ STATIC_URL = 'static/'
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# External APIs
+# Override the URLs to point at a local stub upstream (see benchmarks/).
+
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+# host[:port] or http://host:port; switches the Gemini SDK to its REST transport
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT')
+
+RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY', '0735b4faabmsh42bad049d1ef39dp147b1cjsn55d5602fbba7')
+RAPIDAPI_HOST = os.getenv('RAPIDAPI_HOST', 'jsearch.p.rapidapi.com')
+RAPIDAPI_JSEARCH_URL = os.getenv('RAPIDAPI_JSEARCH_URL', 'https://jsearch.p.rapidapi.com/search')
+
+# Local job index (careeradvisor.job_index). Job searches fetched within
+# JOB_INDEX_FRESHNESS seconds are answered from the database, as are new
+# searches with at least MIN_RESULTS fresh full-text matches; anything else
+# goes to JSearch and is ingested. Preload or refresh with
+# `python manage.py ingest_jobs`.
+
+JOB_INDEX = {
+    'ENABLED': os.getenv('JOB_INDEX_ENABLED', 'true').lower() == 'true',
+    'FRESHNESS': int(os.getenv('JOB_INDEX_FRESHNESS', 6 * 60 * 60)),
+    'MIN_RESULTS': 5,
+    'MAX_RESULTS': 10,
+}
+
+# Local college catalog (careeradvisor.college_catalog). College searches
+# answered by Gemini within COLLEGE_CATALOG_FRESHNESS seconds are served from
+# the database, as are new searches with at least MIN_RESULTS catalog matches;
+# only other (field, location) pairs go to Gemini. Seed or refresh with
+# `python manage.py load_colleges`.
+
+COLLEGE_CATALOG = {
+    'ENABLED': os.getenv('COLLEGE_CATALOG_ENABLED', 'true').lower() == 'true',
+    'FRESHNESS': int(os.getenv('COLLEGE_CATALOG_FRESHNESS', 30 * 24 * 60 * 60)),
+    'MIN_RESULTS': int(os.getenv('COLLEGE_CATALOG_MIN_RESULTS', 5)),
+    'MAX_RESULTS': 10,
+    'MAX_PROGRAMS': 200,
+}
+
+# Multi-page job search (careeradvisor.job_pages): {"pages": N} fetches up to
+# MAX_PAGES pages concurrently on a pool of WORKERS threads (or tasks on ASGI).
+
+JOB_PAGES = {
+    'MAX_PAGES': int(os.getenv('JOB_SEARCH_MAX_PAGES', 5)),
+    'WORKERS': int(os.getenv('JOB_SEARCH_WORKERS', 8)),
+}
+
+# Shared connection pool / retry policy for all outbound calls (careeradvisor.upstream)
+UPSTREAM = {
+    'CONNECT_TIMEOUT': float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3.05)),
+    'READ_TIMEOUT': float(os.getenv('UPSTREAM_READ_TIMEOUT', 30)),
+    'RETRIES': int(os.getenv('UPSTREAM_RETRIES', 2)),
+    'BACKOFF_FACTOR': 0.3,
+    'BACKOFF_JITTER': 0.3,
+    'POOL_MAXSIZE': int(os.getenv('UPSTREAM_POOL_MAXSIZE', 32)),
+}
+
+# Token buckets (careeradvisor.throttling): RATE is tokens/second, BURST the
+# bucket size. "search" is per client; "gemini"/"rapidapi" are budgets for the
+# whole deployment when STORE=cache, per process when STORE=local.
+RATE_LIMITS = {
+    'STORE': os.getenv('RATE_LIMIT_STORE', 'local'),
+    'CACHE_ALIAS': 'default',
+    'SCOPES': {
+        'search': {'RATE': float(os.getenv('SEARCH_RATE', 0.5)), 'BURST': int(os.getenv('SEARCH_BURST', 10))},
+        # Per client IP, checked before any password is hashed
+        'login': {'RATE': float(os.getenv('LOGIN_RATE', 0.2)), 'BURST': int(os.getenv('LOGIN_BURST', 10))},
+        'gemini': {'RATE': float(os.getenv('GEMINI_RATE', 10)), 'BURST': int(os.getenv('GEMINI_BURST', 30))},
+        'rapidapi': {'RATE': float(os.getenv('RAPIDAPI_RATE', 5)), 'BURST': int(os.getenv('RAPIDAPI_BURST', 20))},
+    },
+}
+
+# Circuit breaker per upstream (careeradvisor.circuit), per process. Opens when
+# FAILURE_RATE of the calls in the last WINDOW seconds failed, or SLOW_CALL_RATE
+# took SLOW_CALL_SECONDS or longer (once there are MIN_CALLS); while open, calls
+# go straight to the fallbacks. After OPEN_SECONDS, PROBES calls test the upstream;
+# one still unanswered after PROBE_TIMEOUT seconds opens the circuit again.
+CIRCUIT_BREAKER = {
+    'ENABLED': os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true',
+    'WINDOW': float(os.getenv('CIRCUIT_BREAKER_WINDOW', 60)),
+    'MIN_CALLS': int(os.getenv('CIRCUIT_BREAKER_MIN_CALLS', 10)),
+    'FAILURE_RATE': float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATE', 0.5)),
+    'SLOW_CALL_SECONDS': float(os.getenv('CIRCUIT_BREAKER_SLOW_CALL_SECONDS', 10)),
+    'SLOW_CALL_RATE': float(os.getenv('CIRCUIT_BREAKER_SLOW_CALL_RATE', 0.8)),
+    'OPEN_SECONDS': float(os.getenv('CIRCUIT_BREAKER_OPEN_SECONDS', 30)),
+    'PROBES': int(os.getenv('CIRCUIT_BREAKER_PROBES', 1)),
+    'PROBE_TIMEOUT': float(os.getenv('CIRCUIT_BREAKER_PROBE_TIMEOUT', 60)),
+    'UPSTREAMS': {
+        # Long answers legitimately take a while to generate
+        'gemini': {'SLOW_CALL_SECONDS': float(os.getenv('GEMINI_SLOW_CALL_SECONDS', 20))},
+    },
+}
+
+# Streamed chat answers are saved every N seconds while streaming (0 = only at the end)
+CHAT_STREAM_SAVE_INTERVAL = float(os.getenv('CHAT_STREAM_SAVE_INTERVAL', 0))
+
+# Background LLM queue (careeradvisor.tasks). BROKER=local runs workers as
+# threads in each web process; BROKER=db expects `manage.py run_llm_workers`.
+LLM_QUEUE = {
+    'BROKER': os.getenv('LLM_QUEUE_BROKER', 'local'),
+    'WORKERS': int(os.getenv('LLM_QUEUE_WORKERS', 4)),
+    'MAX_DEPTH': int(os.getenv('LLM_QUEUE_MAX_DEPTH', 500)),
+    'MAX_ANONYMOUS_DEPTH': int(os.getenv('LLM_QUEUE_MAX_ANONYMOUS_DEPTH', 100)),
+    'POLL_INTERVAL': 0.5,
+    # Running tasks older than this are assumed lost with their worker and re-queued
+    'LEASE_SECONDS': int(os.getenv('LLM_QUEUE_LEASE_SECONDS', 300)),
+    'MAX_ATTEMPTS': 3,
+}
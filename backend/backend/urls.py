@@ -23,4 +23,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/refresh', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/', include('careeradvisor.urls')),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Compare WSGI and ASGI concurrency for the job search endpoint.
+
+Starts the stub JSearch upstream, then runs the backend twice against it:
+once under gunicorn (sync workers, /api/jobs/search) and once under uvicorn
+(/api/async/jobs/search). Both are hit with the same number of concurrent
+requests and the wall time, throughput and latency percentiles are printed.
+
+Requires gunicorn and uvicorn in addition to requirements.txt:
+
+    pip install gunicorn uvicorn
+    python benchmarks/asgi_vs_wsgi.py --requests 200 --concurrency 200 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from stub_upstream import start_stub
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def drive(url, total, concurrency, make_payload):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, json=make_payload(i))
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return elapsed, latencies, errors
+
+
+def run_server(command, port, env, url, args):
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        # Distinct titles so identical-search coalescing does not hide upstream waits
+        def payload(i):
+            return {'job_title': f'python developer {i}', 'location': 'India'}
+        elapsed, latencies, errors = asyncio.run(drive(url, args.requests, args.concurrency, payload))
+    finally:
+        process.terminate()
+        process.wait()
+    return elapsed, latencies, errors
+
+
+def report(name, elapsed, latencies, errors):
+    print(f"\n{name}")
+    print("-" * 40)
+    print(f"Wall time:   {elapsed:.2f}s")
+    print(f"Throughput:  {len(latencies) / elapsed:.1f} req/s")
+    print(f"Errors:      {errors}")
+    if latencies:
+        print(f"p50 latency: {percentile(latencies, 50) * 1000:.0f} ms")
+        print(f"p95 latency: {percentile(latencies, 95) * 1000:.0f} ms")
+        print(f"p99 latency: {percentile(latencies, 99) * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WSGI vs ASGI job search benchmark")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=1.0, help='stub upstream latency in seconds')
+    parser.add_argument('--wsgi-workers', type=int, default=2)
+    parser.add_argument('--wsgi-threads', type=int, default=4)
+    args = parser.parse_args()
+
+    stub = start_stub(latency=args.latency)
+    env = dict(
+        os.environ,
+        RAPIDAPI_JSEARCH_URL=f"http://127.0.0.1:{stub.server_address[1]}/search",
+        # Measure concurrency, not the rate limiter
+        SEARCH_RATE='1000000', SEARCH_BURST='1000000',
+        RAPIDAPI_RATE='1000000', RAPIDAPI_BURST='1000000',
+    )
+
+    print("Benchmarking job search")
+    print("=" * 40)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, upstream latency {args.latency}s")
+
+    port = free_port()
+    wsgi = run_server(
+        [sys.executable, '-m', 'gunicorn', 'backend.wsgi:application', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(args.wsgi_workers), '--threads', str(args.wsgi_threads)],
+        port, env, f"http://127.0.0.1:{port}/api/jobs/search", args,
+    )
+    report(f"WSGI (gunicorn, {args.wsgi_workers} workers x {args.wsgi_threads} threads)", *wsgi)
+
+    port = free_port()
+    asgi = run_server(
+        [sys.executable, '-m', 'uvicorn', 'backend.asgi:application', '--port', str(port),
+         '--log-level', 'warning'],
+        port, env, f"http://127.0.0.1:{port}/api/async/jobs/search", args,
+    )
+    report("ASGI (uvicorn, 1 process)", *asgi)
+
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
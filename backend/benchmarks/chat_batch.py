@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compare one-at-a-time POST /api/chat calls with a single POST /api/chat/batch.
+
+Gemini is replaced in-process by a fake model that sleeps for --latency
+seconds per answer; rate limits and the semantic cache are lifted so only
+request overhead and concurrency are measured. Runs against a throwaway test
+database (never db.sqlite3):
+
+    python benchmarks/chat_batch.py --messages 500 --latency 0.2
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.update(GEMINI_RATE='1000000', GEMINI_BURST='1000000', SEMANTIC_CACHE_ENABLED='false', TRACE_SAMPLE_RATE='0')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+from careeradvisor import upstream  # noqa: E402
+from careeradvisor.models import Chat  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        return FakeResponse("Fake career advice. " * 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat batch endpoint benchmark")
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.2, help='fake Gemini latency in seconds')
+    parser.add_argument('--sequential', type=int, default=50,
+                        help='one-at-a-time calls to time (extrapolated to --messages)')
+    args = parser.parse_args()
+
+    settings.GEMINI_API_KEY = settings.GEMINI_API_KEY or 'benchmark'
+    model = FakeModel(args.latency)
+    upstream.get_gemini_model = lambda name, template=None: model
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user = User.objects.create_user('bench', password='bench')
+        client = Client(headers={'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'})
+        messages = [f"How do I prepare for interview number {i}?" for i in range(args.messages)]
+
+        sample = messages[:min(args.sequential, args.messages)]
+        start = time.perf_counter()
+        for message in sample:
+            response = client.post('/api/chat', {'message': message}, content_type='application/json')
+            assert response.status_code == 200, response.content
+        sequential = (time.perf_counter() - start) / len(sample) * args.messages
+
+        start = time.perf_counter()
+        response = client.post('/api/chat/batch', {'messages': messages}, content_type='application/json')
+        batch = time.perf_counter() - start
+        assert response.status_code == 200, response.content
+        body = response.json()
+
+        print("Benchmarking chat batch")
+        print("=" * 40)
+        print(f"{args.messages} messages, fake Gemini latency {args.latency}s, "
+              f"concurrency {settings.CHAT_BATCH['CONCURRENCY']}")
+        print(f"One at a time: {sequential:.2f}s (extrapolated from {len(sample)} calls)")
+        print(f"Batch:         {batch:.2f}s ({body['succeeded']} ok, {body['failed']} failed)")
+        print(f"Speedup:       {sequential / batch:.1f}x")
+        print(f"Rows stored:   {Chat.objects.filter(user=user).count()}")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == "__main__":
+    main()
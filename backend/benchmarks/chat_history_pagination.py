@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Seed a large chat history and check that ChatHistoryView page latency stays
+flat from the newest page to the oldest.
+
+Runs against a throwaway test database (never db.sqlite3):
+
+    python benchmarks/chat_history_pagination.py --chats 100000 --page-size 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+from careeradvisor.models import Chat  # noqa: E402
+
+
+def seed(user, count, batch_size=5000):
+    now = timezone.now()
+    for offset in range(0, count, batch_size):
+        Chat.objects.bulk_create(
+            Chat(user=user, message=f"question {i}", response="answer " * 60)
+            for i in range(offset, min(offset + batch_size, count))
+        )
+    # Give each batch its own timestamp: pages then cross thousands of rows
+    # sharing one created_at, which exercises the (created_at, id) tie-break.
+    ids = list(Chat.objects.filter(user=user).order_by('id').values_list('id', flat=True))
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        Chat.objects.filter(id__in=chunk).update(created_at=now - timedelta(seconds=len(ids) - start))
+
+
+def walk(client, headers, page_size, truncate):
+    url = f'/api/chat/history?page_size={page_size}'
+    if truncate is not None:
+        url += f'&truncate={truncate}'
+    timings = []
+    seen = 0
+    while url:
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.content
+        body = response.json()
+        seen += len(body['results'])
+        url = body['next']
+    return timings, seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat history pagination benchmark")
+    parser.add_argument('--chats', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--truncate', type=int, default=None, help='pass ?truncate=N')
+    parser.add_argument('--max-ratio', type=float, default=2.0,
+                        help='fail if the deepest pages are this many times slower than the first')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user = User.objects.create_user(username='heavy-user', password='benchmark-pass')
+        User.objects.create_user(username='other-user', password='benchmark-pass')
+
+        print(f"Seeding {args.chats} chats...")
+        start = time.perf_counter()
+        seed(user, args.chats)
+        print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+        token = str(RefreshToken.for_user(user).access_token)
+        headers = {'Authorization': f'Bearer {token}'}
+        client = Client()
+        client.get('/api/chat/history?page_size=1', headers=headers)  # warm up URL resolving, auth, etc.
+        timings, seen = walk(client, headers, args.page_size, args.truncate)
+        assert seen == args.chats, f"paged through {seen} chats, expected {args.chats}"
+
+        window = max(1, min(50, len(timings) // 10))
+        head = statistics.mean(timings[:window])
+        tail = statistics.mean(timings[-window:])
+        print("\nChat history pagination")
+        print("=" * 40)
+        print(f"Pages:             {len(timings)}")
+        print(f"First {window} pages:    {head * 1000:.2f} ms/page")
+        print(f"Last {window} pages:     {tail * 1000:.2f} ms/page")
+        print(f"Median page:       {statistics.median(timings) * 1000:.2f} ms")
+        print(f"Deep/shallow ratio {tail / head:.2f}")
+
+        if tail / head > args.max_ratio:
+            print(f"FAIL: per-page latency grew more than {args.max_ratio}x with depth")
+            sys.exit(1)
+        print("OK: per-page latency is flat")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == "__main__":
+    main()
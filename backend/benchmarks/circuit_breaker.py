@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Scripted upstream outage against benchmarks/stub_upstream.py, checking the
+circuit breakers (careeradvisor.circuit) end to end:
+
+    healthy    both upstreams answer                 -> both circuits closed
+    outage     every Gemini and JSearch call fails   -> both open
+    recovery   the stub answers again, after
+               --open-seconds                        -> probes close both
+    slowdown   JSearch answers after --slow-seconds  -> rapidapi open,
+                                                        gemini closed
+
+Each phase sends --requests chat, college search and job search requests
+(distinct ones, so no cache or index answers them) and reports their latency,
+split by the upstream's circuit state when the request started,
+and the states on /api/health afterwards. It exits non-zero if a state is not
+the expected one. Rejections by an open circuit are also timed on their own.
+Runs against a throwaway test database (never db.sqlite3):
+
+    python benchmarks/circuit_breaker.py
+    python benchmarks/circuit_breaker.py --requests 20 --min-calls 10 --open-seconds 5
+
+Between phases it waits --window seconds so the previous phase's calls no
+longer count.
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+from stub_upstream import inject_faults, start_stub  # noqa: E402
+
+ENDPOINTS = {'chat': 'gemini', 'colleges': 'gemini', 'jobs': 'rapidapi'}
+
+
+def timed_rejections(circuit, upstream, calls=10000):
+    """
+    Mean microseconds for an open circuit to reject a call.
+    """
+    start = time.perf_counter()
+    for _ in range(calls):
+        try:
+            with circuit.guard(upstream):
+                pass
+        except circuit.CircuitOpen:
+            pass
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def run(args):
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from careeradvisor import circuit
+
+    user = User.objects.create_user('circuit')
+    auth = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+    counter = iter(range(10 ** 9))
+
+    def send(endpoint):
+        i = next(counter)
+        if endpoint == 'chat':
+            return Client().post('/api/chat', {'message': f"How do I become a data engineer? ({i})"},
+                                 content_type='application/json', headers=auth)
+        if endpoint == 'colleges':
+            return Client().post('/api/colleges/search', {'field': f'Computer Science {i}'},
+                                 content_type='application/json')
+        return Client().post('/api/jobs/search', {'job_title': f'Python Developer {i}'},
+                             content_type='application/json')
+
+    def phase(name, expected, endpoints=tuple(ENDPOINTS)):
+        timings = {}
+        for _ in range(args.requests):
+            for endpoint in endpoints:
+                breaker = circuit.get_breaker(ENDPOINTS[endpoint]).snapshot()
+                # An open circuit past its OPEN_SECONDS lets this request through as a probe
+                state = breaker['state'] if breaker.get('retry_in', 1) > 0 else 'probe'
+                start = time.perf_counter()
+                response = send(endpoint)
+                elapsed = (time.perf_counter() - start) * 1000
+                key = (endpoint, state)
+                timings.setdefault(key, []).append((elapsed, response.status_code))
+
+        health = Client().get('/api/health').json()
+        states = {upstream: breaker['state'] for upstream, breaker in health['upstreams'].items()}
+        ok = all(states[upstream] == state for upstream, state in expected.items())
+        print(f"\n{name}: health {health['status']}, "
+              + ', '.join(f"{upstream} {state}" for upstream, state in states.items())
+              + ('' if ok else f"  UNEXPECTED, wanted {expected}"))
+        for (endpoint, circuit_state), results in sorted(timings.items()):
+            ms = [elapsed for elapsed, _ in results]
+            codes = sorted({code for _, code in results})
+            print(f"  {endpoint:<9} circuit {circuit_state:<9} {len(ms):>4} req  mean {statistics.mean(ms):>8.2f} ms  "
+                  f"max {max(ms):>8.2f} ms  status {','.join(map(str, codes))}")
+        return ok
+
+    checks = [phase('healthy', {'gemini': circuit.CLOSED, 'rapidapi': circuit.CLOSED})]
+
+    # Let the healthy calls leave the window, or they dilute the failure rate
+    time.sleep(args.window)
+    inject_faults(args.stub, failure_rate=1.0, gemini_failure_rate=1.0)
+    checks.append(phase('outage', {'gemini': circuit.OPEN, 'rapidapi': circuit.OPEN}))
+    print(f"  rejection by an open circuit: {timed_rejections(circuit, 'gemini'):.2f} us "
+          f"(10000 calls, counted in circuit_breaker_rejected_total)")
+
+    inject_faults(args.stub, failure_rate=0.0, gemini_failure_rate=0.0)
+    time.sleep(args.open_seconds)
+    checks.append(phase('recovery', {'gemini': circuit.CLOSED, 'rapidapi': circuit.CLOSED}))
+
+    time.sleep(args.window)
+    inject_faults(args.stub, latency=args.slow_seconds + 0.2)
+    checks.append(phase('slowdown', {'gemini': circuit.CLOSED, 'rapidapi': circuit.OPEN}, ('chat', 'jobs')))
+
+    metrics = Client().get('/metrics').content.decode()
+    print('\n' + '\n'.join(line for line in metrics.splitlines() if line.startswith('circuit_breaker_')))
+    return all(checks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Circuit breaker behaviour through a scripted upstream outage")
+    parser.add_argument('--requests', type=int, default=10, help='requests per endpoint and phase')
+    parser.add_argument('--latency', type=float, default=0.05, help='healthy upstream latency in seconds')
+    parser.add_argument('--window', type=float, default=15, help='CIRCUIT_BREAKER_WINDOW')
+    parser.add_argument('--min-calls', type=int, default=5, help='CIRCUIT_BREAKER_MIN_CALLS')
+    parser.add_argument('--open-seconds', type=float, default=3, help='CIRCUIT_BREAKER_OPEN_SECONDS')
+    parser.add_argument('--slow-seconds', type=float, default=0.5, help='CIRCUIT_BREAKER_SLOW_CALL_SECONDS')
+    args = parser.parse_args()
+    if args.requests < args.min_calls:
+        parser.error('--requests must be at least --min-calls for the circuits to open')
+
+    args.stub = start_stub(latency=args.latency)
+    stub_url = f'http://127.0.0.1:{args.stub.server_address[1]}'
+    workdir = tempfile.mkdtemp(prefix='careeradvisor-circuit-')
+    os.environ.update(
+        GEMINI_API_KEY='benchmark',
+        GEMINI_API_ENDPOINT=stub_url,
+        RAPIDAPI_JSEARCH_URL=f'{stub_url}/search',
+        SEARCH_RATE='1000000', SEARCH_BURST='1000000',
+        GEMINI_RATE='1000000', GEMINI_BURST='1000000',
+        RAPIDAPI_RATE='1000000', RAPIDAPI_BURST='1000000',
+        TRACE_SAMPLE_RATE='0',
+        METRICS_ALLOWED_IPS='127.0.0.1',
+        # Every request must reach the upstream
+        SEMANTIC_CACHE_ENABLED='false', JOB_INDEX_ENABLED='false', COLLEGE_CATALOG_ENABLED='false',
+        SEMANTIC_CACHE_PATH=os.path.join(workdir, 'semantic_index.npz'),
+        # Fail fast enough for a short run
+        UPSTREAM_READ_TIMEOUT='1', UPSTREAM_RETRIES='1',
+        CIRCUIT_BREAKER_WINDOW=str(args.window),
+        CIRCUIT_BREAKER_MIN_CALLS=str(args.min_calls),
+        CIRCUIT_BREAKER_OPEN_SECONDS=str(args.open_seconds),
+        CIRCUIT_BREAKER_SLOW_CALL_SECONDS=str(args.slow_seconds),
+        GEMINI_SLOW_CALL_SECONDS=str(args.slow_seconds),
+    )
+
+    import django
+    django.setup()
+    # Fallbacks log every failed upstream call
+    logging.disable(logging.CRITICAL)
+
+    from django.core.cache.backends.base import CacheKeyWarning
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+
+    # Cache keys built from multi-word fields are fine for the locmem cache
+    warnings.simplefilter('ignore', CacheKeyWarning)
+
+    print(f"Circuit breaker check: {args.requests} requests per endpoint and phase, opening after "
+          f"{args.min_calls} calls, open for {args.open_seconds}s, slow above {args.slow_seconds}s")
+    print("=" * 80)
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        ok = run(args)
+    finally:
+        runner.teardown_databases(old_config)
+        args.stub.shutdown()
+    print(f"\n{'all circuit states as expected' if ok else 'UNEXPECTED circuit states'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
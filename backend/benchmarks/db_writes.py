@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Chat-insert throughput under write contention for each database profile.
+
+--writers threads each store --inserts chats the way ChatbotView does (one
+autocommitted INSERT, then the request-finished connection handling), while
+--readers threads page through chat history. Every profile runs on a fresh
+throwaway test database (never db.sqlite3) and reports inserts/s, insert
+latency percentiles, "database is locked" failures and reads/s.
+
+With the default DB_ENGINE=sqlite the profiles are Django's defaults
+(rollback journal, a new connection per request) and the tuned profile from
+settings (WAL, synchronous=NORMAL, busy timeout, mmap, IMMEDIATE
+transactions, persistent connections). With DB_ENGINE=postgres they are a
+new connection per request, persistent connections with health checks and,
+if psycopg_pool is installed, the connection pool:
+
+    python benchmarks/db_writes.py --writers 8 --inserts 200 --readers 2
+    DB_ENGINE=postgres DB_HOST=localhost python benchmarks/db_writes.py
+"""
+
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import OperationalError, close_old_connections, connections  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from careeradvisor.models import Chat  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def profiles():
+    """
+    (name, settings overrides) for the configured engine.
+    """
+    configured = settings.DATABASES['default']
+    if configured['ENGINE'].endswith('sqlite3'):
+        return [
+            ('sqlite default', {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}),
+            ('sqlite tuned', copy.deepcopy({key: configured[key] for key in
+                                            ('OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')})),
+        ]
+    options = {key: value for key, value in configured['OPTIONS'].items() if key != 'pool'}
+    result = [
+        ('postgres per-request', {'OPTIONS': options, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}),
+        ('postgres persistent', {'OPTIONS': options, 'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True}),
+    ]
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        print("psycopg_pool is not installed; skipping the pooled profile")
+    else:
+        # Django keeps one pool per alias for the process, so this runs last
+        result.append(('postgres pool', {'OPTIONS': {**options, 'pool': {'min_size': 2, 'max_size': 20}},
+                                         'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}))
+    return result
+
+
+def run_profile(overrides, args, workdir, index):
+    database = settings.DATABASES['default']
+    database.update(overrides)
+    if database['ENGINE'].endswith('sqlite3'):
+        # A file database: in-memory test databases are not shared the same way
+        database.setdefault('TEST', {})['NAME'] = os.path.join(workdir, f'writes{index}.sqlite3')
+
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        users = [User.objects.create_user(f'writer{i}') for i in range(args.writers)]
+        for user in users:
+            Chat.objects.bulk_create([Chat(user=user, message='seed', response='seed ' * 50) for _ in range(20)])
+        close_old_connections()
+
+        latencies = []
+        failures = []
+        reads = []
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def writer(user):
+            try:
+                for i in range(args.inserts):
+                    start = time.perf_counter()
+                    try:
+                        Chat.objects.create(user=user, message=f'question {i}', response='answer ' * 50)
+                    except OperationalError as e:
+                        with lock:
+                            failures.append(str(e))
+                    else:
+                        with lock:
+                            latencies.append(time.perf_counter() - start)
+                    # What request_finished does at the end of every request
+                    close_old_connections()
+            finally:
+                connections.close_all()
+
+        def reader(user):
+            count = 0
+            try:
+                while not done.is_set():
+                    try:
+                        list(Chat.objects.filter(user=user).order_by('-created_at', '-id')[:20])
+                        count += 1
+                    except OperationalError:
+                        pass
+                    close_old_connections()
+            finally:
+                connections.close_all()
+                with lock:
+                    reads.append(count)
+
+        writers = [threading.Thread(target=writer, args=(user,)) for user in users]
+        readers = [threading.Thread(target=reader, args=(users[i % len(users)],)) for i in range(args.readers)]
+        start = time.perf_counter()
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        for thread in readers:
+            thread.join()
+    finally:
+        connections.close_all()
+        runner.teardown_databases(old_config)
+    return elapsed, latencies, failures, sum(reads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat insert throughput under write contention")
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--inserts', type=int, default=200, help='inserts per writer')
+    parser.add_argument('--readers', type=int, default=2)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    workdir = tempfile.mkdtemp(prefix='careeradvisor-writes-')
+    print(f"Benchmarking chat inserts: {args.writers} writers x {args.inserts} inserts, {args.readers} readers")
+    print("=" * 80)
+    print(f"{'profile':<22} {'inserts/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'locked':>7} {'reads/s':>9}")
+    for index, (name, overrides) in enumerate(profiles()):
+        elapsed, latencies, failures, reads = run_profile(overrides, args, workdir, index)
+        if latencies:
+            p50, p95, p99 = (percentile(latencies, pct) * 1000 for pct in (50, 95, 99))
+        else:
+            p50 = p95 = p99 = 0
+        print(f"{name:<22} {len(latencies) / elapsed:>10.1f} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} "
+              f"{len(failures):>7} {reads / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the fallback intent matcher.
+
+Generates thousands of synthetic intents, then times the original chain of
+``any(word in message_lower ...)`` substring scans against the compiled
+word-boundary matcher in careeradvisor.intents on the same messages:
+
+    python benchmarks/intent_matcher.py --intents 5000 --keywords 8 --messages 2000
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+from careeradvisor.intents import IntentMatcher  # noqa: E402
+
+
+def random_word(rng):
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+def make_intents(count, keywords_per_intent, rng):
+    vocabulary = set()
+    intents = []
+    for i in range(count):
+        keywords = {}
+        while len(keywords) < keywords_per_intent:
+            word = random_word(rng)
+            if rng.random() < 0.2:
+                word = f'{word} {random_word(rng)}'
+            if word not in vocabulary:
+                vocabulary.add(word)
+                keywords[word] = round(rng.uniform(0.5, 2.0), 2)
+        intents.append({'name': f'intent_{i}', 'keywords': keywords, 'response': f'answer {i}'})
+    return intents
+
+
+def make_messages(intents, count, rng):
+    keywords = [keyword for intent in intents for keyword in intent['keywords']]
+    messages = []
+    for _ in range(count):
+        words = [random_word(rng) for _ in range(rng.randint(5, 40))]
+        # Most messages mention a keyword or two, some mention none
+        for _ in range(rng.choice((0, 1, 1, 2))):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        messages.append(' '.join(words))
+    return messages
+
+
+def legacy_respond(intents, default, message):
+    message_lower = message.lower()
+    for intent in intents:
+        if any(word in message_lower for word in intent['keywords']):
+            return intent['response']
+    return default
+
+
+def time_it(fn, messages):
+    start = time.perf_counter()
+    for message in messages:
+        fn(message)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fallback intent matcher microbenchmark")
+    parser.add_argument('--intents', type=int, default=5000)
+    parser.add_argument('--keywords', type=int, default=8, help='keywords per intent')
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    intents = make_intents(args.intents, args.keywords, rng)
+    messages = make_messages(intents, args.messages, rng)
+
+    start = time.perf_counter()
+    matcher = IntentMatcher(intents, 'default answer')
+    compile_time = time.perf_counter() - start
+
+    legacy = time_it(lambda message: legacy_respond(intents, 'default answer', message), messages)
+    compiled = time_it(matcher.respond, messages)
+
+    print("Benchmarking fallback intent matching")
+    print("=" * 40)
+    print(f"{args.intents} intents x {args.keywords} keywords, {args.messages} messages")
+    print(f"Compile:          {compile_time * 1000:.1f} ms")
+    print(f"Substring chain:  {legacy / len(messages) * 1e6:.1f} us/message")
+    print(f"Compiled matcher: {compiled / len(messages) * 1e6:.1f} us/message")
+    print(f"Speedup:          {legacy / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+JSON encode/decode cost on the API's hot payloads, DRF's stdlib renderer
+against careeradvisor.renderers.ORJSONRenderer (orjson when installed):
+
+    jobs render      a job search response of --jobs JSearch-like postings
+    jobs parse       decoding the upstream JSearch body
+    jobs from index  postings stored in the job index: decode + render
+                     against passing the stored JSON through as RawJSON
+    history page     serializing and rendering a chat history page, with
+                     created_at formatted by DRF or encoded by the renderer
+
+Postings are synthetic but shaped like JSearch's (apply options, highlights,
+~3 KB descriptions), or read from --fixtures (a JSON list of postings or a
+stub_upstream fixtures file). No database is used:
+
+    python benchmarks/json_rendering.py
+    python benchmarks/json_rendering.py --jobs 50 --fixtures jobs.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from careeradvisor import renderers  # noqa: E402
+from careeradvisor.models import Chat  # noqa: E402
+from careeradvisor.serializers import ChatSerializer  # noqa: E402
+
+WORDS = ("experience team design build scalable services python django api cloud data customer product "
+         "engineering ownership mentor review deploy monitor improve performance security collaborate "
+         "stakeholders agile delivery quality testing automation — résumé café naïve").split()
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def make_posting(rng, index):
+    return {
+        'job_id': f'{rng.getrandbits(64):016x}==',
+        'employer_name': f'Employer {index % 17}',
+        'employer_logo': f'https://cdn.example.com/logos/{index}.png',
+        'employer_website': f'https://employer{index % 17}.example.com',
+        'job_publisher': rng.choice(['LinkedIn', 'Indeed', 'Glassdoor', 'Naukri']),
+        'job_employment_type': 'FULLTIME',
+        'job_title': f'{rng.choice(["Senior", "Junior", "Lead"])} Python Developer',
+        'job_apply_link': f'https://jobs.example.com/{index}?utm_source=google_jobs_apply',
+        'job_apply_is_direct': rng.random() < 0.3,
+        'apply_options': [
+            {'publisher': name, 'apply_link': f'https://{name.lower()}.example.com/{index}', 'is_direct': False}
+            for name in ('LinkedIn', 'Indeed', 'Glassdoor')
+        ],
+        'job_description': ' '.join(sentence(rng, rng.randint(8, 20)) for _ in range(30)),
+        'job_is_remote': rng.random() < 0.2,
+        'job_posted_at_timestamp': 1735689600 + index * 3600,
+        'job_posted_at_datetime_utc': '2025-01-01T00:00:00.000Z',
+        'job_city': rng.choice(['Bangalore', 'Hyderabad', 'Pune', 'Chennai']),
+        'job_state': 'Karnataka',
+        'job_country': 'IN',
+        'job_latitude': 12.9716 + rng.random(),
+        'job_longitude': 77.5946 + rng.random(),
+        'job_benefits': None,
+        'job_google_link': f'https://www.google.com/search?q=jobs&ibp=htl;jobs#htidocid={index}',
+        'job_min_salary': None,
+        'job_max_salary': None,
+        'job_salary_period': None,
+        'job_highlights': {
+            'Qualifications': [sentence(rng, 12) for _ in range(6)],
+            'Responsibilities': [sentence(rng, 14) for _ in range(6)],
+            'Benefits': [sentence(rng, 6) for _ in range(3)],
+        },
+        'job_onet_soc': '15113200',
+        'job_onet_job_zone': '4',
+    }
+
+
+def load_postings(args):
+    if not args.fixtures:
+        rng = random.Random(42)
+        return [make_posting(rng, i) for i in range(args.jobs)]
+    with open(args.fixtures, encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = [job for jobs in data.values() for job in jobs]
+    return (data * (args.jobs // max(len(data), 1) + 1))[:args.jobs]
+
+
+def timed(func, seconds):
+    """
+    Mean microseconds per call, run for about ``seconds``.
+    """
+    func()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed / calls * 1e6
+
+
+def report(name, baseline, candidate, size):
+    print(f"{name:<18} {baseline:>12.1f} {candidate:>12.1f} {baseline / candidate:>8.1f}x {size / 1024:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON rendering and parsing microbenchmark")
+    parser.add_argument('--jobs', type=int, default=10, help='postings per job search response')
+    parser.add_argument('--chats', type=int, default=50, help='chats per history page')
+    parser.add_argument('--seconds', type=float, default=1.0, help='time per measurement')
+    parser.add_argument('--fixtures', help='JSON list of postings, or a stub_upstream fixtures file')
+    args = parser.parse_args()
+
+    if renderers.orjson is None:
+        print("orjson is not installed: ORJSONRenderer runs on the standard library (pip install orjson)")
+    postings = load_postings(args)
+    response = {'status': 'success', 'count': len(postings), 'data': postings, 'source': 'live'}
+    upstream_body = json.dumps({'status': 'OK', 'request_id': 'bench', 'data': postings}).encode()
+    # How Job.data comes back from the database
+    stored = [json.dumps(job) for job in postings]
+    now = timezone.now()
+    chats = [Chat(id=i, user_id=1, conversation_id=None, message=f'question {i}', response='answer ' * 60,
+                  created_at=now - timedelta(minutes=i)) for i in range(args.chats)]
+
+    drf, fast = JSONRenderer(), renderers.ORJSONRenderer()
+    assert json.loads(drf.render(response)) == json.loads(fast.render(response))
+
+    def history(renderer, native):
+        data = ChatSerializer(chats, many=True, context={'native_datetimes': native}).data
+        return renderer.render({'next': None, 'results': data})
+
+    assert history(drf, False) == history(fast, True)
+
+    print(f"Benchmarking JSON: {len(postings)} postings ({len(upstream_body) / 1024:.1f} KB upstream), "
+          f"{args.chats} chats per history page, orjson {'on' if renderers.use_orjson() else 'off'}")
+    print("=" * 80)
+    print(f"{'payload':<18} {'DRF us':>12} {'orjson us':>12} {'speedup':>9} {'KB':>9}")
+    report('jobs render', timed(lambda: drf.render(response), args.seconds),
+           timed(lambda: fast.render(response), args.seconds), len(fast.render(response)))
+    report('jobs parse', timed(lambda: json.loads(upstream_body), args.seconds),
+           timed(lambda: renderers.loads(upstream_body), args.seconds), len(upstream_body))
+
+    def decoded():
+        jobs = [json.loads(text) for text in stored]
+        return drf.render({**response, 'data': jobs})
+
+    def passthrough():
+        return fast.render({**response, 'data': [renderers.RawJSON(text) for text in stored]})
+
+    report('jobs from index', timed(decoded, args.seconds), timed(passthrough, args.seconds), len(passthrough()))
+    report('history page', timed(lambda: history(drf, False), args.seconds),
+           timed(lambda: history(fast, True), args.seconds), len(history(fast, True)))
+
+    with override_settings(JSON_BACKEND='stdlib'):
+        stdlib = timed(lambda: fast.render(response), args.seconds)
+    print(f"\nORJSONRenderer with JSON_BACKEND=stdlib: jobs render {stdlib:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Load test of the API's hot paths against stub upstreams.
+
+Starts benchmarks/stub_upstream.py in-process as both JSearch and Gemini
+(configurable latency and failure rate), points the backend at it and drives
+each endpoint in turn with --concurrency client threads through Django's test
+client, against a throwaway SQLite database (never db.sqlite3):
+
+    register  POST /api/register         one per --users
+    login     POST /api/login
+    chat      POST /api/chat
+    history   GET  /api/chat/history
+    jobs      POST /api/jobs/search      --distinct job titles, cycled
+    colleges  POST /api/colleges/search  --distinct fields, cycled
+
+For every endpoint it reports p50/p95/p99 latency, throughput, errors, SQL
+queries and response bytes per request (clients send --accept-encoding), and writes the numbers as JSON together with the git
+commit, so runs on two commits can be compared:
+
+    python benchmarks/load_test.py --requests 300 --concurrency 16 --latency 0.2
+    python benchmarks/load_test.py --failure-rate 0.1 --endpoints chat,jobs
+    python benchmarks/load_test.py --compare benchmarks/results/load-1d5531c.json
+
+Requests run in one process, so the numbers include the full Django stack but
+no WSGI server; see asgi_vs_wsgi.py for that. Query counting wraps each
+request in CaptureQueriesContext, which adds a little overhead per query.
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+from stub_upstream import start_stub  # noqa: E402
+
+ENDPOINTS = ['register', 'login', 'chat', 'history', 'jobs', 'colleges']
+JOB_TITLES = ['Python Developer', 'Data Analyst', 'Product Manager', 'DevOps Engineer', 'UX Designer',
+              'Java Developer', 'Data Scientist', 'QA Engineer', 'Business Analyst', 'Cloud Architect']
+FIELDS = ['Computer Science', 'Mechanical Engineering', 'Business Administration', 'Medicine', 'Law',
+          'Architecture', 'Economics', 'Data Science', 'Psychology', 'Civil Engineering']
+PASSWORD = 'loadtest-pass-123'
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, dirty
+
+
+def run_phase(total, concurrency, send):
+    """
+    Call ``send(i)`` for i in range(total) from ``concurrency`` threads.
+    ``send`` returns a Django test client response; returns
+    (elapsed, latencies, query counts, response sizes, errors).
+    """
+    from django.db import connection, connections
+    from django.test.utils import CaptureQueriesContext
+
+    latencies = []
+    queries = []
+    sizes = []
+    errors = []
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    with CaptureQueriesContext(connection) as captured:
+                        response = send(i)
+                    status = response.status_code
+                except Exception as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if isinstance(status, int) and status < 400:
+                        latencies.append(elapsed)
+                        queries.append(len(captured))
+                        sizes.append(len(response.content))
+                    else:
+                        errors.append(status)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(min(concurrency, total))]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, queries, sizes, errors
+
+
+def summarize(total, elapsed, latencies, queries, sizes, errors):
+    result = {
+        'requests': total,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'throughput': round(total / elapsed, 2) if elapsed else None,
+    }
+    if latencies:
+        result.update({
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'max_ms': round(max(latencies) * 1000, 2),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+            'bytes_mean': round(sum(sizes) / len(sizes)),
+        })
+    if errors:
+        result['error_statuses'] = {str(status): errors.count(status) for status in set(errors)}
+    return result
+
+
+def run(args):
+    from django.test import Client
+
+    users = [f'load{i}' for i in range(args.users)]
+    tokens = {}
+    results = {}
+
+    def client(i):
+        return Client(headers={'Authorization': f'Bearer {tokens[users[i % len(users)]]}',
+                               'Accept-Encoding': args.accept_encoding})
+
+    def register(i):
+        return Client().post('/api/register', {'username': users[i], 'email': f'{users[i]}@example.com',
+                                               'password': PASSWORD}, content_type='application/json')
+
+    def login(i):
+        username = users[i % len(users)]
+        response = Client().post('/api/login', {'username': username, 'password': PASSWORD},
+                                 content_type='application/json')
+        if response.status_code == 200:
+            tokens[username] = response.json()['access']
+        return response
+
+    def chat(i):
+        return client(i).post('/api/chat', {'message': f"How do I grow my career as a {JOB_TITLES[i % 10]}? ({i})"},
+                              content_type='application/json')
+
+    def history(i):
+        return client(i).get('/api/chat/history')
+
+    def jobs(i):
+        return client(i).post('/api/jobs/search', {'job_title': JOB_TITLES[i % args.distinct % len(JOB_TITLES)],
+                                                   'location': 'India'}, content_type='application/json')
+
+    def colleges(i):
+        return client(i).post('/api/colleges/search', {'field': FIELDS[i % args.distinct % len(FIELDS)],
+                                                       'location': 'India'}, content_type='application/json')
+
+    phases = {'register': register, 'login': login, 'chat': chat, 'history': history, 'jobs': jobs,
+              'colleges': colleges}
+    for name in ENDPOINTS:
+        # Users are always registered and logged in, but only reported when asked for
+        if name == 'register' or (name == 'login' and name not in args.endpoints):
+            total = args.users
+        elif name in args.endpoints:
+            total = args.requests
+        else:
+            continue
+        outcome = summarize(total, *run_phase(total, args.concurrency, phases[name]))
+        if name in args.endpoints:
+            results[name] = outcome
+        if name == 'login' and not tokens:
+            raise SystemExit("No user could log in; aborting")
+    return results
+
+
+def print_results(results):
+    print(f"{'endpoint':<10} {'req':>6} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'queries':>8} {'bytes':>8}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['requests']:>6} {r['errors']:>5} {r['throughput'] or 0:>8.1f} "
+              f"{r.get('p50_ms', 0):>9.1f} {r.get('p95_ms', 0):>9.1f} {r.get('p99_ms', 0):>9.1f} "
+              f"{r.get('queries_mean', 0):>8.1f} {r.get('bytes_mean', 0):>8}")
+
+
+def print_comparison(results, baseline):
+    print(f"\nCompared with {baseline['commit']} ({baseline['timestamp']}):")
+    print(f"{'endpoint':<10} {'metric':<13} {'before':>10} {'after':>10} {'change':>8}")
+    for name, r in results.items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            continue
+        for metric in ('throughput', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_mean', 'bytes_mean'):
+            old, new = before.get(metric), r.get(metric)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.0f}%" if old else ''
+            print(f"{name:<10} {metric:<13} {old:>10.2f} {new:>10.2f} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API hot-path load test against stub upstreams")
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                        help=f"comma-separated subset of {','.join(ENDPOINTS)}")
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint (register: --users)')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--distinct', type=int, default=5,
+                        help='distinct job titles / college fields searched (lower means more cache hits)')
+    parser.add_argument('--latency', type=float, default=0.1, help='stub JSearch latency in seconds')
+    parser.add_argument('--gemini-latency', type=float, help='stub Gemini latency (default: --latency)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of upstream calls that fail')
+    parser.add_argument('--accept-encoding', default='gzip, deflate, br',
+                        help="Accept-Encoding sent by authenticated clients ('identity' for none)")
+    parser.add_argument('--output', help='results file (default: benchmarks/results/load-<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--verbose', action='store_true', help="keep the backend's logging (errors are counted either way)")
+    args = parser.parse_args()
+    args.endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    stub = start_stub(latency=args.latency, failure_rate=args.failure_rate, gemini_latency=args.gemini_latency)
+    stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+    workdir = tempfile.mkdtemp(prefix='careeradvisor-load-')
+    os.environ.update(
+        GEMINI_API_KEY='benchmark',
+        GEMINI_API_ENDPOINT=stub_url,
+        RAPIDAPI_JSEARCH_URL=f'{stub_url}/search',
+        SEARCH_RATE='1000000', SEARCH_BURST='1000000',
+        LOGIN_RATE='1000000', LOGIN_BURST='1000000',
+        GEMINI_RATE='1000000', GEMINI_BURST='1000000',
+        RAPIDAPI_RATE='1000000', RAPIDAPI_BURST='1000000',
+        TRACE_SAMPLE_RATE='0',
+        SEMANTIC_CACHE_PATH=os.path.join(workdir, 'semantic_index.npz'),
+    )
+
+    import django
+    django.setup()
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    from django.conf import settings
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+
+    # A file database: the default in-memory test database is one shared
+    # connection cache that serializes every thread
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'load.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        results = run(args)
+    finally:
+        runner.teardown_databases(old_config)
+        stub.shutdown()
+
+    commit, dirty = git_commit()
+    report = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': sys.version.split()[0],
+        'database': settings.DATABASES['default']['ENGINE'],
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'endpoints': results,
+    }
+
+    print(f"Load test at {commit}{' (dirty)' if dirty else ''}: concurrency {args.concurrency}, "
+          f"upstream latency {args.latency}s, failure rate {args.failure_rate}")
+    print("=" * 80)
+    print_results(results)
+
+    output = Path(args.output) if args.output else BACKEND_DIR / 'benchmarks' / 'results' / f'load-{commit}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Logins per second per core for each password hashing policy.
+
+For every hasher whose library is installed (pbkdf2 and scrypt always are,
+argon2 and bcrypt need argon2-cffi and bcrypt) it times password
+verification, the cost of a login, on one thread and on --threads threads,
+with the cost settings from the environment (PBKDF2_ITERATIONS,
+SCRYPT_WORK_FACTOR, ...; see careeradvisor.hashers). It then measures
+end-to-end POST /api/login throughput with PASSWORD_HASHING_ALGORITHM
+against a throwaway test database (never db.sqlite3):
+
+    python benchmarks/password_hashing.py
+    PBKDF2_ITERATIONS=300000 python benchmarks/password_hashing.py --logins 200
+    PASSWORD_HASHING_ALGORITHM=scrypt python benchmarks/password_hashing.py
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.update(LOGIN_RATE='1000000', LOGIN_BURST='1000000', TRACE_SAMPLE_RATE='0')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils.module_loading import import_string  # noqa: E402
+
+from careeradvisor.hashers import cpu_count  # noqa: E402
+
+PASSWORD = 'benchmark-pass-123'
+
+
+def run_threads(threads, total, work):
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                work(i)
+        finally:
+            connections.close_all()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def bench_hasher(name, path, verifies, threads, cores):
+    hasher = import_string(path)()
+    try:
+        start = time.perf_counter()
+        encoded = hasher.encode(PASSWORD, hasher.salt())
+        hash_ms = (time.perf_counter() - start) * 1000
+    except ValueError as e:
+        print(f"{name:<8} skipped: {e}")
+        return
+
+    single = verifies / run_threads(1, verifies, lambda i: hasher.verify(PASSWORD, encoded))
+    parallel = verifies * threads / run_threads(threads, verifies * threads, lambda i: hasher.verify(PASSWORD, encoded))
+    params = ', '.join(
+        f'{key}={value}' for key, value in hasher.safe_summary(encoded).items()
+        if key not in ('algorithm', 'salt', 'hash', 'checksum')
+    )
+    print(f"{name:<8} {hash_ms:>9.1f} {single:>12.1f} {parallel:>14.1f} {parallel / min(threads, cores):>14.1f}   "
+          f"{params}")
+
+
+def bench_logins(total, threads, cores):
+    users = [User.objects.create_user(f'bench{i}', password=PASSWORD) for i in range(threads)]
+    statuses = []
+
+    def login(i):
+        response = Client().post('/api/login', {'username': users[i % len(users)].username, 'password': PASSWORD},
+                                 content_type='application/json')
+        statuses.append(response.status_code)
+
+    elapsed = run_threads(threads, total, login)
+    ok = statuses.count(200)
+    print(f"\nPOST /api/login with {settings.PASSWORD_HASHING_ALGORITHM}: {total} logins on {threads} threads "
+          f"in {elapsed:.2f}s, {ok} ok")
+    print(f"{ok / elapsed:.1f} logins/s, {ok / elapsed / min(threads, cores):.1f} logins/s per core")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Password hashing throughput")
+    parser.add_argument('--verifies', type=int, default=20, help='verifications per thread and hasher')
+    parser.add_argument('--threads', type=int, default=cpu_count())
+    parser.add_argument('--logins', type=int, default=100, help='end-to-end logins (0 to skip)')
+    args = parser.parse_args()
+    cores = cpu_count()
+
+    print(f"Benchmarking password hashing on {cores} core(s), {args.threads} thread(s)")
+    print("=" * 80)
+    print(f"{'hasher':<8} {'hash ms':>9} {'verify/s 1t':>12} {'verify/s all':>14} {'per core':>14}   parameters")
+    for name, path in settings.PASSWORD_HASHER_CLASSES.items():
+        bench_hasher(name, path, args.verifies, args.threads, cores)
+
+    if args.logins:
+        # A file database, so concurrent last_login updates do not lock a shared in-memory one
+        workdir = tempfile.mkdtemp(prefix='careeradvisor-hashing-')
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'hashing.sqlite3')
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0)
+        old_config = runner.setup_databases()
+        try:
+            bench_logins(args.logins, args.threads, cores)
+        finally:
+            runner.teardown_databases(old_config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Bytes on the wire and server time per response for job search, college
+search and chat history, with and without field projection, for each
+content coding (identity, gzip and, if the brotli package is installed, br),
+and for a revalidation that ends in 304 Not Modified.
+
+Job and college searches go to benchmarks/stub_upstream.py (--fixtures for
+captured JSearch postings; the stub's synthetic descriptions compress better
+than real ones), chat history to --chats seeded chats. Everything runs
+against a throwaway test database (never db.sqlite3):
+
+    python benchmarks/response_size.py
+    python benchmarks/response_size.py --jobs 20 --fixtures jobs.json --requests 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+from stub_upstream import start_stub  # noqa: E402
+
+JOB_FIELDS = 'job_id,job_title,employer_name,job_city,job_apply_link'
+COLLEGE_FIELDS = 'name,location,ranking,website'
+
+
+def measure(send, requests, encoding, etag=None):
+    """
+    (mean bytes, mean ms, last response) over ``requests`` calls of send(headers).
+    """
+    headers = {'Accept-Encoding': encoding}
+    if etag:
+        headers['If-None-Match'] = etag
+    sizes = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = send(headers)
+        sizes.append(len(response.content))
+    elapsed = time.perf_counter() - start
+    return sum(sizes) / len(sizes), elapsed / requests * 1000, response
+
+
+def run(args, encodings):
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from careeradvisor.models import Chat
+
+    user = User.objects.create_user('payloads')
+    Chat.objects.bulk_create(Chat(user=user, message=f"question {i}", response="answer " * 60)
+                             for i in range(args.chats))
+    auth = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def search(url, body):
+        return lambda headers: Client().post(url, body, content_type='application/json', headers=headers)
+
+    endpoints = [
+        ('jobs', None, search('/api/jobs/search', {'job_title': 'Python Developer'})),
+        ('jobs', JOB_FIELDS, search('/api/jobs/search', {'job_title': 'Python Developer', 'fields': JOB_FIELDS})),
+        ('colleges', None, search('/api/colleges/search', {'field': 'Computer Science'})),
+        ('colleges', COLLEGE_FIELDS, search('/api/colleges/search', {'field': 'Computer Science',
+                                                                      'fields': COLLEGE_FIELDS})),
+        ('history', None, lambda headers: Client().get('/api/chat/history', headers={**auth, **headers})),
+        ('history', 'truncate=80', lambda headers: Client().get('/api/chat/history?truncate=80',
+                                                                headers={**auth, **headers})),
+    ]
+
+    print(f"{'endpoint':<9} {'fields':<56} {'encoding':<9} {'bytes':>9} {'ms/req':>8} {'vs full':>8}")
+    results = []
+    for name, fields, send in endpoints:
+        send({})  # warm the upstream cache and local indexes
+        for encoding in encodings:
+            size, ms, response = measure(send, args.requests, encoding)
+            baseline = next((r['bytes'] for r in results if r['endpoint'] == name and r['fields'] is None
+                             and r['encoding'] == 'identity'), size)
+            results.append({'endpoint': name, 'fields': fields, 'encoding': encoding, 'bytes': size, 'ms': ms})
+            print(f"{name:<9} {fields or 'all':<56} {encoding:<9} {size:>9.0f} {ms:>8.2f} "
+                  f"{(size - baseline) / baseline * 100:>+7.0f}%")
+        # Revalidate the last representation with its ETag
+        size, ms, revalidated = measure(send, args.requests, encodings[-1], etag=response['ETag'])
+        results.append({'endpoint': name, 'fields': fields, 'encoding': '304', 'bytes': size, 'ms': ms,
+                        'status': revalidated.status_code})
+        print(f"{name:<9} {fields or 'all':<56} {'304':<9} {size:>9.0f} {ms:>8.2f}   status {revalidated.status_code}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response size and time per projection and content coding")
+    parser.add_argument('--requests', type=int, default=20, help='requests per variant')
+    parser.add_argument('--jobs', type=int, default=10, help='postings per JSearch page')
+    parser.add_argument('--chats', type=int, default=100, help='seeded chats for the history endpoint')
+    parser.add_argument('--fixtures', help='JSON file mapping JSearch query strings to lists of postings')
+    args = parser.parse_args()
+
+    fixtures = None
+    if args.fixtures:
+        with open(args.fixtures, encoding='utf-8') as f:
+            fixtures = json.load(f)
+    stub = start_stub(jobs_per_page=args.jobs, fixtures=fixtures)
+    stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+    workdir = tempfile.mkdtemp(prefix='careeradvisor-payloads-')
+    os.environ.update(
+        GEMINI_API_KEY='benchmark',
+        GEMINI_API_ENDPOINT=stub_url,
+        RAPIDAPI_JSEARCH_URL=f'{stub_url}/search',
+        SEARCH_RATE='1000000', SEARCH_BURST='1000000',
+        TRACE_SAMPLE_RATE='0',
+        SEMANTIC_CACHE_PATH=os.path.join(workdir, 'semantic_index.npz'),
+    )
+
+    import django
+    django.setup()
+
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+
+    from careeradvisor import payloads
+
+    encodings = ['identity', 'gzip'] + (['br'] if payloads.brotli is not None else [])
+    print(f"Benchmarking response payloads: {args.requests} requests per variant, "
+          f"encodings {', '.join(encodings)}")
+    print("=" * 80)
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        run(args, encodings)
+    finally:
+        runner.teardown_databases(old_config)
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the JSearch (RapidAPI) and Gemini upstreams.
+
+Serves job postings on /search and Gemini's REST generateContent and
+streamGenerateContent methods after a configurable delay, so the backend can
+be load-tested, or the job index ingested, without touching paid APIs. Point
+the backend at it with
+
+    RAPIDAPI_JSEARCH_URL=http://127.0.0.1:<port>/search
+    GEMINI_API_ENDPOINT=http://127.0.0.1:<port>
+
+Postings are synthetic and deterministic per (query, page) unless --fixtures
+names a JSON file mapping query strings ("python developer jobs in India") to
+lists of postings, which are then paged like the real API. Gemini answers a
+JSON array of synthetic colleges to the college prompt and canned career
+advice to anything else.
+
+--failure-rate makes that fraction of requests fail with a 503, which the
+backend retries and then falls back on like a real outage. In-process users
+(benchmarks, tests) can change the latencies and failure rates of a running
+stub with inject_faults() to script outages and recoveries, fail exactly the
+next N requests (fail_next, gemini_fail_next), and count the requests that
+reached it with request_counts().
+
+    python benchmarks/stub_upstream.py --port 9100 --latency 0.5
+    python benchmarks/stub_upstream.py --gemini-latency 1.5 --failure-rate 0.05
+    python benchmarks/stub_upstream.py --fixtures jobs.json
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+CITIES = ["Bangalore", "Hyderabad", "Pune", "Chennai", "Mumbai"]
+
+GEMINI_PATH_RE = re.compile(r'^/v1beta/models/[^/:]+:(generateContent|streamGenerateContent)$')
+FIELD_RE = re.compile(r'Field of study: "(.*)"')
+LOCATION_RE = re.compile(r'Location preference: "(.*)"')
+
+ADVICE = (
+    "Start by listing the skills the roles you want ask for and compare them with your own. "
+    "Close the biggest gap with a small project you can show, then tailor your resume to it. "
+    "Practise explaining that project out loud before your interviews."
+)
+
+
+def make_job(index, query, page):
+    return {
+        "job_id": f"stub-{zlib.crc32(query.encode()):08x}-{index}",
+        "job_title": f"{query.split(' jobs in ')[0].title()} #{index}",
+        "employer_name": f"Stub Employer {index % 7}",
+        "job_city": CITIES[index % len(CITIES)],
+        "job_country": "IN",
+        "job_apply_link": f"https://example.com/jobs/{page}/{index}",
+        "job_description": "Lorem ipsum dolor sit amet. " * 40,
+        "job_posted_at_datetime_utc": "2025-01-01T00:00:00.000Z",
+    }
+
+
+def make_college(index, field, location):
+    city = (location or "India").split(',')[0].strip() or "India"
+    return {
+        "name": f"Stub Institute of {field.title() or 'Studies'} {city} #{index}",
+        "location": f"{city}, India",
+        "type": "Public University" if index % 2 else "Private College",
+        "ranking": str(index + 1),
+        "programs": [field.title() or "General Studies", "Data Science", "Management"],
+        "description": "A synthetic college served by the benchmark stub.",
+        "website": f"https://example.edu/{index}",
+        "rating": round(3.5 + (index % 15) / 10, 1),
+        "student_count": f"{(index + 1) * 1000:,}",
+        "established": 1950 + index,
+        "fees": "$10,000-15,000",
+    }
+
+
+def gemini_text(request):
+    """
+    Answer text for a Gemini generateContent request body.
+    """
+    system = ' '.join(part.get('text', '') for part in request.get('systemInstruction', {}).get('parts', []))
+    user = ' '.join(
+        part.get('text', '') for content in request.get('contents', []) for part in content.get('parts', [])
+    )
+    if 'college advisor' in system:
+        field = FIELD_RE.search(user)
+        location = LOCATION_RE.search(user)
+        field = field.group(1) if field else ''
+        location = location.group(1) if location else ''
+        return json.dumps([make_college(i, field, location) for i in range(8)])
+    if 'summary' in system:
+        return "The user is looking for career advice. " + ADVICE
+    return ADVICE
+
+
+def gemini_response(text):
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": 1}],
+        "usageMetadata": {"promptTokenCount": 100, "candidatesTokenCount": len(text) // 4},
+    }
+
+
+FAULTS = ('latency', 'failure_rate', 'fail_next', 'gemini_latency', 'gemini_failure_rate', 'gemini_fail_next')
+
+
+class StubServer(ThreadingHTTPServer):
+    # The socketserver default backlog of 5 drops connections under load
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out have hung up; that is what latency is for
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    failure_rate = 0.0
+    gemini_latency = 0.0
+    gemini_failure_rate = 0.0
+    jobs_per_page = 10
+    fixtures = None
+    fail_next = 0
+    gemini_fail_next = 0
+    # Requests received per upstream; start_stub gives each server its own
+    counts = None
+    counts_lock = threading.Lock()
+
+    def received(self, upstream):
+        cls = type(self)
+        if cls.counts is not None:
+            with cls.counts_lock:
+                cls.counts[upstream] += 1
+
+    def should_fail(self, upstream):
+        """
+        One of the next fail_next requests always fails, others with the failure rate.
+        """
+        prefix = 'gemini_' if upstream == 'gemini' else ''
+        cls = type(self)
+        with cls.counts_lock:
+            remaining = getattr(cls, prefix + 'fail_next')
+            if remaining > 0:
+                setattr(cls, prefix + 'fail_next', remaining - 1)
+                return True
+        return random.random() < getattr(self, prefix + 'failure_rate')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/search':
+            self.send_error(404)
+            return
+
+        params = parse_qs(url.query)
+        query = params.get('query', [''])[0]
+        page = int(params.get('page', ['1'])[0])
+        num_pages = int(params.get('num_pages', ['1'])[0])
+
+        self.received('rapidapi')
+        time.sleep(self.latency)
+        if self.should_fail('rapidapi'):
+            self.send_json(503, {"message": "Stub failure"})
+            return
+        self.send_json(200, {
+            "status": "OK",
+            "parameters": {"query": query, "page": page, "num_pages": num_pages},
+            "data": self.jobs(query, page, num_pages),
+        })
+
+    def do_POST(self):
+        match = GEMINI_PATH_RE.match(urlparse(self.path).path)
+        if match is None:
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+
+        self.received('gemini')
+        time.sleep(self.gemini_latency)
+        if self.should_fail('gemini'):
+            self.send_json(503, {"error": {"code": 503, "message": "Stub failure", "status": "UNAVAILABLE"}})
+            return
+        text = gemini_text(request)
+        if match.group(1) == 'generateContent':
+            self.send_json(200, gemini_response(text))
+        else:
+            # The REST transport reads a stream as one JSON array of responses
+            size = max(1, len(text) // 4)
+            self.send_json(200, [gemini_response(text[i:i + size]) for i in range(0, len(text), size)])
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def jobs(self, query, page, num_pages):
+        start = (page - 1) * self.jobs_per_page
+        end = start + num_pages * self.jobs_per_page
+        if self.fixtures is not None:
+            return self.fixtures.get(query, [])[start:end]
+        return [make_job(i, query, page) for i in range(start, end)]
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0, latency=0.0, jobs_per_page=10, fixtures=None, failure_rate=0.0,
+               gemini_latency=None, gemini_failure_rate=None):
+    """
+    Start the stub in a daemon thread and return the running server.
+    ``fixtures`` maps query strings to lists of postings. Gemini's latency and
+    failure rate default to the JSearch ones.
+    """
+    handler = type('ConfiguredStubHandler', (StubHandler,), {
+        'latency': latency,
+        'failure_rate': failure_rate,
+        'gemini_latency': latency if gemini_latency is None else gemini_latency,
+        'gemini_failure_rate': failure_rate if gemini_failure_rate is None else gemini_failure_rate,
+        'jobs_per_page': jobs_per_page,
+        'fixtures': fixtures,
+        'counts': {'rapidapi': 0, 'gemini': 0},
+        'counts_lock': threading.Lock(),
+    })
+    server = StubServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def inject_faults(server, **faults):
+    """
+    Change a running stub's latency, failure_rate, fail_next or their
+    gemini_ counterparts; requests already being served are unaffected.
+    """
+    handler = server.RequestHandlerClass
+    for name, value in faults.items():
+        if name not in FAULTS:
+            raise TypeError(f"unknown fault {name!r}")
+        with handler.counts_lock:
+            setattr(handler, name, value)
+
+
+def request_counts(server):
+    """
+    Requests received so far, as {'rapidapi': n, 'gemini': n}.
+    """
+    handler = server.RequestHandlerClass
+    with handler.counts_lock:
+        return dict(handler.counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds to sleep per request')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of requests answered with a 503')
+    parser.add_argument('--gemini-latency', type=float, help='Gemini latency in seconds (default: --latency)')
+    parser.add_argument('--gemini-failure-rate', type=float, help='Gemini failure rate (default: --failure-rate)')
+    parser.add_argument('--jobs-per-page', type=int, default=10)
+    parser.add_argument('--fixtures', help='JSON file mapping query strings to lists of postings')
+    args = parser.parse_args()
+
+    fixtures = None
+    if args.fixtures:
+        with open(args.fixtures, encoding='utf-8') as f:
+            fixtures = json.load(f)
+
+    server = start_stub(args.port, args.latency, args.jobs_per_page, fixtures, args.failure_rate,
+                        args.gemini_latency, args.gemini_failure_rate)
+    port = server.server_address[1]
+    print(f"Stub JSearch listening on http://127.0.0.1:{port}/search")
+    print(f"Stub Gemini listening on http://127.0.0.1:{port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
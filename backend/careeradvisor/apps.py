@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CareeradvisorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'careeradvisor'
+
+    def ready(self):
+        # Registers the user cache's invalidation signals
+        from . import authentication  # noqa: F401
@@ -0,0 +1,288 @@
+"""
+Async (ASGI) versions of the chatbot, job search and college search endpoints,
+and of task polling.
+
+These are plain Django async views rather than DRF views (DRF dispatch is
+synchronous). Outbound calls go through httpx and Gemini's async API, so one
+ASGI worker can hold many slow upstream round trips in flight; ORM access is
+pushed to a thread with sync_to_async.
+"""
+import json
+import logging
+import math
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from . import (
+    college_catalog, college_parser, conversations, job_index, job_pages, payloads, renderers, tasks, tracing,
+    upstream,
+)
+from .authentication import JWTAuthentication
+from .models import Chat, Conversation, LLMTask
+from .serializers import ChatSerializer, LLMTaskSerializer
+from .streaming import astream_chat_events, sse_response, wants_stream
+from .throttling import SearchRateThrottle
+from .views import (
+    GEMINI_MODEL_NAME, build_job_search_request, chat_failed, college_cache, colleges_failed, finish_chat,
+    finish_colleges, get_fallback_colleges, get_fallback_response, jobs_flight, make_key, normalize_text,
+    prepare_chat, prepare_colleges,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def search_params(request):
+    """
+    Async counterpart of views.search_params.
+    """
+    if request.method == 'GET':
+        return request.GET.dict()
+    return parse_json_body(request) or {}
+
+
+async def authenticate_jwt(request):
+    """
+    Resolve the JWT bearer user; the user lookup hits the DB so it runs in a thread.
+    """
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0] if result else None
+
+
+# ================= Gemini Chatbot (async) =================
+async def aget_chatbot_response(message, context=None):
+    """
+    Async counterpart of views.get_chatbot_response; only the Gemini call differs.
+    """
+    try:
+        cached, prompt = await sync_to_async(prepare_chat)(message, context)
+        if prompt is None:
+            return cached or get_fallback_response(message)
+
+        response = await upstream.agenerate_content(GEMINI_MODEL_NAME, prompt)
+        text = await sync_to_async(finish_chat)(message, context, response)
+        return text or get_fallback_response(message)
+
+    except Exception as e:
+        return chat_failed(message, e)
+
+
+@csrf_exempt
+@require_POST
+async def chatbot(request):
+    user = await authenticate_jwt(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    data = parse_json_body(request)
+    user_message = data.get('message') if data else None
+
+    if not user_message:
+        return JsonResponse({'error': 'Message field is required.'}, status=400)
+
+    conversation = None
+    conversation_id = str(data.get('conversation') or '')
+    if conversation_id:
+        if conversation_id.isdigit():
+            with tracing.stage('db'):
+                conversation = await Conversation.objects.filter(pk=int(conversation_id), user=user).afirst()
+        if conversation is None:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    if wants_stream(request):
+        return sse_response(astream_chat_events(user, user_message, conversation))
+
+    context = await sync_to_async(conversations.build_context)(conversation)
+    bot_response = await aget_chatbot_response(user_message, context)
+
+    with tracing.stage('db'):
+        chat = await Chat.objects.acreate(
+            user=user,
+            conversation=conversation,
+            message=user_message,
+            response=bot_response
+        )
+        await sync_to_async(conversations.after_turn)(conversation, context, user_message)
+
+    with tracing.stage('serialize'):
+        data = ChatSerializer(chat).data
+    return JsonResponse(data)
+
+
+# ================= Job Search API (async) =================
+async def afetch_jobs(job_title, location, page=1):
+    """
+    Async counterpart of views.fetch_jobs, coalesced through the same flight group.
+    """
+    async def fetch():
+        querystring, headers = build_job_search_request(job_title, location, page=page)
+        response = await upstream.ahttp_get('rapidapi', settings.RAPIDAPI_JSEARCH_URL, headers=headers, params=querystring)
+        response.raise_for_status()
+        with tracing.stage('parse'):
+            return renderers.loads(response.content).get("data", [])
+
+    return await jobs_flight.ado(make_key('jobs', job_title, location, page), fetch)
+
+
+def athrottled_response(wait):
+    response = JsonResponse(
+        {'status': 'error', 'message': 'Search capacity exceeded, please retry shortly.'}, status=429,
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def acircuit_open_response(retry_after):
+    response = JsonResponse(
+        {'status': 'error', 'message': 'Job search is temporarily unavailable, please retry shortly.'}, status=503,
+    )
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+async def check_search_throttle(request):
+    throttle = SearchRateThrottle()
+    # allow_request may touch the session user and a shared cache store
+    if await sync_to_async(throttle.allow_request)(request, None):
+        return None
+    return athrottled_response(throttle.wait())
+
+
+@payloads.conditional
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+async def job_search(request):
+    throttled = await check_search_throttle(request)
+    if throttled:
+        return throttled
+
+    data = search_params(request)
+    job_title = str(data.get('job_title', '')).strip()
+    location = str(data.get('location', 'India')).strip()
+
+    if not job_title:
+        return JsonResponse({'error': 'Job title is required'}, status=400)
+
+    try:
+        pages = job_pages.parse_pages(data.get('pages'))
+    except job_pages.InvalidPages as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if job_pages.wants_ndjson(request):
+        return job_pages.ndjson_response(job_pages.astream_job_pages(job_title, location, pages, afetch_jobs))
+
+    try:
+        if pages > 1:
+            jobs, source = await job_pages.acollect_job_pages(job_title, location, pages, afetch_jobs), 'live'
+        else:
+            jobs, source = await job_index.asearch(job_title, location, afetch_jobs)
+        return JsonResponse(payloads.project({
+            'status': 'success',
+            'count': len(jobs),
+            'data': jobs,
+            'source': source,
+        }, payloads.requested_fields(request, data)))
+
+    except upstream.UpstreamThrottled as e:
+        return athrottled_response(e.wait)
+
+    except upstream.CircuitOpen as e:
+        return acircuit_open_response(e.retry_after)
+
+    except (httpx.HTTPError, ValueError) as e:
+        # ValueError: a body that is not JSON (views.fetch_jobs reports it as a RequestException)
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+
+# ================= College Search API (async) =================
+async def agenerate_colleges(field, location):
+    """
+    Async counterpart of views.generate_colleges; only the Gemini call differs.
+    """
+    try:
+        prompt = prepare_colleges(field, location)
+        if prompt is None:
+            return None
+
+        response = await upstream.agenerate_content(GEMINI_MODEL_NAME, prompt)
+        return finish_colleges(response)
+
+    except Exception as e:
+        return colleges_failed(e)
+
+
+@payloads.conditional
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+async def college_search(request):
+    throttled = await check_search_throttle(request)
+    if throttled:
+        return throttled
+
+    data = search_params(request)
+    field = str(data.get('field', '')).strip()
+    location = str(data.get('location', 'India')).strip()
+
+    if not field:
+        return JsonResponse({'error': 'Field of study is required'}, status=400)
+
+    if job_pages.wants_ndjson(request):
+        return job_pages.ndjson_response(college_parser.astream_colleges(field, location))
+
+    colleges_data, source = await college_catalog.asearch(field, location, lambda: college_cache.aget_or_compute(
+        (field, location),
+        lambda: agenerate_colleges(normalize_text(field), normalize_text(location)),
+    ))
+
+    fields = payloads.requested_fields(request, data)
+    if colleges_data is None:
+        return JsonResponse(payloads.project(get_fallback_colleges(field, location).data, fields))
+
+    return JsonResponse(payloads.project({
+        'status': 'success',
+        'count': len(colleges_data),
+        'data': colleges_data,
+        'source': source,
+    }, fields))
+
+
+# ================= Background LLM tasks (async) =================
+@require_GET
+async def task_detail(request, pk):
+    """
+    Async counterpart of views.TaskDetailView. Waiting costs no thread here,
+    so ``?wait=N`` long-polls for up to 30 seconds.
+    """
+    user = await authenticate_jwt(request)
+    task = await LLMTask.objects.filter(pk=pk).afirst()
+    if task is None or (task.user_id is not None and (user is None or task.user_id != user.pk)):
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    try:
+        wait = min(float(request.GET.get('wait', 0)), 30)
+    except ValueError:
+        wait = 0
+    if wait > 0 and not task.finished:
+        task = await tasks.await_task(task.pk, wait)
+
+    return JsonResponse(LLMTaskSerializer(task).data)
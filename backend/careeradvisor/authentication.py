@@ -0,0 +1,139 @@
+"""
+JWT bearer authentication.
+
+simplejwt loads the token's User row on every request. Two cheaper paths:
+
+* JWTAuthentication keeps users in a per-process TTL cache keyed by id
+  (AUTH['USER_CACHE_TTL'] seconds, at most USER_CACHE_SIZE users). Saving
+  or deleting a User evicts it here, so deactivation and profile edits apply
+  at once in this process and within the TTL in every other one.
+* TokenUserAuthentication trusts the signed claims and never touches the
+  database: request.user is a simplejwt TokenUser that only carries the id.
+  It is meant for read-only views that need nothing but ``request.user.pk``.
+  A deactivated user keeps read access until the access token expires
+  (SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']); with AUTH['STATELESS_READS'] off
+  those views fall back to the cached lookup.
+
+``auth_user_lookups_total{source}`` counts how users were resolved.
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import metrics, tracing
+from .cache import LRUCache
+
+DEFAULTS = {
+    'USER_CACHE_TTL': 60,
+    'USER_CACHE_SIZE': 10000,
+    'STATELESS_READS': True,
+}
+
+LOOKUPS = metrics.counter('auth_user_lookups_total', 'JWT users by how they were resolved', ['source'])
+
+
+def config(name):
+    return getattr(settings, 'AUTH', {}).get(name, DEFAULTS[name])
+
+
+class UserCache:
+    """
+    Users by id, each entry valid for USER_CACHE_TTL seconds.
+    """
+
+    def __init__(self):
+        self.users = LRUCache(config('USER_CACHE_SIZE'))
+
+    def get(self, user_id):
+        entry = self.users.get(str(user_id))
+        if entry is None or time.monotonic() >= entry[0]:
+            return None
+        # Views may modify request.user; never hand out the shared instance
+        return copy.copy(entry[1])
+
+    def set(self, user):
+        ttl = config('USER_CACHE_TTL')
+        if ttl > 0:
+            self.users.set(str(user.pk), (time.monotonic() + ttl, copy.copy(user)))
+
+    def evict(self, user_id):
+        self.users.delete(str(user_id))
+
+    def clear(self):
+        self.users.clear()
+
+
+user_cache = UserCache()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def evict_user(sender, instance, **kwargs):
+    user_cache.evict(instance.pk)
+
+
+def load_user(user_id):
+    user = user_cache.get(user_id)
+    if user is not None:
+        LOOKUPS.inc(source='cache')
+        return user
+    LOOKUPS.inc(source='db')
+    with tracing.stage('db'):
+        user = get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id})
+    user_cache.set(user)
+    return user
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """
+    simplejwt's bearer authentication with cached user lookups, timed as the
+    request's ``auth`` stage.
+    """
+
+    def authenticate(self, request):
+        with tracing.stage('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        # simplejwt's get_user, with load_user() in place of the query
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = load_user(user_id)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class TokenUserAuthentication(JWTAuthentication):
+    """
+    Bearer authentication from the token's claims alone (see the module docstring).
+    """
+
+    def get_user(self, validated_token):
+        if not config('STATELESS_READS'):
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        LOOKUPS.inc(source='token')
+        return api_settings.TOKEN_USER_CLASS(validated_token)
@@ -0,0 +1,272 @@
+"""
+Two-tier response cache for expensive upstream lookups (Gemini, RapidAPI).
+
+Tier 1 is an in-process LRU, tier 2 is any Django cache backend (locmem,
+file, database, ...) configured under settings.CACHES. Entries carry a fresh
+TTL and a stale window: a stale hit is served immediately while a single
+background thread refreshes the key. Concurrent misses for one key are
+coalesced into a single compute call.
+"""
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+from .singleflight import SingleFlight
+
+
+# Synonyms for whole words or word sequences, applied after lowercasing and
+# whitespace collapsing; the longest match wins ("comp sci" before "cs")
+SYNONYMS = {
+    'cs': 'computer science',
+    'cse': 'computer science',
+    'comp sci': 'computer science',
+    'computer science and engineering': 'computer science',
+    'it': 'information technology',
+    'ai': 'artificial intelligence',
+    'ml': 'machine learning',
+    'ece': 'electronics and communication engineering',
+    'mech': 'mechanical engineering',
+    'bengaluru': 'bangalore',
+    'bombay': 'mumbai',
+    'madras': 'chennai',
+    'calcutta': 'kolkata',
+    'new delhi': 'delhi',
+}
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_SYNONYM_RE = re.compile(
+    r'\b(?:' + '|'.join(re.escape(term) for term in sorted(SYNONYMS, key=len, reverse=True)) + r')\b'
+)
+_EDGE_PUNCTUATION = ' .,;:!?"\'/-'
+
+
+def normalize_text(value):
+    """
+    Canonical form of a free-text search term: case-folded, whitespace
+    collapsed, edge punctuation stripped and known synonyms expanded wherever
+    they appear as whole words ("cs jobs" becomes "computer science jobs").
+    """
+    text = _WHITESPACE_RE.sub(' ', str(value or '')).strip(_EDGE_PUNCTUATION).casefold()
+    return _SYNONYM_RE.sub(lambda match: SYNONYMS[match.group()], text)
+
+
+def make_key(namespace, *parts):
+    return ':'.join([namespace] + [normalize_text(part) for part in parts])
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded in-process cache with least-recently-used eviction.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResponseCache:
+    """
+    LRU + shared-tier cache with TTL and stale-while-revalidate.
+
+    Values are stored already parsed, so hits skip both the upstream call and
+    any post-processing. A compute function returning None means "do not
+    cache" (e.g. the upstream failed and the caller will use fallback data).
+    """
+
+    def __init__(self, namespace, ttl, stale_ttl=0, maxsize=512, alias=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.local = LRUCache(maxsize)
+        self.alias = alias
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._tasks = set()
+        self.flight = SingleFlight(namespace)
+
+    @property
+    def shared(self):
+        if not self.alias:
+            return None
+        try:
+            return caches[self.alias]
+        except InvalidCacheBackendError:
+            return None
+
+    def key(self, *parts):
+        return make_key(self.namespace, *parts)
+
+    def get_entry(self, key):
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self.local.set(key, entry)
+        return entry
+
+    def set(self, key, value):
+        now = time.time()
+        entry = {
+            'value': value,
+            'fresh_until': now + self.ttl,
+            'stale_until': now + self.ttl + self.stale_ttl,
+        }
+        self.local.set(key, entry)
+        if self.shared is not None:
+            self.shared.set(key, entry, timeout=self.ttl + self.stale_ttl)
+        return entry
+
+    def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def get_or_compute(self, parts, compute):
+        """
+        Return the cached value for ``parts``, calling ``compute()`` on a miss.
+
+        Stale entries are returned as-is while ``compute`` runs once in the
+        background to refresh them.
+        """
+        key = self.key(*parts)
+        entry = self.get_entry(key)
+        now = time.time()
+
+        if entry is not None:
+            if now < entry['fresh_until']:
+                return entry['value']
+            if now < entry['stale_until']:
+                self._refresh_in_background(key, compute)
+                return entry['value']
+
+        def load():
+            value = compute()
+            if value is not None:
+                self.set(key, value)
+            return value
+
+        return self.flight.do(key, load)
+
+    async def aget_or_compute(self, parts, compute):
+        """
+        Async counterpart of get_or_compute; ``compute`` is a coroutine function.
+        The shared tier is accessed through the backend's async API.
+        """
+        key = self.key(*parts)
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = await self.shared.aget(key)
+            if entry is not None:
+                self.local.set(key, entry)
+        now = time.time()
+
+        if entry is not None:
+            if now < entry['fresh_until']:
+                return entry['value']
+            if now < entry['stale_until']:
+                self._arefresh_in_background(key, compute)
+                return entry['value']
+
+        async def load():
+            value = await compute()
+            if value is not None:
+                await self.aset(key, value)
+            return value
+
+        return await self.flight.ado(key, load)
+
+    async def aset(self, key, value):
+        now = time.time()
+        entry = {
+            'value': value,
+            'fresh_until': now + self.ttl,
+            'stale_until': now + self.ttl + self.stale_ttl,
+        }
+        self.local.set(key, entry)
+        if self.shared is not None:
+            await self.shared.aset(key, entry, timeout=self.ttl + self.stale_ttl)
+        return entry
+
+    def _arefresh_in_background(self, key, compute):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                value = await compute()
+                if value is not None:
+                    await self.aset(key, value)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        # Keep a strong reference so the task is not garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _refresh_in_background(self, key, compute):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = compute()
+                if value is not None:
+                    self.set(key, value)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+
+def build_cache(namespace):
+    """
+    Construct a ResponseCache from the RESPONSE_CACHE[namespace] settings block.
+    """
+    config = getattr(settings, 'RESPONSE_CACHE', {}).get(namespace, {})
+    return ResponseCache(
+        namespace,
+        ttl=config.get('TTL', 60 * 60),
+        stale_ttl=config.get('STALE_TTL', 0),
+        maxsize=config.get('MAXSIZE', 512),
+        alias=config.get('ALIAS'),
+    )
@@ -0,0 +1,170 @@
+"""
+Archive tier for chat history.
+
+Chats older than AFTER_DAYS are moved out of the hot Chat table, so it and
+its indexes only hold recent history. ``archive()`` (run by
+``manage.py archive_chats``, once or every N seconds) packs each user's old
+chats, oldest first, into ChatArchiveSegment rows of up to SEGMENT_SIZE
+chats stored as zlib-compressed JSON lines. It deletes the originals in the
+same transaction and keeps a one-row ChatArchive summary per user.
+
+Archived chats keep their ids and timestamps. ChatHistoryView's keyset
+pagination continues into the archive once the hot rows run out, so clients
+see one uninterrupted history. The summary row is read only at that point,
+and users without one never touch the archive. Archived chats no longer feed
+conversation prompts; the conversation summary covers them.
+"""
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+from .models import Chat, ChatArchive, ChatArchiveSegment, Conversation
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'AFTER_DAYS': 180,
+    'SEGMENT_SIZE': 500,
+    'COMPRESSION_LEVEL': 6,
+}
+
+ARCHIVED = metrics.counter('chat_archive_chats_total', 'Chats moved to the archive tier')
+READS = metrics.counter('chat_archive_reads_total', 'History pages that reached the archive tier')
+
+
+def config(name):
+    return getattr(settings, 'CHAT_ARCHIVE', {}).get(name, DEFAULTS[name])
+
+
+def cutoff(days=None):
+    return timezone.now() - timedelta(days=config('AFTER_DAYS') if days is None else days)
+
+
+# ================= Segments =================
+def encode_segment(chats):
+    lines = [
+        json.dumps({
+            'id': chat.pk,
+            'conversation': chat.conversation_id,
+            'message': chat.message,
+            'response': chat.response,
+            'created_at': chat.created_at.isoformat(),
+        }, ensure_ascii=False)
+        for chat in chats
+    ]
+    return zlib.compress('\n'.join(lines).encode(), config('COMPRESSION_LEVEL'))
+
+
+def decode_segment(segment):
+    """
+    The segment's chats as unsaved Chat instances, oldest first.
+    """
+    if segment.codec != 'zlib':
+        raise ValueError(f"Unknown chat archive codec {segment.codec!r}")
+    chats = []
+    for line in zlib.decompress(bytes(segment.data)).decode().splitlines():
+        row = json.loads(line)
+        chats.append(Chat(
+            id=row['id'],
+            user_id=segment.user_id,
+            conversation_id=row['conversation'],
+            message=row['message'],
+            response=row['response'],
+            created_at=datetime.fromisoformat(row['created_at']),
+        ))
+    return chats
+
+
+# ================= Archiving =================
+def archive_user(user_id, before):
+    """
+    Move the user's chats created before ``before`` into segments. Returns the number moved.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            chats = list(
+                Chat.objects.filter(user_id=user_id, created_at__lt=before)
+                .order_by('created_at', 'id')[:config('SEGMENT_SIZE')]
+            )
+            if not chats:
+                return moved
+            first, last = chats[0], chats[-1]
+            ChatArchiveSegment.objects.create(
+                user_id=user_id,
+                first_at=first.created_at, first_id=first.pk,
+                last_at=last.created_at, last_id=last.pk,
+                count=len(chats),
+                data=encode_segment(chats),
+            )
+            Chat.objects.filter(id__in=[chat.pk for chat in chats]).delete()
+
+            summary, _ = ChatArchive.objects.get_or_create(user_id=user_id, defaults={'oldest_at': first.created_at})
+            ChatArchive.objects.filter(pk=summary.pk).update(
+                chats=F('chats') + len(chats),
+                segments=F('segments') + 1,
+                newest_at=last.created_at,
+            )
+        moved += len(chats)
+        ARCHIVED.inc(len(chats))
+
+
+def archive(days=None, user_ids=None, dry_run=False):
+    """
+    Archive every chat older than ``days`` (default AFTER_DAYS), optionally
+    only for ``user_ids``. Returns (users, chats) archived, or that would be.
+    """
+    before = cutoff(days)
+    pending = Chat.objects.filter(created_at__lt=before)
+    if user_ids:
+        pending = pending.filter(user_id__in=user_ids)
+    if dry_run:
+        return pending.values('user_id').distinct().count(), pending.count()
+
+    users = chats = 0
+    for user_id in pending.values_list('user_id', flat=True).distinct().order_by('user_id'):
+        moved = archive_user(user_id, before)
+        if moved:
+            users += 1
+            chats += moved
+            logger.info("Archived %s chats of user %s", moved, user_id)
+    return users, chats
+
+
+# ================= Reading =================
+def archived_chats(user_id, before=None, limit=50, conversation_id=None):
+    """
+    Up to ``limit`` archived chats of the user, newest first, older than the
+    ``before`` (created_at, id) key when given. Chats of deleted
+    conversations are skipped.
+    """
+    if not ChatArchive.objects.filter(user_id=user_id).exists():
+        return []
+    READS.inc()
+    segments = ChatArchiveSegment.objects.filter(user_id=user_id).order_by('-last_at', '-last_id')
+    if before is not None:
+        created_at, pk = before
+        segments = segments.filter(Q(first_at__lt=created_at) | Q(first_at=created_at, first_id__lt=pk))
+
+    chats = []
+    for segment in segments.iterator(chunk_size=4):
+        found = [
+            chat for chat in reversed(decode_segment(segment))
+            if (before is None or (chat.created_at, chat.pk) < before)
+            and (conversation_id is None or chat.conversation_id == conversation_id)
+        ]
+        conversation_ids = {chat.conversation_id for chat in found if chat.conversation_id is not None}
+        if conversation_ids:
+            existing = set(Conversation.objects.filter(id__in=conversation_ids).values_list('id', flat=True))
+            found = [chat for chat in found if chat.conversation_id is None or chat.conversation_id in existing]
+        chats.extend(found)
+        if len(chats) >= limit:
+            break
+    return chats[:limit]
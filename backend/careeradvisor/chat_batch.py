@@ -0,0 +1,122 @@
+"""
+Batch chat answering for POST /api/chat/batch.
+
+Distinct messages are answered concurrently on a shared pool of
+settings.CHAT_BATCH['CONCURRENCY'] threads; repeats within a batch are
+answered once. An item that runs into the shared Gemini rate limit waits for
+its bucket (up to THROTTLE_WAIT seconds in total) instead of falling back
+straight away, since bulk importers would rather wait than store canned
+answers. Other failures fall back to the rule-based answer, flagged per item.
+All answered rows are then written with one bulk_create in one transaction.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import metrics
+from .models import Chat
+from .tracing import fallback, stage
+from .upstream import UpstreamThrottled
+
+DEFAULTS = {
+    'MAX_MESSAGES': 500,
+    'CONCURRENCY': 16,
+    'THROTTLE_WAIT': 30,
+}
+
+BATCH_ITEMS = metrics.counter('chat_batch_items_total', 'Chat batch items by outcome', ['outcome'])
+BATCH_SECONDS = metrics.histogram('chat_batch_seconds', 'Time to answer and store a chat batch')
+
+
+def config(name):
+    return getattr(settings, 'CHAT_BATCH', {}).get(name, DEFAULTS[name])
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config('CONCURRENCY'), thread_name_prefix='chat-batch')
+    return _executor
+
+
+def validate_item(item):
+    """
+    (message, error) for one request item: a string or {"message": "..."}.
+    """
+    if isinstance(item, dict):
+        item = item.get('message')
+    if not isinstance(item, str) or not item.strip():
+        return None, 'Message must be a non-empty string.'
+    return item, None
+
+
+def answer(message, deadline):
+    """
+    (response, fallback) for one message.
+    """
+    from .views import generate_chatbot_response, get_fallback_response, upstream_failure_reason
+
+    try:
+        while True:
+            try:
+                text = generate_chatbot_response(message)
+                if text:
+                    return text, False
+                break
+            except UpstreamThrottled as e:
+                if time.monotonic() + e.wait > deadline:
+                    fallback('chat', upstream_failure_reason(e))
+                    break
+                time.sleep(e.wait)
+            except Exception as e:
+                fallback('chat', upstream_failure_reason(e))
+                break
+        return get_fallback_response(message), True
+    finally:
+        # Pool threads outlive the request; don't leave their connections open
+        close_old_connections()
+
+
+def answer_all(messages):
+    """
+    Answers for ``messages`` in order, as (response, fallback) pairs.
+    """
+    deadline = time.monotonic() + config('THROTTLE_WAIT')
+    distinct = list(dict.fromkeys(messages))
+    answers = dict(zip(distinct, get_executor().map(lambda message: answer(message, deadline), distinct)))
+    return [answers[message] for message in messages]
+
+
+def run_batch(user, items):
+    """
+    Answer and persist a batch. ``items`` holds a message string or an
+    error string per position; returns per-item results in input order.
+    """
+    with BATCH_SECONDS.time():
+        valid = [(index, message) for index, (message, error) in enumerate(items) if error is None]
+        answers = answer_all([message for _, message in valid])
+
+        with stage('db'), transaction.atomic():
+            chats = Chat.objects.bulk_create([
+                Chat(user=user, message=message, response=response)
+                for (_, message), (response, _) in zip(valid, answers)
+            ])
+
+    results = [None] * len(items)
+    for (index, _), chat, (_, used_fallback) in zip(valid, chats, answers):
+        results[index] = {'index': index, 'status': 'ok', 'chat': chat, 'fallback': used_fallback}
+        BATCH_ITEMS.inc(outcome='fallback' if used_fallback else 'ok')
+    for index, (_, error) in enumerate(items):
+        if error is not None:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+            BATCH_ITEMS.inc(outcome='error')
+    return results
@@ -0,0 +1,277 @@
+"""
+Circuit breakers for the external APIs.
+
+careeradvisor.upstream runs every Gemini and JSearch call through the
+upstream's breaker (``guard()``), which works in three states:
+
+* closed: calls go through and their outcomes over the last WINDOW seconds
+  are counted. Once there are at least MIN_CALLS, the breaker opens if
+  FAILURE_RATE of them failed or SLOW_CALL_RATE took SLOW_CALL_SECONDS or
+  longer.
+* open: calls raise CircuitOpen before any network I/O, so views drop to
+  their fallback (rule-based chat answers, fallback colleges, stale jobs)
+  at once instead of after a timeout. After OPEN_SECONDS it turns half-open.
+* half-open: PROBES calls at a time go through as probes and everything
+  else is still rejected. PROBES successful probes close the breaker; a
+  failed or slow one opens it again, and so does one still in flight after
+  PROBE_TIMEOUT seconds.
+
+Transport errors, timeouts, 429 and 5xx answers are failures; client errors
+and the local rate limit are not. A cancelled call counts as neither. A
+streamed answer's outcome is recorded when the stream ends (see Call).
+Breakers are per process, configured by settings.CIRCUIT_BREAKER with
+per-upstream overrides under 'UPSTREAMS'.
+Their state is served on /api/health and on /metrics.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from . import metrics
+
+DEFAULTS = {
+    'ENABLED': True,
+    'WINDOW': 60,
+    'MIN_CALLS': 10,
+    'FAILURE_RATE': 0.5,
+    'SLOW_CALL_SECONDS': 10,
+    'SLOW_CALL_RATE': 0.8,
+    'OPEN_SECONDS': 30,
+    'PROBES': 1,
+    'PROBE_TIMEOUT': 60,
+}
+
+UPSTREAMS = ('gemini', 'rapidapi')
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def config(name, upstream=None):
+    breaker_settings = getattr(settings, 'CIRCUIT_BREAKER', {})
+    value = breaker_settings.get('UPSTREAMS', {}).get(upstream, {}).get(name)
+    return breaker_settings.get(name, DEFAULTS[name]) if value is None else value
+
+
+class CircuitOpen(RuntimeError):
+    """
+    The upstream's breaker rejected the call; it may be retried after ``retry_after`` seconds.
+    """
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f"{upstream} circuit is open, retry in {retry_after:.1f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.opened_at = None
+        # (time, failed, slow) of closed-state calls within WINDOW
+        self.calls = deque()
+        self.failures = 0
+        self.slow = 0
+        # Start times of the half-open probes in flight, by probe token
+        self.probes = {}
+        self.probe_successes = 0
+
+    def transition(self, state, now):
+        self.state = state
+        self.opened_at = now if state == OPEN else self.opened_at
+        self.calls.clear()
+        self.failures = self.slow = 0
+        self.probes = {}
+        self.probe_successes = 0
+        TRANSITIONS.inc(upstream=self.upstream, state=state)
+
+    def allow(self):
+        """
+        Admit one call or raise CircuitOpen. Returns a token for a half-open
+        probe, to pass to record() or release(), and None for other calls.
+        """
+        if not config('ENABLED', self.upstream):
+            return None
+        with self.lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                cutoff = now - config('PROBE_TIMEOUT', self.upstream)
+                if any(started < cutoff for started in self.probes.values()):
+                    # A stuck probe is as bad as a slow one
+                    self.transition(OPEN, now)
+            if self.state == OPEN:
+                wait = self.opened_at + config('OPEN_SECONDS', self.upstream) - now
+                if wait > 0:
+                    REJECTED.inc(upstream=self.upstream)
+                    raise CircuitOpen(self.upstream, wait)
+                self.transition(HALF_OPEN, now)
+            if self.state == HALF_OPEN:
+                if len(self.probes) >= config('PROBES', self.upstream):
+                    REJECTED.inc(upstream=self.upstream)
+                    raise CircuitOpen(self.upstream, 1.0)
+                probe = object()
+                self.probes[probe] = now
+                return probe
+            return None
+
+    def release(self, probe):
+        """
+        Forget an admitted call whose outcome says nothing about the upstream.
+        """
+        if probe is not None:
+            with self.lock:
+                self.probes.pop(probe, None)
+
+    def record(self, failed, elapsed, probe=None):
+        upstream = self.upstream
+        slow = elapsed >= config('SLOW_CALL_SECONDS', upstream)
+        with self.lock:
+            now = time.monotonic()
+            if probe is not None:
+                if self.probes.pop(probe, None) is None:
+                    # Timed out, or admitted before the last transition
+                    return
+                if failed or slow:
+                    self.transition(OPEN, now)
+                else:
+                    self.probe_successes += 1
+                    if self.probe_successes >= config('PROBES', upstream):
+                        self.transition(CLOSED, now)
+                return
+            if self.state != CLOSED:
+                # A call admitted before the breaker opened
+                return
+
+            self.calls.append((now, failed, slow))
+            self.failures += failed
+            self.slow += slow
+            cutoff = now - config('WINDOW', upstream)
+            while self.calls and self.calls[0][0] < cutoff:
+                _, old_failed, old_slow = self.calls.popleft()
+                self.failures -= old_failed
+                self.slow -= old_slow
+
+            count = len(self.calls)
+            if count >= config('MIN_CALLS', upstream) and (
+                self.failures / count >= config('FAILURE_RATE', upstream)
+                or self.slow / count >= config('SLOW_CALL_RATE', upstream)
+            ):
+                self.transition(OPEN, now)
+
+    def snapshot(self):
+        with self.lock:
+            count = len(self.calls)
+            result = {
+                'state': self.state,
+                'calls': count,
+                'failure_rate': round(self.failures / count, 3) if count else 0.0,
+                'slow_call_rate': round(self.slow / count, 3) if count else 0.0,
+            }
+            if self.state == OPEN:
+                wait = self.opened_at + config('OPEN_SECONDS', self.upstream) - time.monotonic()
+                result['retry_in'] = round(max(0.0, wait), 3)
+            return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(upstream):
+    breaker = _breakers.get(upstream)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(upstream)
+            if breaker is None:
+                breaker = _breakers[upstream] = CircuitBreaker(upstream)
+    return breaker
+
+
+def reset():
+    with _breakers_lock:
+        _breakers.clear()
+
+
+class Call:
+    """
+    One admitted upstream call. At most one outcome is recorded: the first of
+    succeed(), fail() and release() wins and the others do nothing.
+    """
+
+    def __init__(self, breaker, counts):
+        self.breaker = breaker
+        self.counts = counts
+        self.probe = breaker.allow()
+        self.start = time.perf_counter()
+        # Set by the caller for answers that count as failures
+        self.failed = False
+        # Set by the caller when a stream will record the outcome once it ends
+        self.streaming = False
+        self.done = False
+
+    def finish(self):
+        done, self.done = self.done, True
+        return not done
+
+    def succeed(self, elapsed=None):
+        if self.finish():
+            elapsed = time.perf_counter() - self.start if elapsed is None else elapsed
+            self.breaker.record(self.failed, elapsed, self.probe)
+
+    def fail(self, exc):
+        if not self.counts(exc):
+            self.release()
+        elif self.finish():
+            self.breaker.record(True, time.perf_counter() - self.start, self.probe)
+
+    def release(self):
+        if self.finish():
+            self.breaker.release(self.probe)
+
+
+@contextmanager
+def guard(upstream, counts=lambda exc: True):
+    """
+    Run one upstream call under its breaker. Raises CircuitOpen without
+    running the block when the breaker rejects the call. The block sets
+    ``call.failed`` for answers that count as failures; exceptions count
+    when ``counts(exc)`` is true. A block that hands the call to a stream
+    sets ``call.streaming`` and the stream records the outcome instead.
+    Cancellation (or any other BaseException) releases the call.
+    """
+    call = Call(get_breaker(upstream), counts)
+    try:
+        yield call
+    except Exception as exc:
+        call.fail(exc)
+        raise
+    else:
+        if not call.streaming:
+            call.succeed()
+    finally:
+        if not call.streaming:
+            call.release()
+
+
+def snapshot():
+    return {upstream: get_breaker(upstream).snapshot() for upstream in UPSTREAMS}
+
+
+def breaker_states():
+    return {(upstream,): STATE_VALUES[get_breaker(upstream).state] for upstream in UPSTREAMS}
+
+
+STATE = metrics.gauge(
+    'circuit_breaker_state', 'Upstream circuit breaker state (0 closed, 1 half-open, 2 open)', ['upstream'],
+    collect=breaker_states,
+)
+TRANSITIONS = metrics.counter(
+    'circuit_breaker_transitions_total', 'Circuit breaker state changes by new state', ['upstream', 'state'],
+)
+REJECTED = metrics.counter('circuit_breaker_rejected_total', 'Upstream calls rejected by an open circuit', ['upstream'])
@@ -0,0 +1,238 @@
+"""
+Local college catalog in front of Gemini.
+
+College facts barely change, so every Gemini answer is upserted into College
+and Program and recorded as a CollegeQuery. ``search()`` then answers from
+the database:
+
+1. The same (field, location) was answered within FRESHNESS seconds: return
+   the colleges it returned, in Gemini's order.
+2. Otherwise query the catalog: colleges offering a program whose name
+   contains the field, in the location's city, state or country, best
+   ranked first. Use the hits if there are at least MIN_RESULTS of them.
+3. Otherwise ask Gemini and ingest its answer. If Gemini fails, whatever
+   the catalog has is served before the built-in fallback list.
+
+``manage.py load_colleges`` seeds the catalog from a file or the fallback
+list and pre-loads (field, location) pairs through Gemini.
+"""
+import hashlib
+import re
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics, tracing
+from .cache import make_key, normalize_text
+from .college_parser import validate_college
+from .models import College, CollegeQuery, Program
+
+DEFAULTS = {
+    'ENABLED': True,
+    'FRESHNESS': 30 * 24 * 60 * 60,
+    'MIN_RESULTS': 5,
+    'MAX_RESULTS': 10,
+    'MAX_PROGRAMS': 200,
+}
+
+# Second component of "City, X" that is a country rather than a state
+COUNTRIES = {
+    'india', 'usa', 'us', 'united states', 'united states of america', 'uk', 'united kingdom', 'canada',
+    'australia', 'germany', 'france', 'singapore', 'japan', 'china', 'netherlands', 'switzerland',
+    'ireland', 'new zealand',
+}
+
+SOURCES = metrics.counter('college_search_source_total', 'Where college search results were served from', ['source'])
+
+_NUMBER_RE = re.compile(r'\d+')
+
+
+def config(name):
+    return getattr(settings, 'COLLEGE_CATALOG', {}).get(name, DEFAULTS[name])
+
+
+def query_key(field, location):
+    return hashlib.sha1(make_key('colleges', field, location).encode()).hexdigest()
+
+
+def fresh_cutoff():
+    return timezone.now() - timedelta(seconds=config('FRESHNESS'))
+
+
+def split_location(location):
+    """
+    Normalized (city, state, country) from "City, State, Country" and its shorter forms.
+    """
+    parts = [normalize_text(part) for part in (location or '').split(',') if part.strip()]
+    if not parts:
+        return '', '', ''
+    city, rest = parts[0], parts[1:]
+    country = rest.pop() if len(rest) >= 2 or (rest and rest[-1] in COUNTRIES) else ''
+    return city, rest[0] if rest else '', country
+
+
+def parse_ranking(value):
+    match = _NUMBER_RE.search(str(value or ''))
+    return int(match.group()) if match else None
+
+
+# ================= Lookup =================
+def find(program=None, city=None, state=None, country=None, location=None, max_ranking=None, limit=None):
+    """
+    Catalog colleges matching every given filter, best ranked first.
+    ``location`` matches a city, state or country.
+    """
+    colleges = College.objects.all()
+    if program:
+        program_ids = list(
+            Program.objects.filter(key__contains=normalize_text(program))
+            .values_list('id', flat=True)[:config('MAX_PROGRAMS')]
+        )
+        if not program_ids:
+            return []
+        colleges = colleges.filter(
+            id__in=College.programs.through.objects.filter(program_id__in=program_ids).values('college_id'),
+        )
+    for name, value in (('city', city), ('state', state), ('country', country)):
+        if value:
+            colleges = colleges.filter(**{name: normalize_text(value)})
+    if location:
+        location = normalize_text(location)
+        colleges = colleges.filter(Q(city=location) | Q(state=location) | Q(country=location))
+    if max_ranking is not None:
+        colleges = colleges.filter(ranking__lte=max_ranking)
+    colleges = colleges.order_by(F('ranking').asc(nulls_last=True), F('rating').desc(nulls_last=True), 'id')
+    return list(colleges.values_list('data', flat=True)[:limit or config('MAX_RESULTS')])
+
+
+def colleges_by_id(ids):
+    by_id = College.objects.in_bulk(ids)
+    return [by_id[i].data for i in ids if i in by_id]
+
+
+def lookup(field, location, fresh=True):
+    """
+    Catalog results for a search, or None on a miss. With ``fresh=False``
+    any recorded answer and any single match count (used when Gemini is down).
+    """
+    with tracing.stage('db'):
+        query = CollegeQuery.objects.filter(key=query_key(field, location)).first()
+        if query is not None and (not fresh or query.fetched_at >= fresh_cutoff()):
+            return colleges_by_id(query.college_ids)
+
+        colleges = find(program=field, location=location)
+        if len(colleges) >= (config('MIN_RESULTS') if fresh else 1):
+            return colleges
+    return None
+
+
+# ================= Ingestion =================
+def college_fields(data):
+    city, state, country = split_location(data['location'])
+    return {
+        'name': data['name'][:255],
+        'city': city[:255],
+        'state': state[:255],
+        'country': country[:64],
+        'type': (data['type'] or '')[:255],
+        'ranking': parse_ranking(data['ranking']),
+        'rating': data['rating'],
+        'established': data['established'],
+        'data': data,
+    }
+
+
+def ingest(field, location, colleges):
+    """
+    Upsert colleges and their programs in bulk and, for a (field, location)
+    answer, record the query. The searched field counts as one of each
+    college's programs. Returns the number of colleges stored.
+    """
+    rows = {}
+    programs = {}
+    for data in colleges:
+        data = validate_college(data)
+        if data is None:
+            continue
+        key = normalize_text(data['name'])[:255]
+        rows[key] = College(key=key, **college_fields(data))
+        names = data['programs'] + ([field] if field else [])
+        programs[key] = {normalize_text(name)[:255]: name[:255] for name in names}
+
+    with transaction.atomic():
+        College.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['name', 'city', 'state', 'country', 'type', 'ranking', 'rating', 'established', 'data'],
+        )
+        college_ids = dict(College.objects.filter(key__in=rows).values_list('key', 'id'))
+
+        names = {key: name for offered in programs.values() for key, name in offered.items()}
+        Program.objects.bulk_create([Program(key=key, name=name) for key, name in names.items()], ignore_conflicts=True)
+        program_ids = dict(Program.objects.filter(key__in=names).values_list('key', 'id'))
+
+        Offered = College.programs.through
+        Offered.objects.bulk_create([
+            Offered(college_id=college_ids[college], program_id=program_ids[program])
+            for college, offered in programs.items() for program in offered
+        ], ignore_conflicts=True)
+
+        if field:
+            CollegeQuery.objects.update_or_create(
+                key=query_key(field, location),
+                defaults={
+                    'field': field[:255],
+                    'location': location[:255],
+                    'college_ids': [college_ids[key] for key in rows],
+                    'fetched_at': timezone.now(),
+                },
+            )
+    return len(rows)
+
+
+# ================= Search =================
+def search(field, location, generate):
+    """
+    Colleges for a search and where they came from ('catalog' or 'gemini').
+    ``generate()`` asks Gemini and returns None on failure; colleges are None
+    when neither source has any.
+    """
+    if not config('ENABLED'):
+        return generate(), 'gemini'
+
+    colleges = lookup(field, location)
+    source = 'catalog'
+    if colleges is None:
+        colleges = generate()
+        if colleges:
+            ingest(field, location, colleges)
+            source = 'gemini'
+        else:
+            colleges = lookup(field, location, fresh=False) or None
+    SOURCES.inc(source=source if colleges else 'fallback')
+    return colleges, source
+
+
+async def asearch(field, location, agenerate):
+    """
+    Async counterpart of search(); ``agenerate`` is a coroutine function.
+    """
+    if not config('ENABLED'):
+        return await agenerate(), 'gemini'
+
+    colleges = await sync_to_async(lookup)(field, location)
+    source = 'catalog'
+    if colleges is None:
+        colleges = await agenerate()
+        if colleges:
+            await sync_to_async(ingest)(field, location, colleges)
+            source = 'gemini'
+        else:
+            colleges = await sync_to_async(lookup)(field, location, fresh=False) or None
+    SOURCES.inc(source=source if colleges else 'fallback')
+    return colleges, source
@@ -0,0 +1,329 @@
+"""
+Extraction of college recommendations from Gemini output.
+
+The college prompt asks for JSON output mode, but the text is still treated
+as untrusted: CollegeStreamParser pulls every top-level ``{...}`` object out
+of the text as it arrives, ignoring markdown fences, prose around the array
+and a truncated last object. Each object is validated against SCHEMA: known
+fields are coerced to their types (``rating`` to a float in 0-5,
+``established`` to a year), unknown fields are dropped and objects without a
+name are rejected. A response is only unusable when no object survives.
+
+``college_parse_total{outcome}`` counts responses as ``ok``, ``salvaged``
+(some objects were invalid or the output was cut off) or ``failed``.
+
+With ``?stream=1`` (or ``Accept: application/x-ndjson``, see
+job_pages.wants_ndjson) the college search endpoints write each college as
+soon as its object is complete:
+
+    {"type": "college", "data": {...}}
+    {"type": "done", "count": 9, "source": "gemini"}
+
+``source`` is ``catalog``, ``cache``, ``gemini`` or ``fallback``. Streamed
+Gemini answers are ingested into the college catalog like any other.
+"""
+import json
+import logging
+import re
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import metrics, tracing, upstream
+from .renderers import ndjson_line
+
+logger = logging.getLogger(__name__)
+
+PARSES = metrics.counter('college_parse_total', 'Gemini college responses by parse outcome', ['outcome'])
+OBJECTS = metrics.counter('college_parse_objects_total', 'College objects found in Gemini output', ['outcome'])
+
+_TOKEN_RE = re.compile(r'\\.|\\\Z|[{}"]', re.S)
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+_YEAR_RE = re.compile(r'\b(1[0-9]{3}|20[0-9]{2})\b')
+
+
+# ================= Schema =================
+def as_text(value):
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    return str(value).strip() or None
+
+
+def as_rating(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        rating = float(value)
+    else:
+        match = _NUMBER_RE.search(str(value or ''))
+        if match is None:
+            return None
+        rating = float(match.group())
+    return round(rating, 2) if 0 <= rating <= 5 else None
+
+
+def as_year(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        year = value
+    else:
+        match = _YEAR_RE.search(str(value or ''))
+        if match is None:
+            return None
+        year = int(match.group())
+    return year if 1000 <= year <= 2100 else None
+
+
+def as_text_list(value):
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list):
+        return []
+    return [text for text in map(as_text, value) if text]
+
+
+SCHEMA = {
+    'name': as_text,
+    'location': as_text,
+    'type': as_text,
+    'ranking': as_text,
+    'programs': as_text_list,
+    'description': as_text,
+    'website': as_text,
+    'rating': as_rating,
+    'student_count': as_text,
+    'established': as_year,
+    'fees': as_text,
+}
+
+
+def validate_college(data):
+    """
+    The college coerced to SCHEMA, or None if it is not a named college.
+    """
+    if not isinstance(data, dict):
+        return None
+    college = {field: coerce(data.get(field)) for field, coerce in SCHEMA.items()}
+    return college if college['name'] else None
+
+
+# ================= Parsing =================
+class CollegeStreamParser:
+    """
+    Incremental extractor: ``feed()`` text chunks as they arrive and get back
+    the colleges completed by each one, then call ``finish()``.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.valid = 0
+        self.invalid = 0
+
+    def feed(self, text):
+        colleges = []
+        position = 0
+        if self.escape:
+            # The previous chunk ended on a backslash inside a string
+            self.escape = False
+            position = 1
+        begin = 0 if self.depth else None
+
+        for match in _TOKEN_RE.finditer(text, position):
+            token = match.group()
+            if token[0] == '\\':
+                self.escape = self.in_string and len(token) == 1
+                continue
+            if token == '"':
+                if self.depth:
+                    self.in_string = not self.in_string
+                continue
+            if self.in_string:
+                continue
+            if token == '{':
+                if self.depth == 0:
+                    begin = match.start()
+                    self.parts = []
+                self.depth += 1
+            elif self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.parts.append(text[begin:match.end()])
+                    colleges.extend(self.complete(''.join(self.parts)))
+                    begin = None
+
+        if self.depth:
+            self.parts.append(text[begin:])
+        return colleges
+
+    def complete(self, text):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            self.invalid += 1
+            return []
+        # {"colleges": [...]}: the array came wrapped in an object
+        if isinstance(data, dict) and 'name' not in data:
+            data = next((value for value in data.values() if isinstance(value, list)), [data])
+        else:
+            data = [data]
+
+        colleges = []
+        for item in data:
+            college = validate_college(item)
+            if college is None:
+                self.invalid += 1
+            else:
+                self.valid += 1
+                colleges.append(college)
+        return colleges
+
+    def finish(self):
+        """
+        Record the outcome of the whole response; returns it.
+        """
+        truncated = self.depth > 0
+        if not self.valid:
+            outcome = 'failed'
+        elif self.invalid or truncated:
+            outcome = 'salvaged'
+        else:
+            outcome = 'ok'
+        PARSES.inc(outcome=outcome)
+        OBJECTS.inc(self.valid, outcome='valid')
+        OBJECTS.inc(self.invalid + truncated, outcome='invalid')
+        return outcome
+
+
+def parse_colleges(text):
+    """
+    Validated colleges in a complete Gemini response, or None if there are none.
+    """
+    parser = CollegeStreamParser()
+    with tracing.stage('parse'):
+        colleges = parser.feed(text)
+        outcome = parser.finish()
+    if outcome != 'ok':
+        logger.warning("College output %s", outcome, extra={'fields': {'response_text': text[:2000]}})
+    return colleges or None
+
+
+# ================= Streaming =================
+def known_colleges(field, location):
+    """
+    (colleges, source) from the college catalog or the response cache, or (None, None).
+    """
+    from . import college_catalog
+    from .views import college_cache
+
+    if college_catalog.config('ENABLED'):
+        colleges = college_catalog.lookup(field, location)
+        if colleges is not None:
+            return colleges, 'catalog'
+    entry = college_cache.get_entry(college_cache.key(field, location))
+    if entry is not None and time.time() < entry['stale_until']:
+        return entry['value'], 'cache'
+    return None, None
+
+
+def store_colleges(field, location, colleges):
+    from . import college_catalog
+    from .views import college_cache
+
+    college_cache.set(college_cache.key(field, location), colleges)
+    if college_catalog.config('ENABLED'):
+        college_catalog.ingest(field, location, colleges)
+
+
+def done_line(count, source):
+    return ndjson_line({'type': 'done', 'count': count, 'source': source})
+
+
+def fallback_lines(field, location):
+    from .views import get_fallback_colleges
+
+    colleges = get_fallback_colleges(field, location).data['data']
+    for college in colleges:
+        yield ndjson_line({'type': 'college', 'data': college})
+    yield done_line(len(colleges), 'fallback')
+
+
+def stream_colleges(field, location):
+    from .streaming import chunk_text
+    from .views import GEMINI_MODEL_NAME, build_college_prompt, normalize_text, upstream_failure_reason
+
+    known, source = known_colleges(field, location)
+    if known is not None:
+        for college in known:
+            yield ndjson_line({'type': 'college', 'data': college})
+        yield done_line(len(known), source)
+        return
+
+    parser = CollegeStreamParser()
+    colleges = []
+    received = False
+    try:
+        if not settings.GEMINI_API_KEY:
+            tracing.fallback('colleges', 'no_api_key')
+        else:
+            prompt = build_college_prompt(normalize_text(field), normalize_text(location))
+            for chunk in upstream.generate_content(GEMINI_MODEL_NAME, prompt, stream=True):
+                text = chunk_text(chunk)
+                received = received or bool(text)
+                for college in parser.feed(text):
+                    colleges.append(college)
+                    yield ndjson_line({'type': 'college', 'data': college})
+    except Exception as e:
+        logger.error("Gemini streaming error: %s", e)
+        tracing.fallback('colleges', upstream_failure_reason(e))
+    if received:
+        # Colleges completed before a mid-stream failure are kept
+        parser.finish()
+
+    if not colleges:
+        yield from fallback_lines(field, location)
+        return
+    store_colleges(field, location, colleges)
+    yield done_line(len(colleges), 'gemini')
+
+
+async def astream_colleges(field, location):
+    from .streaming import chunk_text
+    from .views import GEMINI_MODEL_NAME, build_college_prompt, normalize_text, upstream_failure_reason
+
+    known, source = await sync_to_async(known_colleges)(field, location)
+    if known is not None:
+        for college in known:
+            yield ndjson_line({'type': 'college', 'data': college})
+        yield done_line(len(known), source)
+        return
+
+    parser = CollegeStreamParser()
+    colleges = []
+    received = False
+    try:
+        if not settings.GEMINI_API_KEY:
+            tracing.fallback('colleges', 'no_api_key')
+        else:
+            prompt = build_college_prompt(normalize_text(field), normalize_text(location))
+            response = await upstream.agenerate_content(GEMINI_MODEL_NAME, prompt, stream=True)
+            async for chunk in response:
+                text = chunk_text(chunk)
+                received = received or bool(text)
+                for college in parser.feed(text):
+                    colleges.append(college)
+                    yield ndjson_line({'type': 'college', 'data': college})
+    except Exception as e:
+        logger.error("Gemini streaming error: %s", e)
+        tracing.fallback('colleges', upstream_failure_reason(e))
+    if received:
+        parser.finish()
+
+    if not colleges:
+        for line in fallback_lines(field, location):
+            yield line
+        return
+    await sync_to_async(store_colleges)(field, location, colleges)
+    yield done_line(len(colleges), 'gemini')
@@ -0,0 +1,275 @@
+"""
+Conversation memory for the chatbot.
+
+A prompt for a message in a conversation carries two pieces of context:
+
+* the most recent turns, verbatim, newest first until HISTORY_TOKENS is
+  spent. They come from one query on the ``(conversation, created_at, id)``
+  index, limited to MAX_TURNS rows the summary does not already cover;
+* a rolling summary of everything older, stored on the Conversation row and
+  capped at SUMMARY_TOKENS.
+
+Whenever turns fall out of the recent window without being summarized, a
+background thread folds them into the summary (Gemini, or an extractive
+fallback) and moves ``summarized_through`` forward. Folding keeps only
+HISTORY_TOKENS / 2 worth of turns unsummarized, so the next few messages fit
+without another fold. The history part of a prompt is therefore bounded by
+SUMMARY_TOKENS + HISTORY_TOKENS however long the conversation grows.
+
+Token counts are estimates (careeradvisor.prompts.estimate_tokens); no
+tokenizer round trip is needed to stay within budget.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import metrics, prompts, tracing, upstream
+from .models import Chat, Conversation
+from .prompts import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'HISTORY_TOKENS': 1200,
+    'SUMMARY_TOKENS': 300,
+    'MAX_TURNS': 12,
+    'WORKERS': 2,
+}
+
+TITLE_LENGTH = 80
+# Longest excerpt of a single turn handed to the summarizer
+FOLD_TURN_CHARS = 1200
+
+CONTEXT_TOKENS = metrics.histogram('chat_context_tokens', 'Estimated history tokens added to chat prompts')
+SUMMARIES = metrics.counter('conversation_summaries_total', 'Rolling summary updates', ['method'])
+
+
+def config(name):
+    return getattr(settings, 'CONVERSATIONS', {}).get(name, DEFAULTS[name])
+
+
+def clip(text, tokens, keep='head'):
+    """
+    ``text`` cut to roughly ``tokens`` tokens, keeping its start or its end.
+    """
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    if keep == 'tail':
+        return '...' + text[-(limit - 3):]
+    return text[:limit - 3] + '...'
+
+
+class Context:
+    """
+    History for one prompt: the rolling summary and recent (message, response)
+    turns, oldest first. ``overflow`` is set when unsummarized turns were left
+    out of the window and should be folded into the summary.
+    """
+    __slots__ = ('summary', 'turns', 'tokens', 'overflow')
+
+    def __init__(self, summary='', turns=(), tokens=0, overflow=False):
+        self.summary = summary
+        self.turns = list(turns)
+        self.tokens = tokens
+        self.overflow = overflow
+
+    def __bool__(self):
+        return bool(self.summary or self.turns)
+
+
+def recent_turns(conversation, limit):
+    """
+    Unsummarized, answered turns of a conversation as (id, message, response), newest first.
+    """
+    queryset = (
+        Chat.objects
+        .filter(conversation=conversation, id__gt=conversation.summarized_through)
+        .exclude(response='')
+        .order_by('-created_at', '-id')
+        .values_list('id', 'message', 'response')
+    )
+    return list(queryset if limit is None else queryset[:limit])
+
+
+def fit(rows, budget):
+    """
+    The newest rows that fit ``budget`` tokens, newest first, with their
+    token count. The newest turn is always kept, clipped if need be.
+    """
+    kept, used = [], 0
+    for chat_id, message, response in rows:
+        cost = estimate_tokens(message) + estimate_tokens(response)
+        if used + cost > budget:
+            if not kept:
+                message = clip(message, budget // 4)
+                response = clip(response, budget - estimate_tokens(message))
+                kept.append((chat_id, message, response))
+                used = estimate_tokens(message) + estimate_tokens(response)
+            break
+        kept.append((chat_id, message, response))
+        used += cost
+    return kept, used
+
+
+def build_context(conversation):
+    if conversation is None:
+        return Context()
+
+    max_turns = config('MAX_TURNS')
+    with tracing.stage('db'):
+        rows = recent_turns(conversation, max_turns)
+
+    kept, used = fit(rows, config('HISTORY_TOKENS'))
+    summary = clip(conversation.summary, config('SUMMARY_TOKENS'), keep='tail')
+    context = Context(
+        summary=summary,
+        turns=[(message, response) for _, message, response in reversed(kept)],
+        tokens=used + estimate_tokens(summary),
+        # A full page of rows may hide older unsummarized turns
+        overflow=len(kept) < len(rows) or len(rows) == max_turns,
+    )
+    CONTEXT_TOKENS.observe(context.tokens)
+    return context
+
+
+def render(context):
+    """
+    The history section of a chat prompt, or '' without history.
+    """
+    if not context:
+        return ''
+    lines = []
+    if context.summary:
+        lines += ["Summary of the earlier conversation:", context.summary, ""]
+    if context.turns:
+        lines.append("Recent messages:")
+        for message, response in context.turns:
+            lines += [f"User: {message}", f"CareerCompass AI: {response}"]
+        lines.append("")
+    return '\n'.join(lines) + '\n'
+
+
+def record_turn(conversation, message):
+    """
+    Bump the conversation's activity time; the first message becomes its title.
+    """
+    updates = {'updated_at': timezone.now()}
+    if not conversation.title:
+        updates['title'] = conversation.title = message[:TITLE_LENGTH]
+    Conversation.objects.filter(pk=conversation.pk).update(**updates)
+
+
+# ================= Rolling summaries =================
+def build_summary_prompt(summary, turns):
+    transcript = "\n".join(
+        f"User: {clip(message, FOLD_TURN_CHARS // CHARS_PER_TOKEN)}\n"
+        f"CareerCompass AI: {clip(response, FOLD_TURN_CHARS // CHARS_PER_TOKEN)}"
+        for message, response in turns
+    )
+    return prompts.CONVERSATION_SUMMARY.render(
+        words=config('SUMMARY_TOKENS') * 3 // 4, summary=summary or '(none yet)', transcript=transcript,
+    )
+
+
+def extractive_summary(summary, turns):
+    """
+    Rule-based fallback: the previous summary plus the first sentence of each question.
+    """
+    asked = "; ".join(message.strip().split('\n')[0].split('. ')[0] for message, _ in turns)
+    return f"{summary} The user also asked: {asked}.".strip()
+
+
+def summarize(summary, turns):
+    from .views import GEMINI_MODEL_NAME, extract_response_text, upstream_failure_reason
+
+    if settings.GEMINI_API_KEY:
+        try:
+            response = upstream.generate_content(GEMINI_MODEL_NAME, build_summary_prompt(summary, turns))
+            text = extract_response_text(response)
+            if text:
+                SUMMARIES.inc(method='gemini')
+                return text
+            tracing.fallback('summary', 'empty_response')
+        except Exception as e:
+            logger.warning("Conversation summary failed: %s", e)
+            tracing.fallback('summary', upstream_failure_reason(e))
+    else:
+        tracing.fallback('summary', 'no_api_key')
+    SUMMARIES.inc(method='extractive')
+    return extractive_summary(summary, turns)
+
+
+def fold(conversation_id):
+    """
+    Fold unsummarized turns outside the recent window into the summary. The
+    update only lands if no other fold moved the summary meanwhile.
+    """
+    conversation = Conversation.objects.filter(pk=conversation_id).first()
+    if conversation is None:
+        return False
+
+    rows = recent_turns(conversation, None)
+    kept, _ = fit(rows, config('HISTORY_TOKENS') // 2)
+    folded = rows[len(kept):]
+    if not folded:
+        return False
+
+    summary = summarize(conversation.summary, [(message, response) for _, message, response in reversed(folded)])
+    return bool(Conversation.objects.filter(
+        pk=conversation.pk, summarized_through=conversation.summarized_through,
+    ).update(
+        summary=clip(summary, config('SUMMARY_TOKENS'), keep='tail'),
+        summarized_through=max(chat_id for chat_id, _, _ in folded),
+    ))
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config('WORKERS'), thread_name_prefix='conversation-summary')
+    return _executor
+
+
+def schedule_fold(conversation_id):
+    """
+    Fold in the background; a conversation already being folded is skipped.
+    """
+    with _executor_lock:
+        if conversation_id in _pending:
+            return None
+        _pending.add(conversation_id)
+
+    def run():
+        try:
+            return fold(conversation_id)
+        except Exception:
+            logger.exception("Conversation summary fold failed")
+        finally:
+            with _executor_lock:
+                _pending.discard(conversation_id)
+            close_old_connections()
+
+    return get_executor().submit(run)
+
+
+def after_turn(conversation, context, message):
+    """
+    Bookkeeping once a turn has been stored.
+    """
+    if conversation is None:
+        return
+    record_turn(conversation, message)
+    if context.overflow:
+        schedule_fold(conversation.pk)
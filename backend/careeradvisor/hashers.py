@@ -0,0 +1,129 @@
+"""
+Password hashing policy for login and registration.
+
+settings.PASSWORD_HASHERS puts the hasher chosen by PASSWORD_HASHING_ALGORITHM
+first and keeps the others, so every stored hash still verifies. The hashers
+below are Django's with their cost read from settings.PASSWORD_HASHING.
+Django re-hashes a password whenever it verifies one stored with another
+algorithm or another cost, so switching the algorithm or tuning the cost
+upgrades each user on their next login. argon2 and bcrypt need the
+``argon2-cffi`` and ``bcrypt`` packages; scrypt and PBKDF2 only need the
+standard library.
+
+Hashing is the most CPU-hungry thing a request can do, so it runs under
+hashing_slot(): at most CONCURRENCY hashes per process (default: one per
+core) and callers wait up to QUEUE_TIMEOUT seconds for a slot before
+getting a 503. Brute-force traffic is also stopped earlier, per client IP,
+by the ``login`` rate-limit scope (see LoginRateThrottle).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from . import metrics
+
+DEFAULTS = {
+    'PBKDF2_ITERATIONS': None,
+    'ARGON2_TIME_COST': None,
+    'ARGON2_MEMORY_COST': None,
+    'ARGON2_PARALLELISM': None,
+    'BCRYPT_ROUNDS': None,
+    'SCRYPT_WORK_FACTOR': None,
+    'CONCURRENCY': None,
+    'QUEUE_TIMEOUT': 5,
+}
+
+HASHING_SECONDS = metrics.histogram('password_hashing_seconds', 'Time spent hashing or verifying passwords')
+HASHING_WAIT = metrics.histogram('password_hashing_wait_seconds', 'Time spent waiting for a hashing slot')
+HASHING_BUSY = metrics.counter('password_hashing_busy_total', 'Requests turned away for lack of a hashing slot')
+
+
+def config(name):
+    value = getattr(settings, 'PASSWORD_HASHING', {}).get(name)
+    return DEFAULTS[name] if value is None else value
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# ================= Hashers =================
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return config('PBKDF2_ITERATIONS') or super().iterations
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+
+    @property
+    def time_cost(self):
+        return config('ARGON2_TIME_COST') or super().time_cost
+
+    @property
+    def memory_cost(self):
+        return config('ARGON2_MEMORY_COST') or super().memory_cost
+
+    @property
+    def parallelism(self):
+        return config('ARGON2_PARALLELISM') or super().parallelism
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+
+    @property
+    def rounds(self):
+        return config('BCRYPT_ROUNDS') or super().rounds
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+
+    @property
+    def work_factor(self):
+        return config('SCRYPT_WORK_FACTOR') or super().work_factor
+
+
+# ================= Concurrency =================
+class HashingBusy(Exception):
+    pass
+
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def get_slots():
+    global _slots
+    if _slots is None:
+        with _slots_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(config('CONCURRENCY') or cpu_count())
+    return _slots
+
+
+@contextmanager
+def hashing_slot():
+    """
+    Hold one of the process's hashing slots. Raises HashingBusy after QUEUE_TIMEOUT seconds.
+    """
+    slots = get_slots()
+    start = time.perf_counter()
+    acquired = slots.acquire(timeout=config('QUEUE_TIMEOUT'))
+    hashed = time.perf_counter()
+    HASHING_WAIT.observe(hashed - start)
+    if not acquired:
+        HASHING_BUSY.inc()
+        raise HashingBusy()
+    try:
+        yield
+    finally:
+        slots.release()
+        HASHING_SECONDS.observe(time.perf_counter() - hashed)
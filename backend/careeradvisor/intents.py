@@ -0,0 +1,123 @@
+"""
+Keyword intent matcher behind the rule-based chatbot fallback.
+
+Intents live in a JSON file (settings.CHATBOT_INTENTS_FILE, by default
+intents.json next to this module):
+
+    {
+      "default": "<answer when nothing matches>",
+      "intents": [
+        {"name": "resume", "keywords": {"resume": 1.5, "curriculum vitae": 1.5}, "response": "..."}
+      ]
+    }
+
+All keywords of all intents are compiled once into a single regex shaped like
+a trie (shared prefixes are factored out), anchored on word boundaries, so a
+message is scanned in one pass however many intents there are and "hi" no
+longer matches inside "this". Every distinct keyword found adds its weight to
+its intents; the highest score wins and ties go to the intent listed first.
+"""
+import json
+import re
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULT_INTENTS_FILE = Path(__file__).resolve().parent / 'intents.json'
+
+
+def normalize_keyword(text):
+    return ' '.join(text.lower().split())
+
+
+def trie_pattern(keywords):
+    """
+    Regex alternation for ``keywords`` with common prefixes merged, so the
+    engine follows one branch per character instead of trying every keyword.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        terminal = '' in node
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if terminal else '')
+
+    return build(trie)
+
+
+class IntentMatcher:
+
+    def __init__(self, intents, default):
+        self.names = []
+        self.responses = []
+        self.default = default
+        # keyword -> [(intent index, weight), ...]
+        self.keywords = {}
+        for position, intent in enumerate(intents):
+            self.names.append(intent['name'])
+            self.responses.append(intent['response'])
+            for keyword, weight in intent['keywords'].items():
+                self.keywords.setdefault(normalize_keyword(keyword), []).append((position, float(weight)))
+
+        self.pattern = None
+        if self.keywords:
+            self.pattern = re.compile(r'\b' + trie_pattern(self.keywords) + r'\b', re.IGNORECASE)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['intents'], data['default'])
+
+    def scores(self, message):
+        scores = {}
+        if self.pattern is None:
+            return scores
+        found = {normalize_keyword(match) for match in self.pattern.findall(message)}
+        for keyword in found:
+            for position, weight in self.keywords[keyword]:
+                scores[position] = scores.get(position, 0.0) + weight
+        return scores
+
+    def best(self, message):
+        """
+        Index of the best matching intent, or None.
+        """
+        scores = self.scores(message)
+        if not scores:
+            return None
+        return min(scores, key=lambda position: (-scores[position], position))
+
+    def match(self, message):
+        position = self.best(message)
+        return None if position is None else self.names[position]
+
+    def respond(self, message):
+        position = self.best(message)
+        return self.default if position is None else self.responses[position]
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = IntentMatcher.from_file(getattr(settings, 'CHATBOT_INTENTS_FILE', DEFAULT_INTENTS_FILE))
+    return _matcher
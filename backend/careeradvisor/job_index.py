@@ -0,0 +1,275 @@
+"""
+Local job index in front of JSearch.
+
+Every live search is upserted into Job and recorded as a JobQuery, so
+``search()`` can answer from the database:
+
+1. The same (title, location) was fetched within FRESHNESS seconds: return
+   the postings it returned, in upstream order.
+2. Otherwise full-text search fresh postings (SQLite FTS5 or a Postgres
+   tsvector index, created in migration 0004); use the hits if there are at
+   least MIN_RESULTS of them.
+3. Otherwise fetch live and ingest. If the live fetch fails, stale local
+   results are served when there are any.
+
+``manage.py ingest_jobs`` pre-loads queries and refreshes stale ones in bulk.
+"""
+import hashlib
+import re
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import metrics, tracing
+from .cache import make_key, normalize_text
+from .models import Job, JobQuery
+from .renderers import RawJSON
+
+DEFAULTS = {
+    'ENABLED': True,
+    'FRESHNESS': 6 * 60 * 60,
+    'MIN_RESULTS': 5,
+    'MAX_RESULTS': 10,
+}
+
+SOURCES = metrics.counter('job_search_source_total', 'Where job search results were served from', ['source'])
+
+# Must match the GIN index expression in migration 0004
+POSTGRES_VECTOR = (
+    "to_tsvector('english', title || ' ' || employer_name || ' ' || description || ' ' || city || ' ' || locations)"
+)
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def config(name):
+    return getattr(settings, 'JOB_INDEX', {}).get(name, DEFAULTS[name])
+
+
+def query_key(job_title, location):
+    return hashlib.sha1(make_key('jobs', job_title, location).encode()).hexdigest()
+
+
+def fresh_cutoff():
+    return timezone.now() - timedelta(seconds=config('FRESHNESS'))
+
+
+# ================= Full-text search =================
+def fts5_query(job_title, location):
+    """
+    FTS5 MATCH expression: every title term in the posting text and every
+    location term in its city or search locations. Terms are quoted so user
+    input cannot inject FTS syntax.
+    """
+    def terms(text):
+        return ' AND '.join(f'"{term}"' for term in _TERM_RE.findall(text.lower()))
+
+    title_terms, location_terms = terms(job_title), terms(location)
+    if not title_terms:
+        return None
+    expression = f'{{title employer_name description}} : ({title_terms})'
+    if location_terms:
+        expression += f' AND {{city locations}} : ({location_terms})'
+    return expression
+
+
+def full_text_ids(job_title, location, since, limit):
+    """
+    Ids of matching postings fetched after ``since`` (any age if None), best first.
+    """
+    since_sql = '' if since is None else 'AND j.fetched_at >= %s'
+    params = [] if since is None else [since]
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            expression = fts5_query(job_title, location)
+            if expression is None:
+                return []
+            # bm25 weights: title matches count most, location columns not at all
+            cursor.execute(f"""
+                SELECT j.id FROM careeradvisor_job_fts f
+                JOIN careeradvisor_job j ON j.id = f.rowid
+                WHERE careeradvisor_job_fts MATCH %s {since_sql}
+                ORDER BY bm25(careeradvisor_job_fts, 10.0, 2.0, 1.0, 0.0, 0.0)
+                LIMIT %s
+            """, [expression, *params, limit])
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"""
+                SELECT j.id FROM careeradvisor_job j
+                WHERE {POSTGRES_VECTOR} @@ plainto_tsquery('english', %s) {since_sql}
+                ORDER BY ts_rank({POSTGRES_VECTOR}, plainto_tsquery('english', %s)) DESC
+                LIMIT %s
+            """, [f'{job_title} {location}', *params, f'{job_title} {location}', limit])
+        else:
+            jobs = Job.objects.filter(title__icontains=job_title, locations__icontains=normalize_text(location))
+            if since is not None:
+                jobs = jobs.filter(fetched_at__gte=since)
+            return list(jobs.order_by('-fetched_at').values_list('id', flat=True)[:limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+# ================= Lookup =================
+def jobs_by_id(ids, field='pk', raw=False):
+    """
+    Postings in ``ids`` order; with ``raw`` as RawJSON of the stored payload,
+    which is never decoded.
+    """
+    if raw:
+        rows = Job.objects.filter(**{f'{field}__in': ids}).values_list(field, Cast('data', TextField()))
+        by_id = {key: RawJSON(data) for key, data in rows}
+        return [by_id[i] for i in ids if i in by_id]
+    by_id = Job.objects.in_bulk(ids, field_name=field)
+    return [by_id[i].data for i in ids if i in by_id]
+
+
+def lookup(job_title, location, fresh=True, raw=False):
+    """
+    Local results for a search, or None on a miss. With ``fresh=False`` any
+    previously ingested data counts (used when upstream is down).
+    """
+    since = fresh_cutoff() if fresh else None
+    with tracing.stage('db'):
+        query = JobQuery.objects.filter(key=query_key(job_title, location)).first()
+        if query is not None and (since is None or query.fetched_at >= since):
+            return jobs_by_id(query.job_ids, field='job_id', raw=raw)
+
+        ids = full_text_ids(job_title, location, since, config('MAX_RESULTS'))
+        if len(ids) >= (1 if since is None else config('MIN_RESULTS')):
+            return jobs_by_id(ids, raw=raw)
+    return None
+
+
+# ================= Ingestion =================
+def job_fields(job):
+    return {
+        'title': str(job.get('job_title') or '')[:500],
+        'employer_name': str(job.get('employer_name') or '')[:255],
+        'city': str(job.get('job_city') or '')[:255],
+        'country': str(job.get('job_country') or '')[:64],
+        'description': str(job.get('job_description') or ''),
+        'posted_at': parse_datetime(job.get('job_posted_at_datetime_utc') or ''),
+        'data': job,
+    }
+
+
+def store(location, jobs, now):
+    """
+    Upsert postings in bulk; returns the number stored.
+    """
+    jobs = [job for job in jobs if job.get('job_id')]
+    search_location = normalize_text(location)
+    known = dict(
+        Job.objects.filter(job_id__in=[job['job_id'] for job in jobs]).values_list('job_id', 'locations')
+    )
+    rows = {}
+    for job in jobs:
+        locations = [loc for loc in known.get(job['job_id'], '').split('\n') if loc]
+        if search_location and search_location not in locations:
+            locations.append(search_location)
+        rows[job['job_id']] = Job(
+            job_id=job['job_id'], locations='\n'.join(locations), fetched_at=now, **job_fields(job),
+        )
+    Job.objects.bulk_create(
+        rows.values(),
+        update_conflicts=True,
+        unique_fields=['job_id'],
+        update_fields=['title', 'employer_name', 'city', 'country', 'description', 'locations',
+                       'posted_at', 'data', 'fetched_at'],
+    )
+    return len(rows)
+
+
+def record_query(job_title, location, jobs, now):
+    JobQuery.objects.update_or_create(
+        key=query_key(job_title, location),
+        defaults={
+            'job_title': job_title[:255],
+            'location': location[:255],
+            'job_ids': list(dict.fromkeys(job['job_id'] for job in jobs if job.get('job_id'))),
+            'fetched_at': now,
+        },
+    )
+
+
+def ingest(job_title, location, jobs):
+    """
+    Upsert postings in bulk and record the query. Returns the number of postings stored.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        stored = store(location, jobs, now)
+        record_query(job_title, location, jobs, now)
+    return stored
+
+
+def ingest_pages(job_title, location, pages):
+    """
+    ingest() for several pages of one search, ``{page: postings}``. All
+    postings are stored, but only page 1 is recorded as the query's answer:
+    that is what a single-page search would have returned.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        stored = store(location, [job for page in sorted(pages) for job in pages[page]], now)
+        if 1 in pages:
+            record_query(job_title, location, pages[1], now)
+    return stored
+
+
+# ================= Search =================
+def search(job_title, location, fetch, raw=False):
+    """
+    Postings for a search and where they came from ('index', 'live' or
+    'stale'). ``fetch(job_title, location)`` performs the live request.
+    With ``raw``, postings from the index are RawJSON (see jobs_by_id).
+    """
+    if not config('ENABLED'):
+        return fetch(job_title, location), 'live'
+
+    jobs = lookup(job_title, location, raw=raw)
+    if jobs is not None:
+        source = 'index'
+    else:
+        try:
+            jobs = fetch(job_title, location)
+        except Exception:
+            jobs = lookup(job_title, location, fresh=False, raw=raw)
+            if not jobs:
+                raise
+            source = 'stale'
+        else:
+            ingest(job_title, location, jobs)
+            source = 'live'
+    SOURCES.inc(source=source)
+    return jobs, source
+
+
+async def asearch(job_title, location, afetch):
+    """
+    Async counterpart of search(); ``afetch`` is a coroutine function.
+    """
+    if not config('ENABLED'):
+        return await afetch(job_title, location), 'live'
+
+    jobs = await sync_to_async(lookup)(job_title, location)
+    if jobs is not None:
+        source = 'index'
+    else:
+        try:
+            jobs = await afetch(job_title, location)
+        except Exception:
+            jobs = await sync_to_async(lookup)(job_title, location, fresh=False)
+            if not jobs:
+                raise
+            source = 'stale'
+        else:
+            await sync_to_async(ingest)(job_title, location, jobs)
+            source = 'live'
+    SOURCES.inc(source=source)
+    return jobs, source
@@ -0,0 +1,240 @@
+"""
+Concurrent multi-page job search.
+
+``{"pages": N}`` on the job search endpoints fetches pages 1..N at once:
+through a shared, bounded thread pool on WSGI, or asyncio tasks capped by a
+semaphore on ASGI. Postings are normalized and deduplicated by job id
+across pages. With ``?stream=1`` (or ``Accept: application/x-ndjson``) each
+page's new postings are written as soon as that page lands, in completion
+order, so slow pages never hold back fast ones:
+
+    {"type": "job", "page": 2, "data": {...}}
+    {"type": "error", "page": 3, "message": "..."}
+    {"type": "done", "count": 27, "pages": 3, "failed_pages": [3]}
+
+Once all pages are in, the postings are ingested into the local job index,
+with page 1 recorded as the search's answer (see job_index.ingest_pages).
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from . import job_index, metrics
+from .renderers import ndjson_line
+
+DEFAULTS = {
+    'MAX_PAGES': 5,
+    'WORKERS': 8,
+}
+
+PAGES_FETCHED = metrics.counter('job_pages_fetched_total', 'Job search pages fetched concurrently', ['outcome'])
+DUPLICATES = metrics.counter('job_duplicates_dropped_total', 'Postings dropped as duplicates across pages')
+
+
+class InvalidPages(ValueError):
+    pass
+
+
+def config(name):
+    return getattr(settings, 'JOB_PAGES', {}).get(name, DEFAULTS[name])
+
+
+def parse_pages(value):
+    """
+    Validated page count from request data (default 1).
+    """
+    if value in (None, ''):
+        return 1
+    try:
+        pages = int(value)
+    except (TypeError, ValueError):
+        raise InvalidPages("pages must be an integer")
+    if not 1 <= pages <= config('MAX_PAGES'):
+        raise InvalidPages(f"pages must be between 1 and {config('MAX_PAGES')}")
+    return pages
+
+
+def wants_ndjson(request):
+    if request.GET.get('stream') in ('1', 'true'):
+        return True
+    return 'application/x-ndjson' in request.headers.get('Accept', '')
+
+
+def normalize_job(job):
+    """
+    Stripped string values and a string job id, so ids from different pages compare equal.
+    """
+    job = {key: value.strip() if isinstance(value, str) else value for key, value in job.items()}
+    if job.get('job_id') is not None:
+        job['job_id'] = str(job['job_id'])
+    return job
+
+
+class Deduper:
+
+    def __init__(self):
+        self.seen = set()
+        self.jobs = []
+
+    def add(self, jobs):
+        """
+        Normalize a page of postings and return the ones not seen before.
+        """
+        fresh = []
+        for job in jobs:
+            job = normalize_job(job)
+            job_id = job.get('job_id')
+            if job_id is not None:
+                if job_id in self.seen:
+                    DUPLICATES.inc()
+                    continue
+                self.seen.add(job_id)
+            fresh.append(job)
+        self.jobs.extend(fresh)
+        return fresh
+
+
+# ================= Sync (thread pool) =================
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config('WORKERS'), thread_name_prefix='job-pages')
+    return _executor
+
+
+def fetch_pages(job_title, location, pages, fetch):
+    """
+    Yield (page, postings, error) as each page completes.
+    ``fetch(job_title, location, page=n)`` performs one upstream request.
+    """
+    futures = {
+        get_executor().submit(fetch, job_title, location, page=page): page
+        for page in range(1, pages + 1)
+    }
+    try:
+        for future in as_completed(futures):
+            try:
+                jobs, error = future.result(), None
+            except Exception as e:
+                jobs, error = [], e
+            PAGES_FETCHED.inc(outcome='ok' if error is None else 'error')
+            yield futures[future], jobs, error
+    finally:
+        # The client went away: drop pages that have not started yet
+        for future in futures:
+            future.cancel()
+
+
+def stream_job_pages(job_title, location, pages, fetch):
+    deduper = Deduper()
+    fetched = {}
+    failed = []
+    for page, jobs, error in fetch_pages(job_title, location, pages, fetch):
+        if error is not None:
+            failed.append(page)
+            yield ndjson_line({'type': 'error', 'page': page, 'message': str(error)})
+            continue
+        fetched[page] = jobs
+        for job in deduper.add(jobs):
+            yield ndjson_line({'type': 'job', 'page': page, 'data': job})
+
+    if fetched:
+        job_index.ingest_pages(job_title, location, fetched)
+    yield ndjson_line({'type': 'done', 'count': len(deduper.jobs), 'pages': pages, 'failed_pages': sorted(failed)})
+
+
+def collect_job_pages(job_title, location, pages, fetch):
+    """
+    Merged postings of all pages in page order. Raises the first error if every page failed.
+    """
+    deduper = Deduper()
+    results = {}
+    errors = []
+    for page, jobs, error in fetch_pages(job_title, location, pages, fetch):
+        if error is not None:
+            errors.append(error)
+        else:
+            results[page] = jobs
+    if not results:
+        raise errors[0]
+    for page in sorted(results):
+        deduper.add(results[page])
+    job_index.ingest_pages(job_title, location, results)
+    return deduper.jobs
+
+
+# ================= Async (asyncio) =================
+async def afetch_pages(job_title, location, pages, afetch):
+    """
+    Async counterpart of fetch_pages; yields (page, postings, error).
+    """
+    semaphore = asyncio.Semaphore(config('WORKERS'))
+
+    async def one(page):
+        async with semaphore:
+            try:
+                return page, await afetch(job_title, location, page=page), None
+            except Exception as e:
+                return page, [], e
+
+    tasks = [asyncio.ensure_future(one(page)) for page in range(1, pages + 1)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            page, jobs, error = await next_done
+            PAGES_FETCHED.inc(outcome='ok' if error is None else 'error')
+            yield page, jobs, error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def astream_job_pages(job_title, location, pages, afetch):
+    deduper = Deduper()
+    fetched = {}
+    failed = []
+    async for page, jobs, error in afetch_pages(job_title, location, pages, afetch):
+        if error is not None:
+            failed.append(page)
+            yield ndjson_line({'type': 'error', 'page': page, 'message': str(error)})
+            continue
+        fetched[page] = jobs
+        for job in deduper.add(jobs):
+            yield ndjson_line({'type': 'job', 'page': page, 'data': job})
+
+    if fetched:
+        await sync_to_async(job_index.ingest_pages)(job_title, location, fetched)
+    yield ndjson_line({'type': 'done', 'count': len(deduper.jobs), 'pages': pages, 'failed_pages': sorted(failed)})
+
+
+async def acollect_job_pages(job_title, location, pages, afetch):
+    deduper = Deduper()
+    results = {}
+    errors = []
+    async for page, jobs, error in afetch_pages(job_title, location, pages, afetch):
+        if error is not None:
+            errors.append(error)
+        else:
+            results[page] = jobs
+    if not results:
+        raise errors[0]
+    for page in sorted(results):
+        deduper.add(results[page])
+    await sync_to_async(job_index.ingest_pages)(job_title, location, results)
+    return deduper.jobs
+
+
+def ndjson_response(lines):
+    response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from careeradvisor import chat_archive
+
+
+class Command(BaseCommand):
+    help = "Move chats older than CHAT_ARCHIVE['AFTER_DAYS'] into compressed archive segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=chat_archive.config('AFTER_DAYS'),
+                            help='archive chats older than this many days')
+        parser.add_argument('--user', type=int, action='append', default=[], help='only this user id (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='only count what would be archived')
+        parser.add_argument('--every', type=float, default=0, help='keep running, archiving every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            users, chats = chat_archive.archive(options['days'], options['user'] or None, options['dry_run'])
+            verb = "Would archive" if options['dry_run'] else "Archived"
+            self.stdout.write(f"{verb} {chats} chats of {users} users older than {options['days']} days")
+            if not options['every']:
+                return
+            try:
+                time.sleep(options['every'])
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping chat archiving")
+                return
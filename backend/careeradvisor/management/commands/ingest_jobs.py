@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from careeradvisor import job_index
+from careeradvisor.models import JobQuery
+from careeradvisor.views import fetch_jobs
+
+
+class Command(BaseCommand):
+    help = "Fetch job searches from JSearch and upsert them into the local job index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', action='append', default=[], help='job title to ingest (repeatable)')
+        parser.add_argument('--location', default='India')
+        parser.add_argument('--file', help="file with one 'job title|location' per line")
+        parser.add_argument('--pages', type=int, default=1, help='result pages to fetch per query')
+        parser.add_argument('--refresh-stale', action='store_true',
+                            help="re-fetch recorded searches older than JOB_INDEX['FRESHNESS']")
+
+    def handle(self, *args, **options):
+        searches = [(title, options['location']) for title in options['query']]
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as f:
+                for line in f:
+                    title, _, location = line.strip().partition('|')
+                    if title:
+                        searches.append((title.strip(), location.strip() or options['location']))
+        if options['refresh_stale']:
+            stale = JobQuery.objects.filter(fetched_at__lt=job_index.fresh_cutoff())
+            searches.extend(stale.values_list('job_title', 'location'))
+        if not searches:
+            raise CommandError("Nothing to ingest: pass --query, --file or --refresh-stale")
+
+        total = 0
+        for title, location in searches:
+            pages = {}
+            try:
+                for page in range(1, options['pages'] + 1):
+                    pages[page] = fetch_jobs(title, location, page=page)
+                    if not pages[page]:
+                        break
+            except Exception as e:
+                self.stderr.write(f"Failed to fetch '{title}' in {location}: {e}")
+                continue
+            stored = job_index.ingest_pages(title, location, pages)
+            total += stored
+            self.stdout.write(f"Ingested {stored} postings for '{title}' in {location}")
+        self.stdout.write(f"Ingested {total} postings for {len(searches)} searches")
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from careeradvisor import college_catalog
+from careeradvisor.models import CollegeQuery
+from careeradvisor.views import FALLBACK_COLLEGES, generate_colleges, normalize_text
+
+
+class Command(BaseCommand):
+    help = "Load colleges into the local college catalog from a file, the fallback list or Gemini."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='JSON list of colleges, or of {"field", "location", "colleges"} objects')
+        parser.add_argument('--fallback', action='store_true', help='load the built-in fallback colleges')
+        parser.add_argument('--query', action='append', default=[], help='field of study to ask Gemini for (repeatable)')
+        parser.add_argument('--location', default='India')
+        parser.add_argument('--refresh-stale', action='store_true',
+                            help="re-ask Gemini for recorded searches older than COLLEGE_CATALOG['FRESHNESS']")
+
+    def handle(self, *args, **options):
+        batches = []
+        if options['fallback']:
+            batches.append(('', '', FALLBACK_COLLEGES))
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, list):
+                raise CommandError("--file must hold a JSON list")
+            if data and all(isinstance(item, dict) and 'colleges' in item for item in data):
+                batches.extend((item.get('field', ''), item.get('location', ''), item['colleges']) for item in data)
+            else:
+                batches.append(('', '', data))
+
+        searches = [(field, options['location']) for field in options['query']]
+        if options['refresh_stale']:
+            stale = CollegeQuery.objects.filter(fetched_at__lt=college_catalog.fresh_cutoff())
+            searches.extend(stale.values_list('field', 'location'))
+        if not batches and not searches:
+            raise CommandError("Nothing to load: pass --file, --fallback, --query or --refresh-stale")
+
+        for field, location in searches:
+            colleges = generate_colleges(normalize_text(field), normalize_text(location))
+            if not colleges:
+                self.stderr.write(f"No usable Gemini answer for '{field}' in {location}")
+                continue
+            batches.append((field, location, colleges))
+
+        total = 0
+        for field, location, colleges in batches:
+            stored = college_catalog.ingest(field, location, colleges)
+            total += stored
+            label = f"'{field}' in {location}" if field else 'catalog'
+            self.stdout.write(f"Loaded {stored} colleges for {label}")
+        self.stdout.write(f"Loaded {total} colleges in {len(batches)} batches")
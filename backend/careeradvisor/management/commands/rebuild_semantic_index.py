@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from careeradvisor import semantic_cache
+
+
+class Command(BaseCommand):
+    help = "Rebuild the chatbot semantic cache index from the Chat table and save it to disk."
+
+    def handle(self, *args, **options):
+        path = semantic_cache.config('PATH')
+        if not path:
+            raise CommandError("SEMANTIC_CACHE['PATH'] is not set")
+
+        index = semantic_cache.SemanticIndex(semantic_cache.config('DIMENSIONS'), semantic_cache.config('MAX_ENTRIES'))
+        semantic_cache.catch_up(index)
+        index.save(path)
+        self.stdout.write(f"Indexed {len(index)} answers up to chat {index.last_chat_id} into {path}")
@@ -0,0 +1,48 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from careeradvisor import tasks
+
+
+class Command(BaseCommand):
+    help = "Run LLM queue workers for LLM_QUEUE['BROKER'] = 'db'."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=tasks.config('WORKERS'))
+        parser.add_argument('--poll-interval', type=float, default=tasks.config('POLL_INTERVAL'))
+
+    def handle(self, *args, **options):
+        workers = [
+            threading.Thread(target=self.work, args=(options['poll_interval'],), daemon=True)
+            for _ in range(options['workers'])
+        ]
+        # Tasks whose worker died are re-queued once their lease expires
+        workers.append(threading.Thread(target=self.reap, args=(tasks.config('LEASE_SECONDS') / 2,), daemon=True))
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {options['workers']} LLM workers")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping LLM workers")
+
+    def work(self, poll_interval):
+        while True:
+            task_id = tasks.next_queued_id()
+            if task_id is None or tasks.run_task(task_id) is None:
+                # Idle, or another worker claimed the task first
+                time.sleep(poll_interval)
+
+    def reap(self, interval):
+        while True:
+            try:
+                tasks.reap_expired()
+            except Exception as e:
+                self.stderr.write(f"Reaping expired LLM tasks failed: {e}")
+            finally:
+                close_old_connections()
+            time.sleep(interval)
@@ -0,0 +1,161 @@
+"""
+Minimal in-process metrics (counters, gauges and histograms) rendered in the
+Prometheus text exposition format.
+
+Metrics are registered once at import time of the module that owns them:
+
+    UPSTREAM_LATENCY = metrics.histogram('upstream_request_seconds', 'Upstream call latency', ['upstream'])
+    UPSTREAM_LATENCY.observe(0.42, upstream='gemini')
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {value}'
+
+
+class Gauge:
+    """
+    Point-in-time value computed at scrape time by ``collect()``, which
+    returns a mapping of label tuples (in labelnames order) to values.
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def samples(self):
+        for key, value in (self.collect() if self.collect else {}).items():
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {value}'
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(self.labelnames, labels))
+        return series['count'] if series else 0
+
+    def mean(self, **labels):
+        series = self._series.get(_label_key(self.labelnames, labels))
+        return series['sum'] / series['count'] if series and series['count'] else 0.0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, dict(series, buckets=list(series['buckets']))) for key, series in self._series.items()]
+        for key, series in items:
+            for bound, count in zip(self.buckets, series['buckets']):
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", bound)])} {count}'
+            yield f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", "+Inf")])} {series["count"]}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, key)} {series["sum"]}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, key)} {series["count"]}'
+
+
+def _register(cls, name, *args, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name, documentation, labelnames=()):
+    return _register(Counter, name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=(), collect=None):
+    return _register(Gauge, name, documentation, labelnames, collect)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, documentation, labelnames, buckets)
+
+
+def render():
+    """
+    All registered metrics in Prometheus text format.
+    """
+    lines = []
+    for metric in list(_registry.values()):
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        try:
+            lines.extend(metric.samples())
+        except Exception as e:
+            # A failing gauge callback must not take the whole scrape down
+            lines.append(f'# {metric.name} unavailable: {e}')
+    return '\n'.join(lines) + '\n'
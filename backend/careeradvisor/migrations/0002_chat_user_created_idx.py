@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careeradvisor', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='chat_user_created_idx'),
+        ),
+    ]
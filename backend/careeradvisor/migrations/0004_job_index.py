@@ -0,0 +1,103 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+FTS_COLUMNS = ['title', 'employer_name', 'description', 'city', 'locations']
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE careeradvisor_job_fts USING fts5(
+        {', '.join(FTS_COLUMNS)},
+        content='careeradvisor_job', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER careeradvisor_job_fts_ai AFTER INSERT ON careeradvisor_job BEGIN
+        INSERT INTO careeradvisor_job_fts(rowid, {', '.join(FTS_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in FTS_COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER careeradvisor_job_fts_ad AFTER DELETE ON careeradvisor_job BEGIN
+        INSERT INTO careeradvisor_job_fts(careeradvisor_job_fts, rowid, {', '.join(FTS_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in FTS_COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER careeradvisor_job_fts_au AFTER UPDATE ON careeradvisor_job BEGIN
+        INSERT INTO careeradvisor_job_fts(careeradvisor_job_fts, rowid, {', '.join(FTS_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in FTS_COLUMNS)});
+        INSERT INTO careeradvisor_job_fts(rowid, {', '.join(FTS_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in FTS_COLUMNS)});
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS careeradvisor_job_fts_au",
+    "DROP TRIGGER IF EXISTS careeradvisor_job_fts_ad",
+    "DROP TRIGGER IF EXISTS careeradvisor_job_fts_ai",
+    "DROP TABLE IF EXISTS careeradvisor_job_fts",
+]
+
+# Must match the expression in careeradvisor.job_index.POSTGRES_VECTOR
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX careeradvisor_job_search_idx ON careeradvisor_job USING GIN (
+        to_tsvector('english', title || ' ' || employer_name || ' ' || description || ' ' || city || ' ' || locations)
+    )
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS careeradvisor_job_search_idx",
+]
+
+
+def run_for_vendor(sqlite, postgresql):
+    def run(apps, schema_editor):
+        statements = {'sqlite': sqlite, 'postgresql': postgresql}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careeradvisor', '0003_llmtask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=255, unique=True)),
+                ('title', models.CharField(max_length=500)),
+                ('employer_name', models.CharField(blank=True, max_length=255)),
+                ('city', models.CharField(blank=True, max_length=255)),
+                ('country', models.CharField(blank=True, max_length=64)),
+                ('description', models.TextField(blank=True)),
+                ('locations', models.TextField(blank=True)),
+                ('posted_at', models.DateTimeField(blank=True, null=True)),
+                ('data', models.JSONField(default=dict)),
+                ('fetched_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=40, unique=True)),
+                ('job_title', models.CharField(max_length=255)),
+                ('location', models.CharField(max_length=255)),
+                ('job_ids', models.JSONField(default=list)),
+                ('fetched_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(
+            run_for_vendor(SQLITE_FORWARD, POSTGRES_FORWARD),
+            run_for_vendor(SQLITE_BACKWARD, POSTGRES_BACKWARD),
+        ),
+    ]
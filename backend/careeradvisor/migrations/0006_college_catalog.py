@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careeradvisor', '0005_conversation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollegeQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=40, unique=True)),
+                ('field', models.CharField(max_length=255)),
+                ('location', models.CharField(max_length=255)),
+                ('college_ids', models.JSONField(default=list)),
+                ('fetched_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Program',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('name', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='College',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('city', models.CharField(blank=True, max_length=255)),
+                ('state', models.CharField(blank=True, max_length=255)),
+                ('country', models.CharField(blank=True, max_length=64)),
+                ('type', models.CharField(blank=True, max_length=255)),
+                ('ranking', models.PositiveIntegerField(blank=True, null=True)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('established', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('programs', models.ManyToManyField(related_name='colleges', to='careeradvisor.program')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['city', 'ranking'], name='college_city_rank_idx'), models.Index(fields=['state', 'ranking'], name='college_state_rank_idx'), models.Index(fields=['country', 'ranking'], name='college_country_rank_idx'), models.Index(fields=['ranking'], name='college_rank_idx')],
+            },
+        ),
+    ]
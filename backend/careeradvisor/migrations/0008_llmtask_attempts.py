@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careeradvisor', '0007_chat_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='llmtask',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
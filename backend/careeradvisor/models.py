@@ -1,13 +1,244 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 
 # Create your models here.
 
+class Conversation(models.Model):
+    """
+    A chat session. Turns that no longer fit the prompt's history budget are
+    folded into ``summary`` (see careeradvisor.conversations);
+    ``summarized_through`` is the id of the newest Chat the summary covers.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    title = models.CharField(max_length=255, blank=True)
+    summary = models.TextField(blank=True)
+    summarized_through = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-updated_at'], name='conversation_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username}: {self.title or self.pk}'
+
+
 class Chat(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Indexed by chat_conversation_idx, which also yields turns already in order
+    conversation = models.ForeignKey(Conversation, null=True, blank=True, on_delete=models.CASCADE, db_index=False)
     message = models.TextField()
     response = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves ChatHistoryView's keyset pagination
+            models.Index(fields=['user', '-created_at', '-id'], name='chat_user_created_idx'),
+            # Serves the prompt history query and per-conversation history
+            models.Index(fields=['conversation', '-created_at', '-id'], name='chat_conversation_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username}: {self.message}'
+
+
+class ChatArchive(models.Model):
+    """
+    Per-user summary of the chats moved out of Chat by
+    careeradvisor.chat_archive. History pagination only looks at the archive
+    segments of users that have one.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='chat_archive')
+    chats = models.PositiveIntegerField(default=0)
+    segments = models.PositiveIntegerField(default=0)
+    oldest_at = models.DateTimeField(null=True, blank=True)
+    newest_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.user.username}: {self.chats} archived chats'
+
+
+class ChatArchiveSegment(models.Model):
+    """
+    Up to SEGMENT_SIZE archived chats of one user, oldest first, as
+    compressed JSON lines. ``first_*``/``last_*`` are the (created_at, id)
+    keys of its oldest and newest chat.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    first_at = models.DateTimeField()
+    first_id = models.BigIntegerField()
+    last_at = models.DateTimeField()
+    last_id = models.BigIntegerField()
+    count = models.PositiveIntegerField()
+    codec = models.CharField(max_length=16, default='zlib')
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # History pagination walks a user's segments newest first
+            models.Index(fields=['user', '-last_at', '-last_id'], name='chat_segment_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.count} chats up to {self.last_at:%Y-%m-%d}'
+
+
+class LLMTask(models.Model):
+    """
+    A unit of LLM work queued by the opt-in asynchronous mode of the chat and
+    college search endpoints. Lower ``priority`` values run first.
+    """
+    KIND_CHAT = 'chat'
+    KIND_COLLEGES = 'colleges'
+    KIND_CHOICES = [
+        (KIND_CHAT, 'Chat'),
+        (KIND_COLLEGES, 'College search'),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    PRIORITY_USER = 0
+    PRIORITY_ANONYMOUS = 10
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    priority = models.PositiveSmallIntegerField(default=PRIORITY_USER)
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE)
+    chat = models.ForeignKey(Chat, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Claims so far; a task whose worker died is re-queued until MAX_ATTEMPTS
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Workers pick the next queued task by (priority, created_at)
+            models.Index(fields=['status', 'priority', 'created_at'], name='llmtask_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.id} ({self.status})'
+
+    @property
+    def finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+class Job(models.Model):
+    """
+    A posting ingested from JSearch, keyed by the upstream job id. ``data``
+    keeps the upstream payload as served to clients. ``locations`` collects
+    the normalized search locations the job was returned for, so location
+    filters match "India" even though postings only carry a country code.
+
+    Full-text search runs on an SQLite FTS5 table or a Postgres tsvector
+    index, both created in migration 0004 (see careeradvisor.job_index).
+    """
+    job_id = models.CharField(max_length=255, unique=True)
+    title = models.CharField(max_length=500)
+    employer_name = models.CharField(max_length=255, blank=True)
+    city = models.CharField(max_length=255, blank=True)
+    country = models.CharField(max_length=64, blank=True)
+    description = models.TextField(blank=True)
+    locations = models.TextField(blank=True)
+    posted_at = models.DateTimeField(null=True, blank=True)
+    data = models.JSONField(default=dict)
+    fetched_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'{self.title} ({self.employer_name})'
+
+
+class JobQuery(models.Model):
+    """
+    When a (job title, location) search was last fetched from upstream and
+    which postings it returned, in upstream order.
+    """
+    key = models.CharField(max_length=40, unique=True)
+    job_title = models.CharField(max_length=255)
+    location = models.CharField(max_length=255)
+    job_ids = models.JSONField(default=list)
+    fetched_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'{self.job_title} in {self.location}'
+
+
+class Program(models.Model):
+    """
+    A program or major offered by catalog colleges; ``key`` is its normalized name.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255)
+
+    def __str__(self):
+        return self.name
+
+
+class College(models.Model):
+    """
+    A college in the local catalog, keyed by its normalized name. ``data`` is
+    the validated record served to clients (careeradvisor.college_parser
+    SCHEMA); the other columns are normalized copies for indexed search in
+    careeradvisor.college_catalog.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255)
+    city = models.CharField(max_length=255, blank=True)
+    state = models.CharField(max_length=255, blank=True)
+    country = models.CharField(max_length=64, blank=True)
+    type = models.CharField(max_length=255, blank=True)
+    ranking = models.PositiveIntegerField(null=True, blank=True)
+    rating = models.FloatField(null=True, blank=True)
+    established = models.PositiveSmallIntegerField(null=True, blank=True)
+    programs = models.ManyToManyField(Program, related_name='colleges')
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Location filters return colleges best-ranked first
+            models.Index(fields=['city', 'ranking'], name='college_city_rank_idx'),
+            models.Index(fields=['state', 'ranking'], name='college_state_rank_idx'),
+            models.Index(fields=['country', 'ranking'], name='college_country_rank_idx'),
+            models.Index(fields=['ranking'], name='college_rank_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class CollegeQuery(models.Model):
+    """
+    A (field, location) college search answered by Gemini and the colleges it
+    returned, in order. Pairs recorded here are served from the catalog.
+    """
+    key = models.CharField(max_length=40, unique=True)
+    field = models.CharField(max_length=255)
+    location = models.CharField(max_length=255)
+    college_ids = models.JSONField(default=list)
+    fetched_at = models.DateTimeField(db_index=True)
+
     def __str__(self):
-        return f'{self.user.username}: {self.message}'
\ No newline at end of file
+        return f'{self.field} in {self.location}'
@@ -0,0 +1,91 @@
+"""
+Keyset (cursor) pagination for chat history.
+
+DRF's CursorPagination positions on the first ordering field plus an offset,
+which degrades when many rows share a timestamp. This paginator seeks on the
+full ``(created_at, id)`` pair, so every page is a single range scan over the
+``(user, created_at, id)`` index no matter how deep the client has paged.
+Views with a ``get_archived_chats(before, limit)`` method continue into
+archived history (careeradvisor.chat_archive) past the last hot row.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ChatCursorPagination(BasePagination):
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, chat):
+        raw = f'{chat.created_at.isoformat()}|{chat.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by('-created_at', '-id')
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            created_at, pk = cursor
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        # Fetch one extra row to learn whether another page exists
+        page = list(queryset[:page_size + 1])
+        archived = getattr(view, 'get_archived_chats', None)
+        if len(page) <= page_size and archived is not None:
+            # The hot table ran out: continue from the archive tier
+            before = (page[-1].created_at, page[-1].pk) if page else cursor
+            page += archived(before, page_size + 1 - len(page))
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,230 @@
+"""
+Smaller job, college and chat history payloads on the wire.
+
+* Field projection: ``fields=job_title,employer_name,job_apply_link`` (a
+  query parameter, or a string or list in the JSON body) keeps only those
+  keys of every result in a search response (see project()). Caches and the
+  local indexes keep the full records.
+* ETags: responses of views marked with ``@conditional`` (or an
+  ``etag = True`` class attribute) carry an ETag of the rendered body, and a
+  GET or HEAD whose If-None-Match lists it gets an empty 304 instead, with
+  the response's other headers (CORS included). A POST search is answered
+  with 412 Precondition Failed on a match, as RFC 9110 requires; the
+  searches also take GET with query parameters, which revalidates with 304.
+* Compression: responses of at least COMPRESS_MIN_SIZE bytes are compressed
+  with brotli (needs the ``brotli`` package) or gzip, whichever the client's
+  Accept-Encoding prefers. A compressed response's ETag gets a ``-br`` or
+  ``-gzip`` suffix, so every encoding has its own validator. The gzip one is
+  weak: its random header padding makes every compressed body different.
+  Streamed (NDJSON, SSE) responses are left alone so each line still goes
+  out as soon as it is written.
+
+Both run in PayloadMiddleware.
+"""
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils.text import compress_string
+
+from . import metrics, tracing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULTS = {
+    'COMPRESS_MIN_SIZE': 1024,
+    'BROTLI_QUALITY': 4,
+    # Random gzip header padding against BREACH, as in Django's GZipMiddleware
+    'GZIP_RANDOM_BYTES': 100,
+}
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/plain')
+ENCODINGS = ('br', 'gzip')
+# Describe the body, so they are left off a bodiless 304 or 412
+CONTENT_HEADERS = ('Content-Type', 'Content-Length', 'Content-Encoding', 'Content-Language', 'Content-Disposition')
+
+NOT_MODIFIED = metrics.counter('responses_not_modified_total', 'Requests answered with 304 Not Modified', ['view'])
+COMPRESSED = metrics.counter('responses_compressed_total', 'Responses compressed', ['encoding'])
+BYTES_SAVED = metrics.counter('response_compression_saved_bytes_total', 'Bytes saved by response compression')
+
+
+def config(name):
+    return getattr(settings, 'PAYLOADS', {}).get(name, DEFAULTS[name])
+
+
+# ================= Field projection =================
+def requested_fields(request, data=None):
+    """
+    Field names from ``?fields=`` or the body's "fields", or None for all fields.
+    """
+    value = request.GET.get('fields') or (data or {}).get('fields')
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        return None
+    fields = [name.strip() for name in value if isinstance(name, str) and name.strip()]
+    return fields or None
+
+
+def project(data, fields):
+    """
+    ``data`` with every result in data['data'] cut down to ``fields``.
+    """
+    if fields is None or not isinstance(data.get('data'), list):
+        return data
+    return {
+        **data,
+        'data': [
+            {name: item[name] for name in fields if name in item} if isinstance(item, dict) else item
+            for item in data['data']
+        ],
+    }
+
+
+# ================= ETags =================
+def conditional(view):
+    """
+    Mark a function view for ETag revalidation by PayloadMiddleware.
+    """
+    view.etag = True
+    return view
+
+
+def wants_etag(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'etag', False) or getattr(view_class, 'etag', False)
+
+
+def make_etag(content):
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def identity_etag(etag):
+    # The client may send back the validator of a compressed representation
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def not_modified(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = [identity_etag(tag.removeprefix('W/')) for tag in parse_etags(header)]
+    return '*' in etags or etag in etags
+
+
+def apply_etag(request, response):
+    if response.status_code != 200 or response.streaming or response.has_header('ETag'):
+        return response
+    etag = make_etag(response.content)
+    response.headers['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    if not not_modified(request, etag):
+        return response
+
+    if request.method in ('GET', 'HEAD'):
+        NOT_MODIFIED.inc(view=getattr(request.resolver_match, 'view_name', None) or 'unknown')
+        revalidated = HttpResponseNotModified()
+    else:
+        revalidated = HttpResponse(status=412)
+    for header, value in response.headers.items():
+        revalidated.headers[header] = value
+    for header in CONTENT_HEADERS:
+        if revalidated.has_header(header):
+            del revalidated.headers[header]
+    revalidated.cookies = response.cookies
+    return revalidated
+
+
+# ================= Compression =================
+def accepted_encoding(header):
+    """
+    The encoding to use for an Accept-Encoding header: 'br', 'gzip' or None.
+    Ties go to brotli.
+    """
+    weights = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    available = [encoding for encoding in ENCODINGS if encoding != 'br' or brotli is not None]
+    candidates = [(weights.get(encoding, weights.get('*', 0.0)), encoding) for encoding in available]
+    best = max(candidates, key=lambda candidate: (candidate[0], candidate[1] == 'br'))
+    return best[1] if best[0] > 0 else None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=config('BROTLI_QUALITY'))
+    return compress_string(content, max_random_bytes=config('GZIP_RANDOM_BYTES'))
+
+
+def apply_compression(request, response):
+    if response.streaming or response.has_header('Content-Encoding'):
+        return response
+    if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+        return response
+    if len(response.content) < config('COMPRESS_MIN_SIZE'):
+        return response
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = accepted_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+    with tracing.stage('compress'):
+        compressed = compress(response.content, encoding)
+    if len(compressed) >= len(response.content):
+        return response
+
+    COMPRESSED.inc(encoding=encoding)
+    BYTES_SAVED.inc(len(response.content) - len(compressed))
+    response.content = compressed
+    response.headers['Content-Length'] = str(len(compressed))
+    response.headers['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = f'{"W/" if encoding == "gzip" else ""}{etag[:-1]}-{encoding}"'
+    return response
+
+
+# ================= Middleware =================
+class PayloadMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.finish(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.finish(request, await self.get_response(request))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.wants_etag = wants_etag(view_func)
+
+    def finish(self, request, response):
+        if getattr(request, 'wants_etag', False):
+            response = apply_etag(request, response)
+        return apply_compression(request, response)
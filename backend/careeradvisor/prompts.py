@@ -0,0 +1,218 @@
+"""
+Prompt registry.
+
+Every Gemini prompt is a PromptTemplate registered here under a name and a
+version, built once at import. Template text is normalized up front
+(dedented, trailing spaces and runs of blank lines dropped), so source
+indentation is never sent upstream as billed input tokens.
+
+A template has a static ``system`` part, a ``user`` part with
+``{placeholders}`` and optional Gemini generation settings. ``render()``
+fills the user part with a single ``str.format_map`` call and returns a
+RenderedPrompt: the user text, tagged
+with its template. careeradvisor.upstream sends the system part as the
+model's system_instruction, on one model instance per (model, template
+version), so the static text is not rebuilt or re-sent per call. A system
+part of at least CONTEXT_CACHE_MIN_TOKENS (Gemini's minimum for explicit
+context caching) is uploaded once as cached content instead, so it is billed
+at the cached rate.
+
+Token counts are tracked per template on /metrics:
+
+* ``prompt_template_tokens{template,version,part}``: static size of each part,
+* ``prompt_tokens_estimated_total{template,part}``: estimated tokens sent,
+* ``gemini_usage_tokens_total{template,kind}``: Gemini's own usage report
+  (prompt, cached, output) for non-streamed calls.
+
+Change a template's text together with its version so metrics, logs and
+cached Gemini models tell the revisions apart.
+"""
+import string
+import textwrap
+
+from django.conf import settings
+
+from . import metrics, tracing
+
+DEFAULTS = {
+    'CONTEXT_CACHE_MIN_TOKENS': 32768,
+    'CONTEXT_CACHE_TTL': 3600,
+}
+
+# Rough token estimate used for budgets and metrics; no tokenizer round trip
+CHARS_PER_TOKEN = 4
+
+PROMPT_TOKENS = metrics.counter(
+    'prompt_tokens_estimated_total', 'Estimated prompt tokens sent to Gemini', ['template', 'part'],
+)
+USAGE_TOKENS = metrics.counter(
+    'gemini_usage_tokens_total', 'Tokens reported by Gemini usage metadata', ['template', 'kind'],
+)
+
+_registry = {}
+
+
+def config(name):
+    return getattr(settings, 'PROMPTS', {}).get(name, DEFAULTS[name])
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize(text):
+    """
+    Dedent, strip trailing whitespace and collapse runs of blank lines.
+    """
+    lines = []
+    for line in textwrap.dedent(text).strip().splitlines():
+        line = line.rstrip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+class RenderedPrompt(str):
+    """
+    The user part of a rendered prompt; ``template`` carries the system part.
+    """
+
+    def __new__(cls, text, template):
+        prompt = super().__new__(cls, text)
+        prompt.template = template
+        return prompt
+
+
+class PromptTemplate:
+
+    def __init__(self, name, version, system, user, generation_config=None):
+        self.name = name
+        self.version = version
+        self.generation_config = generation_config
+        self.key = f'{name}@v{version}'
+        self.system = normalize(system)
+        self.user = normalize(user)
+        self.fields = frozenset(
+            field for _, field, _, _ in string.Formatter().parse(self.user) if field is not None
+        )
+        self.system_tokens = estimate_tokens(self.system)
+        self.user_tokens = estimate_tokens(self.user.format_map({field: '' for field in self.fields}))
+
+    def __repr__(self):
+        return f'<PromptTemplate {self.key}>'
+
+    def render(self, **values):
+        text = self.user.format_map(values)
+        PROMPT_TOKENS.inc(estimate_tokens(text), template=self.name, part='user')
+        PROMPT_TOKENS.inc(self.system_tokens, template=self.name, part='system')
+        tracing.tag('prompt', self.key)
+        return RenderedPrompt(text, self)
+
+    @property
+    def context_cached(self):
+        return self.system_tokens >= config('CONTEXT_CACHE_MIN_TOKENS')
+
+
+def register(name, version, system, user, generation_config=None):
+    template = PromptTemplate(name, version, system, user, generation_config)
+    _registry[name] = template
+    return template
+
+
+def get(name):
+    return _registry[name]
+
+
+def template_tokens():
+    sizes = {}
+    for template in _registry.values():
+        sizes[(template.name, template.version, 'system')] = template.system_tokens
+        sizes[(template.name, template.version, 'user')] = template.user_tokens
+    return sizes
+
+
+TEMPLATE_TOKENS = metrics.gauge(
+    'prompt_template_tokens', 'Estimated static tokens per prompt template part',
+    ['template', 'version', 'part'], collect=template_tokens,
+)
+
+
+def record_usage(template, response):
+    """
+    Count Gemini's reported usage for a response rendered from ``template``.
+    """
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return
+    name = template.name if template is not None else 'raw'
+    for kind, attribute in (('prompt', 'prompt_token_count'), ('cached', 'cached_content_token_count'),
+                            ('output', 'candidates_token_count')):
+        count = getattr(usage, attribute, 0)
+        if isinstance(count, int) and count:
+            USAGE_TOKENS.inc(count, template=name, kind=kind)
+
+
+# ================= Templates =================
+CAREER_CHAT = register('career_chat', 2, system="""
+    You are CareerCompass AI, a professional career guidance assistant. Your role is to provide helpful, accurate, and actionable career advice.
+
+    Guidelines:
+    - Focus on career development, job search, skills, resume writing, interview preparation, and professional growth
+    - Provide practical, actionable advice
+    - Be encouraging and supportive
+    - Keep responses concise but informative (2-3 paragraphs max)
+    - If the question is not career-related, gently redirect to career topics
+    - Use the earlier conversation, when given, to answer follow-up questions
+""", user="""
+    {history}User question: {message}
+
+    Please provide a helpful career-focused response:
+""")
+
+COLLEGE_SEARCH = register('college_search', 3, system="""
+    You are a college advisor AI. Based on the field of study and location preference you are given,
+    provide a list of 8-10 relevant colleges/universities.
+
+    For each college, provide the following information in JSON format:
+    - name: College/University name
+    - location: City, State/Country
+    - type: (e.g., "Public University", "Private College", "Technical Institute")
+    - ranking: National or regional ranking if known (just the number, e.g., "15")
+    - programs: Array of 3-5 relevant programs/majors they offer
+    - description: Brief 2-3 sentence description of the college
+    - website: Official website URL if known
+    - rating: Rating out of 5 (e.g., 4.2)
+    - student_count: Approximate number of students (e.g., "25,000")
+    - established: Year established
+    - fees: Approximate annual fees (e.g., "$15,000-20,000" or "₹2-3 Lakhs")
+
+    Focus on colleges that are:
+    1. Well-known for the specified field
+    2. Located in or near the specified location (if location is provided)
+    3. Have good reputation and accreditation
+    4. Offer relevant programs
+
+    - rating must be a number and established a year, both without quotes
+
+    Return ONLY a valid JSON array with no additional text or formatting. Example format:
+    [{"name": "Example University", "location": "City, State", "type": "Public University", "ranking": "25", "programs": ["Computer Science", "Software Engineering", "Data Science"], "description": "A leading public university known for its strong engineering and technology programs.", "website": "https://example.edu", "rating": 4.3, "student_count": "30,000", "established": 1965, "fees": "$12,000-18,000"}]
+""", user="""
+    Field of study: "{field}"
+    Location preference: "{location}"
+""", generation_config={'response_mime_type': 'application/json'})
+
+CONVERSATION_SUMMARY = register('conversation_summary', 1, system="""
+    You maintain a running summary of a career guidance conversation.
+    Update the summary with the new messages you are given. Keep the user's goals,
+    background, constraints and any advice already given. Write plain prose.
+""", user="""
+    Use at most {words} words.
+
+    Current summary:
+    {summary}
+
+    New messages:
+    {transcript}
+
+    Updated summary:
+""")
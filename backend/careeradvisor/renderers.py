@@ -0,0 +1,153 @@
+"""
+Renderers and parsers for the API.
+
+ORJSONRenderer and ORJSONParser are DRF's JSON renderer and parser on orjson
+(pip install orjson) when it is installed and settings.JSON_BACKEND is
+'orjson', and on the standard library otherwise; the output is the same
+either way. The renderer encodes datetimes itself (see
+serializers.DateTimeField) and splices RawJSON values, already-encoded JSON
+such as job postings read from the local index, into the output without
+decoding and re-encoding them.
+"""
+import json
+
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def use_orjson():
+    return orjson is not None and getattr(settings, 'JSON_BACKEND', 'orjson') == 'orjson'
+
+
+# ================= Encoding =================
+class RawJSON:
+    """
+    Already-encoded JSON, written to the output as is. Allowed as a value of
+    a top-level dict or as an item of a list that is one.
+    """
+    __slots__ = ('encoded',)
+
+    def __init__(self, encoded):
+        self.encoded = encoded.encode() if isinstance(encoded, str) else encoded
+
+
+_stdlib_encoder = encoders.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+
+
+def encode(data):
+    """
+    Compact UTF-8 JSON bytes; DRF's JSONEncoder handles what orjson cannot.
+    """
+    if use_orjson():
+        try:
+            return orjson.dumps(data, default=_stdlib_encoder.default, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits
+            pass
+    return _stdlib_encoder.encode(data).encode()
+
+
+def has_raw(value):
+    return isinstance(value, RawJSON) or (isinstance(value, list) and any(isinstance(item, RawJSON) for item in value))
+
+
+def encode_value(value):
+    if isinstance(value, RawJSON):
+        return value.encoded
+    if has_raw(value):
+        return b'[' + b','.join(encode_value(item) for item in value) + b']'
+    return encode(value)
+
+
+def dumps(data):
+    """
+    encode() with RawJSON values spliced in.
+    """
+    if isinstance(data, dict) and any(has_raw(value) for value in data.values()):
+        return b'{' + b','.join(encode(str(key)) + b':' + encode_value(value) for key, value in data.items()) + b'}'
+    return encode(data)
+
+
+def loads(content):
+    if use_orjson():
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(str(e)) from e
+    return json.loads(content)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    native_datetimes = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            # Indented output is for humans (the browsable API); speed does not matter
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = dumps(data)
+        # As DRF does, for responses embedded in JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not use_orjson() or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+# ================= Streaming =================
+def sse_event(event, data):
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets views negotiate ``Accept: text/event-stream``. Streamed answers bypass
+    rendering entirely; anything else (validation errors, ...) is sent as a
+    single ``error`` event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event('error', data).encode(self.charset)
+
+
+def ndjson_line(data):
+    return dumps(data).decode() + "\n"
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Lets views negotiate ``Accept: application/x-ndjson``. Streamed results
+    bypass rendering; anything else is sent as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ndjson_line(data).encode(self.charset)
@@ -0,0 +1,291 @@
+"""
+Semantic answer cache for the chatbot.
+
+Messages are embedded on the CPU with a signed feature-hashing vectorizer
+(word unigrams and bigrams, stop words dropped, plurals folded), so no model
+download or training is needed. Prior (message, response) pairs live in a
+NumPy matrix of L2-normalised rows; a lookup is one matrix-vector product and
+an answer is reused when the best cosine similarity reaches the threshold.
+
+The index is persisted to disk (settings.SEMANTIC_CACHE['PATH']) for warm
+starts. On first use it loads that file and a background thread catches up
+on Chat rows newer than the ones it has seen, so no request waits on a table
+scan; it then grows incrementally as Gemini answers arrive. Turns of a
+conversation are never indexed: their answers depended on earlier turns.
+
+The index is shared by all users, so an answer is only reused for a question
+that is nearly the same: stand-alone career questions rarely carry anything
+personal, and conversation turns, which might, are excluded.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'THRESHOLD': 0.85,
+    'DIMENSIONS': 1024,
+    'MAX_ENTRIES': 20000,
+    'SAVE_EVERY': 50,
+    'PATH': None,
+}
+
+LOOKUPS = metrics.counter('semantic_cache_lookups_total', 'Semantic cache lookups', ['result'])
+SECONDS_SAVED = metrics.counter(
+    'semantic_cache_seconds_saved_total', 'Estimated upstream seconds avoided by semantic cache hits',
+)
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by can could do does for from had has have how i i'm if in into is it its
+    me my of on or our please should so tell than that the their them then there these this those
+    to up us was we what when where which who why will with would you your
+    about any best get good help know like need some tip want way
+""".split())
+
+# Bigrams add word order without letting phrasing differences dominate
+BIGRAM_WEIGHT = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#']+")
+
+
+def config(name):
+    return getattr(settings, 'SEMANTIC_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def features(text):
+    words = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        word = word.strip("'")
+        if not word or word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+            if word in STOP_WORDS:
+                continue
+        words.append(word)
+    return [(word, 1.0) for word in words] + [(f'{a} {b}', BIGRAM_WEIGHT) for a, b in zip(words, words[1:])]
+
+
+def embed(text, dims):
+    """
+    Signed hashing-trick embedding. crc32 keeps it stable across processes,
+    which a persisted index needs (str hashes are salted per process).
+    """
+    vector = np.zeros(dims, dtype=np.float32)
+    for feature, weight in features(text):
+        digest = zlib.crc32(feature.encode())
+        vector[digest % dims] += weight if digest & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticIndex:
+    """
+    Bounded, append-mostly matrix of message embeddings with their answers.
+    Once full, new entries overwrite the oldest.
+    """
+
+    def __init__(self, dims, max_entries):
+        self.dims = dims
+        self.max_entries = max_entries
+        self.vectors = np.zeros((64, dims), dtype=np.float32)
+        self.messages = []
+        self.responses = []
+        self.next_slot = 0
+        self.last_chat_id = 0
+        self.unsaved = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.responses)
+
+    def search(self, vector):
+        """
+        Best (similarity, position) for ``vector``, or (0.0, None) when empty.
+        """
+        with self._lock:
+            return self._search(vector)
+
+    def _search(self, vector):
+        size = len(self.responses)
+        if not size or not vector.any():
+            return 0.0, None
+        scores = self.vectors[:size] @ vector
+        best = int(np.argmax(scores))
+        return float(scores[best]), best
+
+    def add(self, message, response, vector=None):
+        vector = embed(message, self.dims) if vector is None else vector
+        if not vector.any():
+            return False
+        with self._lock:
+            # Search and insert under one lock so two adds of one question share a slot
+            score, position = self._search(vector)
+            if position is not None and score >= 0.999:
+                # Same question again: keep the newest answer
+                self.responses[position] = response
+            else:
+                position = self.next_slot
+                if position == len(self.responses):
+                    if position == len(self.vectors):
+                        grown = np.zeros((min(len(self.vectors) * 2, self.max_entries), self.dims), dtype=np.float32)
+                        grown[:position] = self.vectors[:position]
+                        self.vectors = grown
+                    self.messages.append(message)
+                    self.responses.append(response)
+                else:
+                    self.messages[position] = message
+                    self.responses[position] = response
+                self.vectors[position] = vector
+                self.next_slot = (position + 1) % self.max_entries
+            self.unsaved += 1
+        return True
+
+    def save(self, path):
+        with self._lock:
+            size = len(self.responses)
+            meta = {
+                'dims': self.dims,
+                'next_slot': self.next_slot,
+                'last_chat_id': self.last_chat_id,
+                'messages': self.messages,
+                'responses': self.responses,
+            }
+            vectors = self.vectors[:size].copy()
+            self.unsaved = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, vectors=vectors, meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, dims, max_entries):
+        index = cls(dims, max_entries)
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes().decode())
+            if meta['dims'] != dims:
+                # Embedding size changed: the stored vectors are unusable
+                return index
+            vectors = data['vectors'][:max_entries]
+        index.vectors = np.zeros((max(64, len(vectors)), dims), dtype=np.float32)
+        index.vectors[:len(vectors)] = vectors
+        index.messages = meta['messages'][:max_entries]
+        index.responses = meta['responses'][:max_entries]
+        index.next_slot = meta['next_slot'] % max_entries
+        index.last_chat_id = meta['last_chat_id']
+        return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def latest_chat_id():
+    from .models import Chat
+    return Chat.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def catch_up(index, until=None):
+    """
+    Add Chat rows newer than the index's high-water mark, up to chat ``until``.
+    Rule-based fallback answers are skipped so an outage never gets cached as
+    a real answer, and so are conversation turns, which were answered with the
+    earlier turns as context (the live path does not remember them either).
+    """
+    from .models import Chat
+    from .views import get_fallback_response
+
+    rows = Chat.objects.filter(id__gt=index.last_chat_id, conversation__isnull=True)
+    if until is not None:
+        rows = rows.filter(id__lte=until)
+    rows = (
+        rows
+        .exclude(response='')
+        .order_by('id')
+        .values_list('id', 'message', 'response')
+    )
+    for chat_id, message, response in rows.iterator():
+        if response != get_fallback_response(message):
+            index.add(message, response)
+        index.last_chat_id = chat_id
+    if until is not None:
+        index.last_chat_id = max(index.last_chat_id, until)
+
+
+def catch_up_in_background(index, path, until):
+    try:
+        catch_up(index, until)
+        if path and index.unsaved:
+            index.save(path)
+    except Exception as e:
+        logger.warning("Semantic index catch-up failed: %s", e)
+    finally:
+        connection.close()
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                dims, max_entries, path = config('DIMENSIONS'), config('MAX_ENTRIES'), config('PATH')
+                index = None
+                if path and os.path.exists(path):
+                    try:
+                        index = SemanticIndex.load(path, dims, max_entries)
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.warning("Could not load semantic index, rebuilding: %s", e)
+                if index is None:
+                    index = SemanticIndex(dims, max_entries)
+                # Lookups use what is loaded until the catch-up has added the rest.
+                # Chats after this id were answered live and remembered then, so
+                # the catch-up stops here rather than adding them a second time.
+                until = latest_chat_id()
+                threading.Thread(
+                    target=catch_up_in_background, args=(index, path, until), name='semantic-catch-up', daemon=True,
+                ).start()
+                _index = index
+    return _index
+
+
+def average_upstream_seconds():
+    from .upstream import UPSTREAM_LATENCY
+    return UPSTREAM_LATENCY.mean(upstream='gemini', outcome='ok')
+
+
+def lookup(message):
+    """
+    Cached answer for a message similar enough to one already answered, or None.
+    """
+    if not config('ENABLED'):
+        return None
+    index = get_index()
+    score, position = index.search(embed(message, index.dims))
+    if position is None or score < config('THRESHOLD'):
+        LOOKUPS.inc(result='miss')
+        return None
+    LOOKUPS.inc(result='hit')
+    SECONDS_SAVED.inc(average_upstream_seconds())
+    return index.responses[position]
+
+
+def remember(message, response):
+    if not config('ENABLED'):
+        return
+    index = get_index()
+    index.add(message, response)
+    path = config('PATH')
+    if path and index.unsaved >= config('SAVE_EVERY'):
+        index.save(path)
@@ -1,7 +1,23 @@
 from django.contrib.auth.models import User
-from rest_framework import serializers
-from rest_framework import serializers
-from .models import Chat
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import Chat, Conversation, LLMTask
+
+
+class DateTimeField(serializers.DateTimeField):
+    """
+    Leaves ISO 8601 datetimes to the renderer when the serializer context has
+    ``native_datetimes`` (the accepted renderer encodes them itself, see
+    renderers.ORJSONRenderer). The rendered value is the same.
+    """
+
+    def to_representation(self, value):
+        if value and self.context.get('native_datetimes') and not isinstance(value, str):
+            output_format = getattr(self, 'format', api_settings.DATETIME_FORMAT)
+            if output_format is not None and output_format.lower() == ISO_8601:
+                return self.enforce_timezone(value)
+        return super().to_representation(value)
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -18,7 +34,40 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 class ChatSerializer(serializers.ModelSerializer):
+    created_at = DateTimeField(read_only=True)
+
+    class Meta:
+        model = Chat
+        fields = ['id', 'user', 'conversation', 'message', 'response', 'created_at']
+        read_only_fields = ['id', 'user', 'conversation', 'response', 'created_at']
+
+class ChatListSerializer(serializers.ModelSerializer):
+    """
+    History listing row. ``response`` is the (possibly truncated) preview
+    annotated by ChatHistoryView; ``truncated`` tells the client to fetch more.
+    """
+    response = serializers.CharField(source='response_preview', read_only=True)
+    truncated = serializers.SerializerMethodField()
+    created_at = DateTimeField(read_only=True)
+
     class Meta:
         model = Chat
-        fields = ['id', 'user', 'message', 'response', 'created_at']
-        read_only_fields = ['id', 'user', 'response', 'created_at']
\ No newline at end of file
+        fields = ['id', 'user', 'conversation', 'message', 'response', 'truncated', 'created_at']
+        read_only_fields = fields
+
+    def get_truncated(self, chat):
+        return chat.response_length > len(chat.response_preview)
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Conversation
+        fields = ['id', 'title', 'summary', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'summary', 'created_at', 'updated_at']
+
+
+class LLMTaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LLMTask
+        fields = ['id', 'kind', 'status', 'chat', 'result', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,95 @@
+"""
+Request coalescing ("single flight").
+
+While a call for a key is in flight, further callers with the same key wait
+for it and share its result (or exception) instead of issuing their own
+upstream request. Threads and event-loop tasks are tracked separately. An
+async call runs in a task of its own, so cancelling any one caller leaves it
+running for the rest; it is cancelled only once every caller has gone.
+"""
+import asyncio
+import threading
+
+from . import metrics
+
+COALESCED = metrics.counter('coalesced_requests_total', 'Calls that shared an in-flight upstream request', ['group'])
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Flight:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+
+    def __init__(self, group):
+        self.group = group
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            COALESCED.inc(group=self.group)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, coro_fn):
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get((loop, key))
+        if flight is not None:
+            COALESCED.inc(group=self.group)
+        else:
+            # The call runs in its own task so no single caller owns it
+            flight = self._flights[(loop, key)] = _Flight(loop.create_task(coro_fn()))
+            flight.task.add_done_callback(lambda task: self._landed((loop, key), flight))
+
+        flight.waiters += 1
+        try:
+            # shield: a cancelled caller, the first one included, only stops waiting
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                # Nobody is left to use the result; later callers start afresh
+                self._drop((loop, key), flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _drop(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _landed(self, key, flight):
+        self._drop(key, flight)
+        if not flight.task.cancelled():
+            # Mark retrieved so an exception nobody awaited is not logged
+            flight.task.exception()
@@ -0,0 +1,208 @@
+"""
+Server-Sent Events streaming for chatbot answers.
+
+Tokens are forwarded to the client as Gemini produces them. The answer is
+accumulated and persisted to a single Chat row: created on the first partial
+save (or at the end), then updated. If the upstream fails mid-stream the
+rule-based fallback answer is sent as a ``fallback`` event and stored instead.
+If the client disconnects, the part of the answer it was sent is still saved
+and the stream is counted as ``disconnected``.
+A semantic cache hit is sent as a single ``token`` event. Messages in a
+conversation carry its history in the prompt and skip the semantic cache.
+
+Event stream:
+    event: token     data: {"text": "<chunk>"}
+    event: fallback  data: {"text": "<full fallback answer>"}
+    event: done      data: <serialized Chat>
+"""
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from . import conversations, metrics, semantic_cache, tracing, upstream
+from .models import Chat
+from .renderers import sse_event
+from .serializers import ChatSerializer
+from .views import GEMINI_MODEL_NAME, build_career_prompt, get_fallback_response
+
+logger = logging.getLogger(__name__)
+
+STREAMS = metrics.counter('chat_streams_total', 'Streamed chat answers by outcome', ['outcome'])
+
+
+def wants_stream(request):
+    """
+    A client opts into streaming with ?stream=1 or an event-stream Accept header.
+    """
+    if request.GET.get('stream') in ('1', 'true'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def sse_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the whole stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def chunk_text(chunk):
+    # Safety/finish-reason chunks carry no parts and raise on .text
+    try:
+        return chunk.text or ''
+    except ValueError:
+        return ''
+
+
+class ChatRecorder:
+    """
+    Accumulates a streamed answer and persists it, at most every
+    CHAT_STREAM_SAVE_INTERVAL seconds while streaming and once at the end.
+    """
+
+    def __init__(self, user, message, conversation=None):
+        self.user = user
+        self.message = message
+        self.conversation = conversation
+        self.parts = []
+        self.chat = None
+        self.interval = getattr(settings, 'CHAT_STREAM_SAVE_INTERVAL', 0)
+        self.last_saved = time.monotonic()
+
+    @property
+    def text(self):
+        return ''.join(self.parts)
+
+    def append(self, text):
+        self.parts.append(text)
+
+    def replace(self, text):
+        self.parts = [text]
+
+    def due(self):
+        return self.interval > 0 and time.monotonic() - self.last_saved >= self.interval
+
+    def save(self):
+        self.last_saved = time.monotonic()
+        response = self.text.strip()
+        if self.chat is None:
+            self.chat = Chat.objects.create(
+                user=self.user, conversation=self.conversation, message=self.message, response=response,
+            )
+        else:
+            self.chat.response = response
+            self.chat.save(update_fields=['response'])
+        return self.chat
+
+
+def finish_stream(recorder, conversation, context, outcome):
+    """
+    Persist the answer and count the stream's outcome. Runs however the stream
+    ends, so a client that disconnects keeps the part of the answer it was sent.
+    """
+    STREAMS.inc(outcome=outcome)
+    if outcome == 'disconnected' and not recorder.text.strip():
+        return recorder.chat
+    chat = recorder.save()
+    conversations.after_turn(conversation, context, recorder.message)
+    return chat
+
+
+def stream_chat_events(user, message, conversation=None):
+    recorder = ChatRecorder(user, message, conversation)
+    context = conversations.build_context(conversation)
+    response = None
+    # Stays 'disconnected' unless the stream gets as far as the done event
+    outcome = 'disconnected'
+
+    try:
+        try:
+            cached = None if context else semantic_cache.lookup(message)
+            if cached:
+                recorder.replace(cached)
+                yield sse_event('token', {'text': cached})
+                result = 'cached'
+            else:
+                response = upstream.generate_content(
+                    GEMINI_MODEL_NAME, build_career_prompt(message, context), stream=True,
+                )
+                for chunk in response:
+                    text = chunk_text(chunk)
+                    if not text:
+                        continue
+                    recorder.append(text)
+                    yield sse_event('token', {'text': text})
+                    if recorder.due():
+                        recorder.save()
+                if not recorder.text.strip():
+                    raise ValueError("Gemini returned empty response")
+                if not context:
+                    semantic_cache.remember(message, recorder.text.strip())
+                result = 'completed'
+        except Exception as e:
+            logger.error("Gemini streaming error: %s", e)
+            tracing.fallback('chat', 'stream_error')
+            fallback = get_fallback_response(message)
+            recorder.replace(fallback)
+            yield sse_event('fallback', {'text': fallback})
+            result = 'fallback'
+        outcome = result
+    finally:
+        if response is not None:
+            response.close()
+        chat = finish_stream(recorder, conversation, context, outcome)
+
+    yield sse_event('done', ChatSerializer(chat).data)
+
+
+async def astream_chat_events(user, message, conversation=None):
+    recorder = ChatRecorder(user, message, conversation)
+    save = sync_to_async(recorder.save)
+    context = await sync_to_async(conversations.build_context)(conversation)
+    response = None
+    # A disconnect cancels the task or closes the generator; either way the
+    # finally block still saves what was sent
+    outcome = 'disconnected'
+
+    try:
+        try:
+            cached = None if context else await sync_to_async(semantic_cache.lookup)(message)
+            if cached:
+                recorder.replace(cached)
+                yield sse_event('token', {'text': cached})
+                result = 'cached'
+            else:
+                response = await upstream.agenerate_content(
+                    GEMINI_MODEL_NAME, build_career_prompt(message, context), stream=True,
+                )
+                async for chunk in response:
+                    text = chunk_text(chunk)
+                    if not text:
+                        continue
+                    recorder.append(text)
+                    yield sse_event('token', {'text': text})
+                    if recorder.due():
+                        await save()
+                if not recorder.text.strip():
+                    raise ValueError("Gemini returned empty response")
+                if not context:
+                    await sync_to_async(semantic_cache.remember)(message, recorder.text.strip())
+                result = 'completed'
+        except Exception as e:
+            logger.error("Gemini streaming error: %s", e)
+            tracing.fallback('chat', 'stream_error')
+            fallback = get_fallback_response(message)
+            recorder.replace(fallback)
+            yield sse_event('fallback', {'text': fallback})
+            result = 'fallback'
+        outcome = result
+    finally:
+        if response is not None:
+            await response.aclose()
+        chat = await sync_to_async(finish_stream)(recorder, conversation, context, outcome)
+
+    yield sse_event('done', ChatSerializer(chat).data)
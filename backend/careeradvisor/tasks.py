@@ -0,0 +1,352 @@
+"""
+Background queue for LLM work (opt-in asynchronous chat and college search).
+
+Every task is an LLMTask row, which is what clients poll. Two brokers decide
+who runs it (settings.LLM_QUEUE['BROKER']):
+
+* ``local``: an in-process priority queue drained by a lazily started thread
+  pool. Queued rows older than a lease (their process is presumed gone) are
+  adopted, so live processes' fresh rows are left to them.
+* ``db``: nothing runs in the web process; ``manage.py run_llm_workers``
+  polls the table and claims rows with a compare-and-set update.
+
+A claim is a lease of LEASE_SECONDS: tasks still running after that (their
+worker died with them) are re-queued by reap_expired(), or failed once they
+have been claimed MAX_ATTEMPTS times. The local pool and run_llm_workers
+both reap every LEASE_SECONDS / 2.
+
+Authenticated work is queued at PRIORITY_USER and runs ahead of anonymous
+college searches (PRIORITY_ANONYMOUS). Enqueueing fails with QueueFull once
+the backlog reaches its depth limit so callers can shed load with a 503.
+
+wait_for() blocks its thread, so sync views only long-poll briefly;
+await_task() is the async form for ASGI views.
+"""
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from . import metrics
+from .models import Chat, LLMTask
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BROKER': 'local',
+    'WORKERS': 4,
+    'MAX_DEPTH': 500,
+    'MAX_ANONYMOUS_DEPTH': 100,
+    'POLL_INTERVAL': 0.5,
+    'LEASE_SECONDS': 300,
+    'MAX_ATTEMPTS': 3,
+}
+
+TASKS_FINISHED = metrics.counter('llm_tasks_finished_total', 'LLM tasks run to completion', ['kind', 'status'])
+TASKS_REJECTED = metrics.counter('llm_tasks_rejected_total', 'LLM tasks refused by back-pressure', ['kind'])
+TASK_WAIT = metrics.histogram('llm_task_queue_seconds', 'Time LLM tasks spent queued', ['kind'])
+TASK_RUN = metrics.histogram('llm_task_run_seconds', 'Time spent running LLM tasks', ['kind'])
+TASKS_REAPED = metrics.counter('llm_tasks_reaped_total', 'Running LLM tasks whose lease expired', ['outcome'])
+
+
+class QueueFull(Exception):
+    pass
+
+
+def config(name):
+    return getattr(settings, 'LLM_QUEUE', {}).get(name, DEFAULTS[name])
+
+
+def _queued():
+    return LLMTask.objects.filter(status=LLMTask.STATUS_QUEUED)
+
+
+def queue_depths():
+    counts = {('user',): 0, ('anonymous',): 0}
+    for row in _queued().values('priority').annotate(n=Count('pk')):
+        label = 'user' if row['priority'] < LLMTask.PRIORITY_ANONYMOUS else 'anonymous'
+        counts[(label,)] += row['n']
+    return counts
+
+
+QUEUE_DEPTH = metrics.gauge('llm_queue_depth', 'Queued LLM tasks by priority class', ['priority'], collect=queue_depths)
+
+
+# ================= Enqueueing =================
+def enqueue(kind, payload, user=None, chat=None):
+    """
+    Persist a task and hand it to the broker. Raises QueueFull under back-pressure.
+    """
+    authenticated = user is not None and user.is_authenticated
+    priority = LLMTask.PRIORITY_USER if authenticated else LLMTask.PRIORITY_ANONYMOUS
+
+    # Both depths in one scan of the queue index
+    depth = _queued().aggregate(
+        total=Count('pk'), anonymous=Count('pk', filter=Q(priority__gte=LLMTask.PRIORITY_ANONYMOUS)),
+    )
+    if depth['total'] >= config('MAX_DEPTH') or (
+        not authenticated and depth['anonymous'] >= config('MAX_ANONYMOUS_DEPTH')
+    ):
+        TASKS_REJECTED.inc(kind=kind)
+        raise QueueFull(f"{kind} queue is full")
+
+    task = LLMTask.objects.create(
+        kind=kind,
+        payload=payload,
+        priority=priority,
+        user=user if authenticated else None,
+        chat=chat,
+    )
+    if config('BROKER') == 'local':
+        # A worker must not look for the row before it is committed
+        transaction.on_commit(lambda: get_pool().submit(task))
+    return task
+
+
+def enqueue_chat(user, message, conversation=None):
+    # The Chat row exists straight away and its response is filled in by the
+    # worker; it is rolled back with the task when the queue is full
+    with transaction.atomic():
+        chat = Chat.objects.create(user=user, conversation=conversation, message=message, response='')
+        return enqueue(LLMTask.KIND_CHAT, {'message': message}, user=user, chat=chat)
+
+
+def enqueue_college_search(user, field, location):
+    return enqueue(LLMTask.KIND_COLLEGES, {'field': field, 'location': location}, user=user)
+
+
+# ================= Running =================
+def run_chat(task):
+    from . import conversations
+    from .serializers import ChatSerializer
+    from .views import get_chatbot_response
+
+    chat = task.chat
+    # Turns still waiting for an answer (this one included) are left out of the history
+    context = conversations.build_context(chat.conversation)
+    chat.response = get_chatbot_response(task.payload['message'], context)
+    chat.save(update_fields=['response'])
+    conversations.after_turn(chat.conversation, context, chat.message)
+    return ChatSerializer(chat).data
+
+
+def run_colleges(task):
+    from . import college_catalog
+    from .views import college_cache, generate_colleges, get_fallback_colleges, normalize_text
+
+    field, location = task.payload['field'], task.payload['location']
+    colleges_data, source = college_catalog.search(field, location, lambda: college_cache.get_or_compute(
+        (field, location),
+        lambda: generate_colleges(normalize_text(field), normalize_text(location)),
+    ))
+    if colleges_data is None:
+        return get_fallback_colleges(field, location).data
+    return {'status': 'success', 'count': len(colleges_data), 'data': colleges_data, 'source': source}
+
+
+HANDLERS = {
+    LLMTask.KIND_CHAT: run_chat,
+    LLMTask.KIND_COLLEGES: run_colleges,
+}
+
+
+def claim(task_id):
+    """
+    Atomically move a queued task to running; returns the task or None if
+    another worker got there first.
+    """
+    claimed = _queued().filter(pk=task_id).update(
+        status=LLMTask.STATUS_RUNNING, started_at=timezone.now(), attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return None
+    return LLMTask.objects.select_related('chat__conversation').get(pk=task_id)
+
+
+def run_task(task_id):
+    close_old_connections()
+    try:
+        task = claim(task_id)
+        if task is None:
+            return None
+        TASK_WAIT.observe((task.started_at - task.created_at).total_seconds(), kind=task.kind)
+
+        start = time.perf_counter()
+        try:
+            task.result = HANDLERS[task.kind](task)
+            task.status = LLMTask.STATUS_DONE
+        except Exception as e:
+            logger.error("LLM task %s failed: %s", task.id, e)
+            task.error = str(e)
+            task.status = LLMTask.STATUS_FAILED
+        TASK_RUN.observe(time.perf_counter() - start, kind=task.kind)
+
+        task.finished_at = timezone.now()
+        task.save(update_fields=['result', 'error', 'status', 'finished_at'])
+        TASKS_FINISHED.inc(kind=task.kind, status=task.status)
+        notify()
+        return task
+    finally:
+        close_old_connections()
+
+
+def next_queued_id():
+    return _queued().order_by('priority', 'created_at').values_list('pk', flat=True).first()
+
+
+def lease_expiry():
+    return timezone.now() - timedelta(seconds=config('LEASE_SECONDS'))
+
+
+def orphaned_ids():
+    """
+    Queued tasks nobody has claimed for a whole lease: the process that
+    queued them (or re-queued them in reap_expired) is presumed gone.
+    """
+    return _queued().filter(created_at__lt=lease_expiry()).order_by('created_at').values_list('pk', 'priority')
+
+
+def reap_expired():
+    """
+    Re-queue running tasks whose lease expired, or fail them after
+    MAX_ATTEMPTS claims. Returns the number re-queued.
+    """
+    now = timezone.now()
+    expired = LLMTask.objects.filter(status=LLMTask.STATUS_RUNNING, started_at__lt=lease_expiry())
+    failed = expired.filter(attempts__gte=config('MAX_ATTEMPTS')).update(
+        status=LLMTask.STATUS_FAILED, error='The worker running this task stopped', finished_at=now,
+    )
+    requeued = expired.filter(attempts__lt=config('MAX_ATTEMPTS')).update(
+        status=LLMTask.STATUS_QUEUED, started_at=None,
+    )
+    if failed or requeued:
+        logger.warning("Reaped expired LLM tasks: %d re-queued, %d failed", requeued, failed)
+        TASKS_REAPED.inc(failed, outcome='failed')
+        TASKS_REAPED.inc(requeued, outcome='requeued')
+        notify()
+    return requeued
+
+
+# ================= Completion notification =================
+_finished = threading.Condition()
+
+
+def notify():
+    with _finished:
+        _finished.notify_all()
+
+
+def wait_for(task_id, timeout):
+    """
+    Block up to ``timeout`` seconds for a task to finish and return it.
+    In-process completions wake waiters immediately; tasks run by external
+    workers are noticed on the next poll.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        task = LLMTask.objects.get(pk=task_id)
+        remaining = deadline - time.monotonic()
+        if task.finished or remaining <= 0:
+            return task
+        with _finished:
+            _finished.wait(min(remaining, config('POLL_INTERVAL')))
+
+
+async def await_task(task_id, timeout):
+    """
+    wait_for() for async views: polls without holding a thread.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        task = await LLMTask.objects.aget(pk=task_id)
+        remaining = deadline - time.monotonic()
+        if task.finished or remaining <= 0:
+            return task
+        await asyncio.sleep(min(remaining, config('POLL_INTERVAL')))
+
+
+# ================= Local broker =================
+class WorkerPool:
+    """
+    Threads draining an in-process priority queue of task ids.
+    """
+
+    def __init__(self, workers):
+        self.queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        # Ids in the queue, so a periodic adoption does not queue them twice
+        self.pending = set()
+        self._pending_lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._work, name=f'llm-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        self.threads.append(threading.Thread(target=self._reap, name='llm-reaper', daemon=True))
+
+    def start(self):
+        self.recover()
+        for thread in self.threads:
+            thread.start()
+
+    def recover(self):
+        """
+        Re-queue tasks whose lease expired and adopt orphaned queued ones.
+        """
+        reap_expired()
+        for task_id, priority in orphaned_ids():
+            self.put(priority, task_id)
+
+    def submit(self, task):
+        self.put(task.priority, task.pk)
+
+    def put(self, priority, task_id):
+        with self._pending_lock:
+            if task_id in self.pending:
+                return
+            self.pending.add(task_id)
+        self.queue.put((priority, next(self._sequence), task_id))
+
+    def _work(self):
+        while True:
+            _, _, task_id = self.queue.get()
+            with self._pending_lock:
+                self.pending.discard(task_id)
+            try:
+                run_task(task_id)
+            except Exception as e:
+                logger.exception("LLM worker error: %s", e)
+            finally:
+                self.queue.task_done()
+
+    def _reap(self):
+        while True:
+            time.sleep(config('LEASE_SECONDS') / 2)
+            try:
+                self.recover()
+            except Exception as e:
+                logger.exception("Reaping expired LLM tasks failed: %s", e)
+            finally:
+                close_old_connections()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = WorkerPool(config('WORKERS'))
+                pool.start()
+                _pool = pool
+    return _pool
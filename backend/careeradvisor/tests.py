@@ -1,3 +1,1089 @@
-from django.test import TestCase
+"""
+Tests for careeradvisor. Upstream calls go to benchmarks/stub_upstream.py, a
+local stand-in for JSearch and Gemini, so no test touches a paid API.
+"""
+import asyncio
+import base64
+import gzip
+import json
+import sys
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import (
+    authentication, chat_archive, circuit, conversations, job_index, payloads, semantic_cache, tasks, throttling,
+    upstream,
+)
+from .cache import LRUCache, ResponseCache, make_key, normalize_text
+from .college_parser import CollegeStreamParser, as_rating, as_year, parse_colleges, validate_college
+from .intents import IntentMatcher
+from .models import Chat, ChatArchive, ChatArchiveSegment, Conversation, Job, JobQuery, LLMTask
+from .pagination import ChatCursorPagination
+from .prompts import estimate_tokens
+from .renderers import ORJSONRenderer, RawJSON, dumps, loads
+from .singleflight import SingleFlight
+from .streaming import STREAMS, astream_chat_events, stream_chat_events
+from .views import fetch_jobs
+
+sys.path.insert(0, str(settings.BASE_DIR / 'benchmarks'))
+from stub_upstream import ADVICE, inject_faults, request_counts, start_stub  # noqa: E402
+
+UPSTREAM = {
+    'CONNECT_TIMEOUT': 1,
+    'READ_TIMEOUT': 0.3,
+    'RETRIES': 2,
+    'BACKOFF_FACTOR': 0.1,
+    'BACKOFF_JITTER': 0,
+    'POOL_MAXSIZE': 4,
+}
+
+HEALTHY = {'latency': 0, 'failure_rate': 0, 'fail_next': 0,
+           'gemini_latency': 0, 'gemini_failure_rate': 0, 'gemini_fail_next': 0}
+
+
+class StubUpstreamTestCase(TestCase):
+    """
+    Runs one stub server per test class with the backend pointed at it.
+    Faults are reset and the shared clients rebuilt before every test.
+    """
+    overrides = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = start_stub()
+        cls.addClassCleanup(cls.stub.shutdown)
+        stub_url = f'http://127.0.0.1:{cls.stub.server_address[1]}'
+        overrides = override_settings(**{
+            'RAPIDAPI_JSEARCH_URL': f'{stub_url}/search',
+            'GEMINI_API_ENDPOINT': stub_url,
+            'UPSTREAM': UPSTREAM,
+            'JOB_INDEX': {'ENABLED': False},
+            **cls.overrides,
+        })
+        overrides.enable()
+        cls.addClassCleanup(overrides.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        inject_faults(self.stub, **HEALTHY)
+        # The session's retry policy and the SDK's endpoint are read from settings when they are built
+        upstream._session = None
+        upstream._configured_key = None
+        circuit.reset()
+        throttling.get_store().clear()
+
+    def requests_received(self, name='rapidapi'):
+        return request_counts(self.stub)[name]
+
+    def search(self, **params):
+        return upstream.http_get('rapidapi', settings.RAPIDAPI_JSEARCH_URL, params={'query': 'python', **params})
+
+
+# ================= Upstream session =================
+class UpstreamSessionTests(StubUpstreamTestCase):
+
+    def test_retries_5xx_with_backoff(self):
+        inject_faults(self.stub, fail_next=2)
+        before = self.requests_received()
+        start = time.perf_counter()
+        response = self.search()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.requests_received() - before, 3)
+        # urllib3 retries the first failure at once and backs off BACKOFF_FACTOR * 2 before the second
+        self.assertGreaterEqual(elapsed, 0.2)
+
+    def test_gives_up_after_retries(self):
+        inject_faults(self.stub, failure_rate=1)
+        before = self.requests_received()
+        response = self.search()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.requests_received() - before, UPSTREAM['RETRIES'] + 1)
+
+    def test_read_timeout(self):
+        inject_faults(self.stub, latency=0.5)
+        start = time.perf_counter()
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.search()
+        elapsed = time.perf_counter() - start
+
+        # Every attempt times out after READ_TIMEOUT; none waits for the stub
+        attempts = UPSTREAM['RETRIES'] + 1
+        self.assertGreaterEqual(elapsed, attempts * UPSTREAM['READ_TIMEOUT'])
+        self.assertLess(elapsed, attempts * 0.5 + 1)
+
+    def test_connections_are_pooled(self):
+        for _ in range(3):
+            self.assertEqual(self.search().status_code, 200)
+        manager = upstream.get_session().get_adapter(settings.RAPIDAPI_JSEARCH_URL).poolmanager
+        self.assertEqual(sum(manager.pools[key].num_connections for key in manager.pools.keys()), 1)
+
+    def test_async_retries_5xx(self):
+        inject_faults(self.stub, fail_next=2)
+        before = self.requests_received()
+        response = async_to_sync(upstream.ahttp_get)(
+            'rapidapi', settings.RAPIDAPI_JSEARCH_URL, params={'query': 'python'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.requests_received() - before, 3)
+
+
+class JobSearchUpstreamTests(StubUpstreamTestCase):
+
+    def post(self, job_title):
+        return self.client.post('/api/jobs/search', {'job_title': job_title}, content_type='application/json')
+
+    def test_transient_failure_is_retried(self):
+        inject_faults(self.stub, fail_next=1)
+        response = self.post('Data Analyst')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['source'], 'live')
+        self.assertEqual(response.json()['count'], 10)
+
+    def test_outage_returns_error(self):
+        inject_faults(self.stub, failure_rate=1)
+        response = self.post('Product Manager')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['status'], 'error')
+
+    def test_timeout_returns_error(self):
+        inject_faults(self.stub, latency=0.5)
+        response = self.post('QA Engineer')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['status'], 'error')
+
+
+# ================= Circuit breakers =================
+CIRCUIT_BREAKER = {
+    'WINDOW': 60,
+    'MIN_CALLS': 4,
+    'FAILURE_RATE': 0.5,
+    'OPEN_SECONDS': 0.3,
+    'PROBES': 1,
+    'PROBE_TIMEOUT': 0.5,
+}
+
+
+class CircuitBreakerTests(StubUpstreamTestCase):
+    overrides = {'CIRCUIT_BREAKER': CIRCUIT_BREAKER, 'GEMINI_API_KEY': 'test'}
+
+    def state(self, name='rapidapi'):
+        return circuit.get_breaker(name).state
+
+    def open_circuit(self):
+        inject_faults(self.stub, failure_rate=1)
+        for _ in range(CIRCUIT_BREAKER['MIN_CALLS']):
+            self.assertEqual(self.search().status_code, 503)
+        self.assertEqual(self.state(), circuit.OPEN)
+
+    def wait_until_half_open(self):
+        time.sleep(CIRCUIT_BREAKER['OPEN_SECONDS'])
+
+    def test_opens_probes_and_closes(self):
+        self.open_circuit()
+        before = self.requests_received()
+        with self.assertRaises(circuit.CircuitOpen):
+            self.search()
+        # Rejected before any network I/O
+        self.assertEqual(self.requests_received(), before)
+
+        self.wait_until_half_open()
+        inject_faults(self.stub, failure_rate=0, latency=0.15)
+        probe = threading.Thread(target=self.search)
+        probe.start()
+        time.sleep(0.05)
+        self.assertEqual(self.state(), circuit.HALF_OPEN)
+        # Only PROBES calls at a time test the upstream
+        with self.assertRaises(circuit.CircuitOpen):
+            self.search()
+        probe.join()
+
+        self.assertEqual(self.state(), circuit.CLOSED)
+        self.assertEqual(self.search().status_code, 200)
+
+    def test_failed_probe_reopens(self):
+        self.open_circuit()
+        self.wait_until_half_open()
+
+        self.assertEqual(self.search().status_code, 503)
+        self.assertEqual(self.state(), circuit.OPEN)
+        with self.assertRaises(circuit.CircuitOpen):
+            self.search()
+
+    def test_stuck_probe_reopens(self):
+        self.open_circuit()
+        self.wait_until_half_open()
+        # A probe that never reports back
+        circuit.get_breaker('rapidapi').allow()
+        time.sleep(CIRCUIT_BREAKER['PROBE_TIMEOUT'])
+
+        with self.assertRaises(circuit.CircuitOpen):
+            self.search()
+        self.assertEqual(self.state(), circuit.OPEN)
+
+    def test_cancelled_probe_is_released(self):
+        self.open_circuit()
+        self.wait_until_half_open()
+        inject_faults(self.stub, failure_rate=0, latency=0.15)
+
+        async def cancel_probe():
+            probe = asyncio.ensure_future(
+                upstream.ahttp_get('rapidapi', settings.RAPIDAPI_JSEARCH_URL, params={'query': 'python'}),
+            )
+            await asyncio.sleep(0.05)
+            probe.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await probe
+
+        async_to_sync(cancel_probe)()
+        self.assertEqual(self.state(), circuit.HALF_OPEN)
+        # The next call may probe, and closes the circuit
+        self.assertEqual(self.search().status_code, 200)
+        self.assertEqual(self.state(), circuit.CLOSED)
+
+    def test_stream_outcome_is_recorded_when_it_ends(self):
+        inject_faults(self.stub, gemini_failure_rate=1)
+        for _ in range(CIRCUIT_BREAKER['MIN_CALLS']):
+            with self.assertRaises(Exception):
+                upstream.generate_content('gemini-1.5-flash', 'How do I become a data engineer?', stream=True)
+        self.assertEqual(self.state('gemini'), circuit.OPEN)
+
+        self.wait_until_half_open()
+        inject_faults(self.stub, gemini_failure_rate=0)
+        chunks = upstream.generate_content('gemini-1.5-flash', 'How do I become a data engineer?', stream=True)
+        self.assertEqual(self.state('gemini'), circuit.HALF_OPEN)
+        self.assertTrue(list(chunks))
+        self.assertEqual(self.state('gemini'), circuit.CLOSED)
+
+    def test_unread_stream_releases_probe(self):
+        inject_faults(self.stub, gemini_failure_rate=1)
+        for _ in range(CIRCUIT_BREAKER['MIN_CALLS']):
+            with self.assertRaises(Exception):
+                upstream.generate_content('gemini-1.5-flash', 'How do I become a data engineer?', stream=True)
+        self.wait_until_half_open()
+        inject_faults(self.stub, gemini_failure_rate=0)
+
+        chunks = upstream.generate_content('gemini-1.5-flash', 'How do I become a data engineer?', stream=True)
+        del chunks
+        # The abandoned probe no longer blocks the next one
+        chunks = upstream.generate_content('gemini-1.5-flash', 'How do I become a data engineer?', stream=True)
+        next(chunks)
+        chunks.close()
+        self.assertEqual(self.state('gemini'), circuit.HALF_OPEN)
+        self.assertTrue(list(upstream.generate_content('gemini-1.5-flash', 'What does a data engineer do?', stream=True)))
+        self.assertEqual(self.state('gemini'), circuit.CLOSED)
+
+    def test_health(self):
+        response = self.client.get('/api/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'ok')
+        self.assertEqual({name: breaker['state'] for name, breaker in response.json()['upstreams'].items()},
+                         {'gemini': circuit.CLOSED, 'rapidapi': circuit.CLOSED})
+
+        self.open_circuit()
+        response = self.client.get('/api/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'degraded')
+        rapidapi = response.json()['upstreams']['rapidapi']
+        self.assertEqual(rapidapi['state'], circuit.OPEN)
+        self.assertGreater(rapidapi['retry_in'], 0)
+        self.assertEqual(rapidapi['failure_rate'], 0.0)
+
+
+# ================= Response cache =================
+class NormalizeTextTests(SimpleTestCase):
+
+    def test_synonyms_apply_to_whole_words(self):
+        self.assertEqual(normalize_text('  CS '), 'computer science')
+        self.assertEqual(normalize_text('cs jobs'), 'computer science jobs')
+        self.assertEqual(normalize_text('JNU, New  Delhi.'), 'jnu, delhi')
+        self.assertEqual(normalize_text('Computer Science and Engineering'), 'computer science')
+        # Not inside other words
+        self.assertEqual(normalize_text('itinerary planning'), 'itinerary planning')
+
+    def test_equivalent_searches_share_a_key(self):
+        self.assertEqual(make_key('colleges', 'CSE', 'Bengaluru'), make_key('colleges', 'computer science', 'bangalore'))
+
+
+class ResponseCacheTests(SimpleTestCase):
+
+    def counting(self, *values):
+        calls = []
+
+        def compute():
+            calls.append(None)
+            return values[min(len(calls), len(values)) - 1]
+        return compute, calls
+
+    def test_miss_then_hit(self):
+        cache = ResponseCache('test', ttl=60)
+        compute, calls = self.counting(['IIT Delhi'])
+
+        self.assertEqual(cache.get_or_compute(('cs', 'delhi'), compute), ['IIT Delhi'])
+        self.assertEqual(cache.get_or_compute(('CS', 'Delhi '), compute), ['IIT Delhi'])
+        self.assertEqual(len(calls), 1)
+
+    def test_none_is_not_cached(self):
+        cache = ResponseCache('test', ttl=60)
+        compute, calls = self.counting(None, ['IIT Delhi'])
+
+        self.assertIsNone(cache.get_or_compute(('cs',), compute))
+        self.assertEqual(cache.get_or_compute(('cs',), compute), ['IIT Delhi'])
+        self.assertEqual(len(calls), 2)
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache('test', ttl=0.05)
+        compute, calls = self.counting('old', 'new')
+
+        self.assertEqual(cache.get_or_compute(('cs',), compute), 'old')
+        time.sleep(0.1)
+        self.assertEqual(cache.get_or_compute(('cs',), compute), 'new')
+        self.assertEqual(len(calls), 2)
+
+    def test_lru_eviction(self):
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+        self.assertEqual(len(lru), 2)
+
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        cache = ResponseCache('test', ttl=0.05, stale_ttl=60)
+        cache.get_or_compute(('cs',), lambda: 'old')
+        time.sleep(0.1)
+
+        started, release = threading.Event(), threading.Event()
+        refreshes = []
+
+        def refresh():
+            refreshes.append(None)
+            started.set()
+            release.wait(5)
+            return 'new'
+
+        self.assertEqual(cache.get_or_compute(('cs',), refresh), 'old')
+        self.assertTrue(started.wait(5))
+        # A concurrent reader gets the stale value and starts no second refresh
+        self.assertEqual(cache.get_or_compute(('cs',), refresh), 'old')
+        release.set()
+        for _ in range(100):
+            if not cache._refreshing:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(cache.get_or_compute(('cs',), refresh), 'new')
+        self.assertEqual(len(refreshes), 1)
+
+
+# ================= Chat streaming =================
+class ChatStreamTests(StubUpstreamTestCase):
+    overrides = {'GEMINI_API_KEY': 'test', 'SEMANTIC_CACHE': {'ENABLED': False}}
+    question = 'How do I become a data engineer?'
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='streamer')
+
+    def test_completed_stream_is_saved(self):
+        completed = STREAMS.value(outcome='completed')
+        events = list(stream_chat_events(self.user, self.question))
+
+        self.assertTrue(events[-1].startswith('event: done'))
+        chat = Chat.objects.get(user=self.user)
+        self.assertEqual(chat.response, ADVICE.strip())
+        self.assertEqual(STREAMS.value(outcome='completed'), completed + 1)
+
+    def test_disconnect_saves_partial_answer(self):
+        disconnected = STREAMS.value(outcome='disconnected')
+        events = stream_chat_events(self.user, self.question)
+        next(events)
+        # The WSGI server closes the response when the client goes away
+        events.close()
+
+        chat = Chat.objects.get(user=self.user)
+        self.assertTrue(chat.response)
+        self.assertTrue(ADVICE.startswith(chat.response))
+        self.assertLess(len(chat.response), len(ADVICE.strip()))
+        self.assertEqual(STREAMS.value(outcome='disconnected'), disconnected + 1)
+        self.assertEqual(circuit.snapshot()['gemini']['state'], circuit.CLOSED)
+
+    def test_async_disconnect_saves_partial_answer(self):
+        disconnected = STREAMS.value(outcome='disconnected')
+
+        async def disconnect():
+            events = astream_chat_events(self.user, self.question)
+            await anext(events)
+            await events.aclose()
+
+        async_to_sync(disconnect)()
+
+        # Whatever the first event carried is what gets kept
+        self.assertTrue(Chat.objects.get(user=self.user).response)
+        self.assertEqual(STREAMS.value(outcome='disconnected'), disconnected + 1)
+
+
+# ================= Chat history pagination =================
+class ChatHistoryTestCase(TestCase):
+
+    def setUp(self):
+        authentication.user_cache.clear()
+        self.user = User.objects.create(username='historian')
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def make_chats(self, count, created_at=None):
+        chats = [Chat.objects.create(user=self.user, message=f'question {i}', response=f'answer {i}')
+                 for i in range(count)]
+        if created_at is not None:
+            Chat.objects.filter(pk__in=[chat.pk for chat in chats]).update(created_at=created_at)
+        return chats
+
+    def history(self, **params):
+        return self.client.get('/api/chat/history', params, headers=self.headers)
+
+    def walk(self, page_size):
+        ids, params = [], {'page_size': page_size}
+        while True:
+            body = self.history(**params).json()
+            self.assertLessEqual(len(body['results']), page_size)
+            ids += [chat['id'] for chat in body['results']]
+            if body['next'] is None:
+                return ids
+            params['cursor'] = parse_qs(urlparse(body['next']).query)['cursor'][0]
+
+
+class ChatHistoryPaginationTests(ChatHistoryTestCase):
+
+    def test_cursor_round_trip(self):
+        chat = self.make_chats(1)[0]
+        paginator = ChatCursorPagination()
+        request = Request(RequestFactory().get('/', {'cursor': paginator.encode_cursor(chat)}))
+        self.assertEqual(paginator.decode_cursor(request), (chat.created_at, chat.pk))
+
+    def test_pages_walk_newest_first(self):
+        chats = self.make_chats(5)
+        self.assertEqual(self.walk(2), [chat.pk for chat in reversed(chats)])
+
+    def test_equal_timestamps_break_ties_on_id(self):
+        chats = self.make_chats(5, created_at=timezone.now())
+        # Pages split inside the run of equal timestamps without skipping or repeating rows
+        self.assertEqual(self.walk(2), [chat.pk for chat in reversed(chats)])
+
+    def test_full_last_page_has_no_next(self):
+        self.make_chats(2)
+        body = self.history(page_size=2).json()
+        self.assertEqual(len(body['results']), 2)
+        self.assertIsNone(body['next'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not base64!', base64.urlsafe_b64encode(b'yesterday|1').decode(),
+                       base64.urlsafe_b64encode(b'\xff\xfe').decode()):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.history(cursor=cursor).status_code, 404)
+
+
+# ================= Single flight =================
+class SingleFlightTests(SimpleTestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight('test')
+        self.calls = 0
+
+    async def call(self, release, result='jobs'):
+        self.calls += 1
+        await release.wait()
+        return result
+
+    async def test_callers_share_one_call(self):
+        release = asyncio.Event()
+        callers = [asyncio.create_task(self.flight.ado('python', lambda: self.call(release))) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        self.assertEqual(await asyncio.gather(*callers), ['jobs'] * 3)
+        self.assertEqual(self.calls, 1)
+
+    async def test_cancelled_leader_only_detaches(self):
+        release = asyncio.Event()
+        leader = asyncio.create_task(self.flight.ado('python', lambda: self.call(release)))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(self.flight.ado('python', lambda: self.call(release))) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        release.set()
+        self.assertEqual(await asyncio.gather(*waiters), ['jobs'] * 2)
+        self.assertEqual(self.calls, 1)
+
+    async def test_call_is_cancelled_when_every_caller_is(self):
+        release = asyncio.Event()
+        callers = [asyncio.create_task(self.flight.ado('python', lambda: self.call(release))) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+
+        # A later caller is not handed the cancelled call
+        release.set()
+        self.assertEqual(await self.flight.ado('python', lambda: self.call(release, 'fresh')), 'fresh')
+        self.assertEqual(self.calls, 2)
+
+
+# ================= LLM task queue =================
+@override_settings(LLM_QUEUE={'BROKER': 'db', 'MAX_DEPTH': 3, 'MAX_ANONYMOUS_DEPTH': 1,
+                              'LEASE_SECONDS': 60, 'MAX_ATTEMPTS': 2})
+class TaskQueueTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='queued')
+
+    def enqueue(self, user=None):
+        return tasks.enqueue_college_search(user, 'Computer Science', 'India')
+
+    def age(self, task, **fields):
+        # Pretend the task was queued, or claimed, more than a lease ago
+        long_ago = timezone.now() - timedelta(seconds=120)
+        LLMTask.objects.filter(pk=task.pk).update(created_at=long_ago, **fields)
+
+    def test_enqueue_sets_priority(self):
+        self.assertEqual(self.enqueue(self.user).priority, LLMTask.PRIORITY_USER)
+        self.assertEqual(self.enqueue().priority, LLMTask.PRIORITY_ANONYMOUS)
+        self.assertEqual(tasks.next_queued_id(), LLMTask.objects.get(user=self.user).pk)
+
+    def test_queue_full(self):
+        self.enqueue()
+        with self.assertRaises(tasks.QueueFull):
+            self.enqueue()
+        # Signed-in users still have room up to MAX_DEPTH
+        self.enqueue(self.user)
+        self.enqueue(self.user)
+        with self.assertRaises(tasks.QueueFull):
+            self.enqueue(self.user)
+        self.assertEqual(LLMTask.objects.count(), 3)
+
+    def test_claim_is_exclusive(self):
+        task = self.enqueue(self.user)
+        self.assertEqual(tasks.claim(task.pk).attempts, 1)
+        self.assertIsNone(tasks.claim(task.pk))
+
+    def test_expired_lease_is_requeued_then_failed(self):
+        task = self.enqueue(self.user)
+        tasks.claim(task.pk)
+        self.assertEqual(tasks.reap_expired(), 0)
+
+        self.age(task, started_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(tasks.reap_expired(), 1)
+        self.assertEqual(LLMTask.objects.get(pk=task.pk).status, LLMTask.STATUS_QUEUED)
+
+        tasks.claim(task.pk)
+        self.age(task, started_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(tasks.reap_expired(), 0)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (LLMTask.STATUS_FAILED, 2))
+
+    def test_pool_adopts_only_orphaned_tasks(self):
+        fresh, orphaned = self.enqueue(self.user), self.enqueue(self.user)
+        self.age(orphaned)
+
+        pool = tasks.WorkerPool(0)
+        pool.recover()
+        pool.recover()
+        # Another process's fresh task is left to it, and the orphan is queued once
+        self.assertEqual(pool.pending, {orphaned.pk})
+        self.assertEqual(pool.queue.qsize(), 1)
+        self.assertNotIn(fresh.pk, pool.pending)
+
+    async def test_async_poll_waits_without_a_worker(self):
+        task = await sync_to_async(self.enqueue)()
+        start = time.monotonic()
+        response = await self.async_client.get(f'/api/async/tasks/{task.pk}', {'wait': 0.3})
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+        self.assertEqual(response.json()['status'], LLMTask.STATUS_QUEUED)
+
+
+# ================= Semantic cache =================
+@override_settings(SEMANTIC_CACHE={'ENABLED': True, 'THRESHOLD': 0.85, 'PATH': None})
+class SemanticCacheTests(TestCase):
+
+    def setUp(self):
+        # A fresh index, without the background catch-up get_index() would start
+        semantic_cache._index = semantic_cache.SemanticIndex(1024, 100)
+        self.addCleanup(setattr, semantic_cache, '_index', None)
+        semantic_cache.remember('How do I write a good resume?', 'RESUME')
+
+    def test_paraphrase_hits(self):
+        for question in ('how to write resumes', 'Write a good resume: how?'):
+            with self.subTest(question=question):
+                self.assertEqual(semantic_cache.lookup(question), 'RESUME')
+
+    def test_unrelated_questions_miss(self):
+        for question in ('How do I write a good cover letter?', 'best colleges for physics',
+                         'How do I prepare for a data science interview?', 'resume'):
+            with self.subTest(question=question):
+                self.assertIsNone(semantic_cache.lookup(question))
+
+    def test_same_question_keeps_one_entry(self):
+        semantic_cache.remember('How do I write a good resume?', 'NEWER RESUME')
+        self.assertEqual(len(semantic_cache.get_index()), 1)
+        self.assertEqual(semantic_cache.lookup('how to write resumes'), 'NEWER RESUME')
+
+    def test_catch_up_stops_at_live_chats(self):
+        user = User.objects.create(username='cached')
+        older = Chat.objects.create(user=user, message='What does a data engineer do?', response='DATA')
+        Chat.objects.create(user=user, message='Which skills do UX designers need?', response='UX')
+
+        index = semantic_cache.SemanticIndex(1024, 100)
+        semantic_cache.catch_up(index, until=older.pk)
+        # The newer chat was answered after the index existed, so remember() already has it
+        self.assertEqual(index.messages, ['What does a data engineer do?'])
+        self.assertEqual(index.last_chat_id, older.pk)
+
+
+# ================= Intent matching =================
+class IntentMatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        self.matcher = IntentMatcher([
+            {'name': 'resume', 'keywords': {'resume': 1.5, 'curriculum vitae': 1.5}, 'response': 'RESUME'},
+            {'name': 'interview', 'keywords': {'interview': 1, 'questions': 0.5}, 'response': 'INTERVIEW'},
+            {'name': 'skills', 'keywords': {'it': 1, 'skill': 1, 'skills': 1}, 'response': 'SKILLS'},
+            {'name': 'greeting', 'keywords': {'hi': 0.5, 'good morning': 0.5}, 'response': 'HELLO'},
+        ], default='DEFAULT')
+
+    def test_keywords_match_whole_words(self):
+        self.assertIsNone(self.matcher.match('this is fine'))
+        self.assertIsNone(self.matcher.match('historic resumed interviewing'))
+        self.assertEqual(self.matcher.match('Hi!'), 'greeting')
+        self.assertEqual(self.matcher.match('is it worth it?'), 'skills')
+
+    def test_shipped_intents_ignore_keywords_inside_words(self):
+        matcher = IntentMatcher.from_file(settings.CHATBOT_INTENTS_FILE)
+        self.assertIsNone(matcher.match('this is it'))
+        self.assertEqual(matcher.respond('this is it'), matcher.default)
+        self.assertEqual(matcher.match('hi there'), 'greeting')
+
+    def test_multi_word_keywords_allow_any_spacing(self):
+        self.assertEqual(self.matcher.match('my CURRICULUM   vitae'), 'resume')
+        self.assertEqual(self.matcher.match('good\nmorning'), 'greeting')
+
+    def test_weights_and_ties(self):
+        # resume (1.5) outweighs interview + questions (1.5) only by coming first
+        self.assertEqual(self.matcher.match('resume interview questions'), 'resume')
+        self.assertEqual(self.matcher.match('interview questions, hi'), 'interview')
+        # A keyword repeated counts once
+        self.assertEqual(self.matcher.match('skill skill skill resume'), 'resume')
+
+    def test_default_response(self):
+        self.assertEqual(self.matcher.respond('tell me a joke'), 'DEFAULT')
+        self.assertEqual(self.matcher.respond('resume help'), 'RESUME')
+
+
+# ================= Job index =================
+class JobIndexTests(StubUpstreamTestCase):
+    overrides = {'JOB_INDEX': {'ENABLED': True, 'FRESHNESS': 60, 'MIN_RESULTS': 5, 'MAX_RESULTS': 10}}
+
+    def setUp(self):
+        super().setUp()
+        self.received = self.requests_received()
+
+    def fetched(self):
+        return self.requests_received() - self.received
+
+    def find(self, job_title='Python Developer', location='India'):
+        return job_index.search(job_title, location, fetch_jobs)
+
+    def job_ids(self, jobs):
+        return [job['job_id'] for job in jobs]
+
+    def expire(self):
+        long_ago = timezone.now() - timedelta(seconds=120)
+        Job.objects.update(fetched_at=long_ago)
+        JobQuery.objects.update(fetched_at=long_ago)
+
+    def test_live_search_is_ingested(self):
+        jobs, source = self.find()
+        self.assertEqual(source, 'live')
+        self.assertEqual(len(jobs), 10)
+        self.assertEqual(sorted(Job.objects.values_list('job_id', flat=True)), sorted(self.job_ids(jobs)))
+        self.assertEqual(JobQuery.objects.get().job_ids, self.job_ids(jobs))
+        self.assertEqual(Job.objects.first().locations, 'india')
+
+    def test_repeat_search_is_answered_from_the_index(self):
+        live, _ = self.find()
+        jobs, source = self.find(' python developer ', 'INDIA')
+        self.assertEqual(source, 'index')
+        # Upstream order is kept
+        self.assertEqual(self.job_ids(jobs), self.job_ids(live))
+        self.assertEqual(self.fetched(), 1)
+
+    def test_full_text_matches_answer_new_searches(self):
+        self.find()
+        jobs, source = self.find('python', 'India')
+        self.assertEqual(source, 'index')
+        self.assertEqual(len(jobs), 10)
+        self.assertEqual(self.fetched(), 1)
+
+        # Terms must match: another title or location goes upstream
+        self.assertEqual(self.find('java', 'India')[1], 'live')
+        self.assertEqual(self.find('python', 'Germany')[1], 'live')
+        self.assertEqual(self.fetched(), 3)
+
+    def test_too_few_full_text_matches_go_upstream(self):
+        self.find()
+        with self.settings(JOB_INDEX={'ENABLED': True, 'FRESHNESS': 60, 'MIN_RESULTS': 11}):
+            self.assertEqual(self.find('python', 'India')[1], 'live')
+        self.assertEqual(self.fetched(), 2)
+
+    def test_stale_results_when_upstream_fails(self):
+        live, _ = self.find()
+        self.expire()
+        inject_faults(self.stub, failure_rate=1)
+
+        jobs, source = self.find()
+        self.assertEqual(source, 'stale')
+        self.assertEqual(self.job_ids(jobs), self.job_ids(live))
+        # Nothing stored to fall back on: the failure surfaces
+        with self.assertRaises(requests.RequestException):
+            self.find('Data Engineer', 'India')
+
+    def test_expired_query_is_refreshed(self):
+        self.find()
+        self.expire()
+        self.assertEqual(self.find()[1], 'live')
+        self.assertEqual(self.fetched(), 2)
+
+
+# ================= Conversation memory =================
+@override_settings(GEMINI_API_KEY='', CONVERSATIONS={'HISTORY_TOKENS': 100, 'SUMMARY_TOKENS': 50, 'MAX_TURNS': 12})
+class ConversationContextTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='talker')
+        self.conversation = Conversation.objects.create(user=self.user)
+
+    def add_turns(self, count, response='x' * 80):
+        # Each default turn costs about 23 estimated tokens, so four fit the history budget
+        return [Chat.objects.create(user=self.user, conversation=self.conversation,
+                                    message=f'question {i}', response=response) for i in range(count)]
+
+    def test_clip(self):
+        text = 'abcdefghij' * 10
+        self.assertEqual(conversations.clip(text, 100), text)
+        self.assertEqual(conversations.clip(text, 5), text[:17] + '...')
+        self.assertEqual(conversations.clip(text, 5, keep='tail'), '...' + text[-17:])
+
+    def test_recent_turns_fill_the_budget(self):
+        self.add_turns(6)
+        context = conversations.build_context(self.conversation)
+        self.assertEqual([message for message, _ in context.turns],
+                         ['question 2', 'question 3', 'question 4', 'question 5'])
+        self.assertLessEqual(context.tokens, 100)
+        self.assertTrue(context.overflow)
+
+    def test_oversized_newest_turn_is_clipped(self):
+        self.add_turns(1, response='y' * 2000)
+        context = conversations.build_context(self.conversation)
+        self.assertEqual(len(context.turns), 1)
+        self.assertTrue(context.turns[0][1].endswith('...'))
+        self.assertLessEqual(context.tokens, 100)
+
+    def test_short_conversation_needs_no_fold(self):
+        self.add_turns(2)
+        self.assertFalse(conversations.build_context(self.conversation).overflow)
+        self.assertFalse(conversations.fold(self.conversation.pk))
+
+    def test_fold_moves_older_turns_into_the_summary(self):
+        chats = self.add_turns(6)
+        self.assertTrue(conversations.fold(self.conversation.pk))
+
+        self.conversation.refresh_from_db()
+        # Half the history budget stays verbatim: the two newest turns
+        self.assertEqual(self.conversation.summarized_through, chats[3].pk)
+        self.assertIn('question 0; question 1; question 2; question 3', self.conversation.summary)
+        context = conversations.build_context(self.conversation)
+        self.assertEqual(context.summary, self.conversation.summary)
+        self.assertEqual([message for message, _ in context.turns], ['question 4', 'question 5'])
+        self.assertFalse(context.overflow)
+
+    def test_summary_is_capped(self):
+        self.conversation.summary = 'earlier ' * 100
+        self.conversation.save()
+        self.add_turns(6)
+        conversations.fold(self.conversation.pk)
+
+        self.conversation.refresh_from_db()
+        self.assertLessEqual(estimate_tokens(self.conversation.summary), 50)
+        # The newest part of the summary is kept
+        self.assertTrue(self.conversation.summary.endswith('question 3.'))
+
+
+# ================= College parsing =================
+def college_json(name, **fields):
+    return json.dumps({'name': name, 'location': 'Pune, India', **fields})
+
+
+class CollegeParserTests(SimpleTestCase):
+
+    def parse(self, text):
+        parser = CollegeStreamParser()
+        colleges = parser.feed(text)
+        return [college['name'] for college in colleges], parser.finish()
+
+    def test_plain_array(self):
+        text = f"[{college_json('Alpha')}, {college_json('Beta')}]"
+        self.assertEqual(self.parse(text), (['Alpha', 'Beta'], 'ok'))
+
+    def test_fenced_and_prose_wrapped_output(self):
+        # Braces and quotes inside strings do not end the object
+        beta = college_json('Beta', description='Known for {robotics} and "AI"')
+        text = f"Here are some colleges to consider:\n```json\n[{college_json('Alpha')},\n{beta}]\n```\nGood luck!"
+        self.assertEqual(self.parse(text), (['Alpha', 'Beta'], 'ok'))
+
+    def test_wrapped_in_an_object(self):
+        text = json.dumps({'colleges': [json.loads(college_json('Alpha')), json.loads(college_json('Beta'))]})
+        self.assertEqual(self.parse(text), (['Alpha', 'Beta'], 'ok'))
+
+    def test_truncated_output_keeps_complete_objects(self):
+        text = f"[{college_json('Alpha')}, {college_json('Beta')[:20]}"
+        self.assertEqual(self.parse(text), (['Alpha'], 'salvaged'))
+
+    def test_invalid_objects_are_skipped(self):
+        text = f"[{college_json('Alpha')}, {{\"location\": \"Pune\"}}, {{not json}}]"
+        self.assertEqual(self.parse(text), (['Alpha'], 'salvaged'))
+        self.assertEqual(self.parse('I cannot help with that.'), ([], 'failed'))
+        self.assertIsNone(parse_colleges('[]'))
+
+    def test_chunks_split_anywhere(self):
+        alpha = college_json('Alpha', description='a \\ b {c}')
+        text = f"```json\n[{alpha}, {college_json('Beta')}]\n```"
+        for size in (1, 2, 7):
+            with self.subTest(size=size):
+                parser = CollegeStreamParser()
+                colleges = [college for i in range(0, len(text), size) for college in parser.feed(text[i:i + size])]
+                self.assertEqual([college['name'] for college in colleges], ['Alpha', 'Beta'])
+                self.assertEqual(colleges[0]['description'], 'a \\ b {c}')
+                self.assertEqual(parser.finish(), 'ok')
+
+    def test_schema_coercion(self):
+        college = validate_college({
+            'name': '  Alpha  ', 'rating': '4.5/5', 'established': 'Founded in 1961', 'programs': 'CS, EE, ',
+            'student_count': 12000, 'website': None, 'ranking': {'nirf': 3}, 'motto': 'unknown fields are dropped',
+        })
+        self.assertEqual(college, {
+            'name': 'Alpha', 'location': None, 'type': None, 'ranking': None, 'programs': ['CS', 'EE'],
+            'description': None, 'website': None, 'rating': 4.5, 'student_count': '12000', 'established': 1961,
+            'fees': None,
+        })
+        self.assertIsNone(validate_college({'name': '  '}))
+        self.assertIsNone(validate_college(['Alpha']))
+        self.assertIsNone(as_rating(7))
+        self.assertIsNone(as_rating(True))
+        self.assertIsNone(as_year('3000'))
+
+
+# ================= Chat archive =================
+@override_settings(CHAT_ARCHIVE={'AFTER_DAYS': 180, 'SEGMENT_SIZE': 2, 'COMPRESSION_LEVEL': 6})
+class ChatArchiveTests(ChatHistoryTestCase):
+
+    def make_old_chats(self, count, conversation=None):
+        chats = self.make_chats(count)
+        start = timezone.now() - timedelta(days=200)
+        for i, chat in enumerate(chats):
+            chat.created_at, chat.conversation = start + timedelta(minutes=i), conversation
+            Chat.objects.filter(pk=chat.pk).update(created_at=chat.created_at, conversation=conversation)
+        return chats
+
+    def test_segment_round_trip(self):
+        conversation = Conversation.objects.create(user=self.user)
+        chats = self.make_old_chats(2, conversation)
+        chats[1].response = 'Résumé tips: 📄\nline two'
+        segment = ChatArchiveSegment(user=self.user, codec='zlib', data=chat_archive.encode_segment(chats))
+
+        decoded = chat_archive.decode_segment(segment)
+        self.assertEqual(
+            [(chat.pk, chat.user_id, chat.conversation_id, chat.message, chat.response, chat.created_at)
+             for chat in decoded],
+            [(chat.pk, self.user.pk, conversation.pk, chat.message, chat.response, chat.created_at) for chat in chats],
+        )
+        segment.codec = 'zstd'
+        with self.assertRaises(ValueError):
+            chat_archive.decode_segment(segment)
+
+    def test_archive_moves_old_chats(self):
+        self.make_old_chats(5)
+        recent = self.make_chats(2)
+
+        self.assertEqual(chat_archive.archive(dry_run=True), (1, 5))
+        self.assertEqual(chat_archive.archive(), (1, 5))
+        self.assertEqual(list(Chat.objects.order_by('id')), recent)
+        summary = ChatArchive.objects.get(user=self.user)
+        self.assertEqual((summary.chats, summary.segments), (5, 3))
+        self.assertEqual(chat_archive.archive(), (0, 0))
+
+    def test_history_pages_continue_into_the_archive(self):
+        chats = self.make_old_chats(5) + self.make_chats(2)
+        chat_archive.archive()
+
+        newest_first = [chat.pk for chat in reversed(chats)]
+        # Page boundaries on, and inside, the hot/archive boundary and segments
+        for page_size in (1, 2, 3, 7):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size), newest_first)
+
+    def test_archived_chats_of_deleted_conversations_are_hidden(self):
+        conversation = Conversation.objects.create(user=self.user)
+        kept = self.make_old_chats(1)
+        self.make_old_chats(2, conversation)
+        chat_archive.archive()
+        conversation.delete()
+
+        self.assertEqual([chat.pk for chat in chat_archive.archived_chats(self.user.pk)], [kept[0].pk])
+
+
+# ================= Response payloads =================
+class PayloadTests(StubUpstreamTestCase):
+    origin = 'http://localhost:5173'
+
+    def get_search(self, **headers):
+        return self.client.get('/api/jobs/search', {'job_title': 'python', 'location': 'India'}, headers=headers)
+
+    def post_search(self, **headers):
+        return self.client.post('/api/jobs/search', {'job_title': 'python', 'location': 'India'},
+                                content_type='application/json', headers=headers)
+
+    def test_get_search_revalidates_with_304(self):
+        response = self.get_search()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertRegex(etag, r'^"[0-9a-f]{32}"$')
+        self.assertIn('no-cache', response['Cache-Control'])
+        # The POST form renders the same body, so it shares the validator
+        self.assertEqual(self.post_search()['ETag'], etag)
+
+        revalidated = self.get_search(If_None_Match=f'"stale", {etag}', Origin=self.origin)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+        self.assertEqual(revalidated['ETag'], etag)
+        self.assertEqual(revalidated['Access-Control-Allow-Origin'], self.origin)
+        self.assertFalse(revalidated.has_header('Content-Type'))
+
+        self.assertEqual(self.get_search(If_None_Match='"stale"').status_code, 200)
+
+    async def test_async_get_search_revalidates_with_304(self):
+        params = {'job_title': 'python', 'location': 'India'}
+        response = await self.async_client.get('/api/async/jobs/search', params)
+        self.assertEqual(response.json()['count'], 10)
+        revalidated = await self.async_client.get('/api/async/jobs/search', params,
+                                                  headers={'If-None-Match': response['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_post_search_match_is_412(self):
+        etag = self.post_search()['ETag']
+        response = self.post_search(If_None_Match=etag, Origin=self.origin)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Access-Control-Allow-Origin'], self.origin)
+
+    def test_gzip(self):
+        identity = self.get_search()
+        response = self.get_search(Accept_Encoding='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+        self.assertLess(int(response['Content-Length']), len(identity.content))
+        # Weak: gzip's random padding makes every compressed body different
+        self.assertEqual(response['ETag'], f'W/{identity["ETag"][:-1]}-gzip"')
+
+        # Either validator revalidates either representation
+        self.assertEqual(self.get_search(If_None_Match=response['ETag']).status_code, 304)
+        self.assertEqual(self.get_search(If_None_Match=identity['ETag'], Accept_Encoding='gzip').status_code, 304)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get('/api/jobs/search', {'job_title': 'python', 'fields': 'job_id'},
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertLess(len(response.content), 1024)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_encoding_negotiation(self):
+        self.assertIsNone(payloads.accepted_encoding('identity'))
+        self.assertIsNone(payloads.accepted_encoding('gzip;q=0'))
+        self.assertEqual(payloads.accepted_encoding('gzip;q=0.5, deflate'), 'gzip')
+        if payloads.brotli is None:
+            self.assertEqual(payloads.accepted_encoding('br, gzip;q=0.5'), 'gzip')
+        else:
+            self.assertEqual(payloads.accepted_encoding('gzip, br'), 'br')
+
+
+# ================= JSON rendering =================
+class RendererTests(TestCase):
+    data = {
+        'text': 'Résumé – 📄 \u2028',
+        'numbers': [1, 2.5, -0.0, 10 ** 20, None, True],
+        'created_at': datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+        'posted_at': datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=5, minutes=30))),
+        'day': date(2025, 1, 2),
+        'fee': Decimal('1.10'),
+        'id': uuid.UUID(int=5),
+        'nested': {'results': [{'name': 'Alpha'}]},
+        1: 'integer key',
+    }
+
+    def render(self, backend, data):
+        with self.settings(JSON_BACKEND=backend):
+            return ORJSONRenderer().render(data)
+
+    def test_orjson_and_stdlib_output_match(self):
+        rendered = self.render('orjson', self.data)
+        self.assertEqual(rendered, self.render('stdlib', self.data))
+        # Integers beyond 64 bits fall back to the stdlib encoder; U+2028 is escaped for JavaScript
+        self.assertIn(b'100000000000000000000', rendered)
+        self.assertIn(b'\\u2028', rendered)
+        self.assertIn(b'"created_at":"2025-01-02T03:04:05.678901Z"', rendered)
+
+    def test_serialized_chats_match(self):
+        user = User.objects.create(username='renderer')
+        Chat.objects.create(user=user, message='Résumé help', response='Start with your projects.')
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        authentication.user_cache.clear()
+        with self.settings(JSON_BACKEND='orjson'):
+            fast = self.client.get('/api/chat/history', headers=headers).content
+        with self.settings(JSON_BACKEND='stdlib'):
+            slow = self.client.get('/api/chat/history', headers=headers).content
+        self.assertEqual(fast, slow)
+        self.assertEqual(loads(fast)['results'][0]['message'], 'Résumé help')
+
+    def test_raw_json_is_spliced_in_verbatim(self):
+        data = {'count': 2, 'data': [RawJSON('{"job_id": "a"}'), {'job_id': 'b'}], 'first': RawJSON(b'{"job_id": "a"}')}
+        for backend in ('orjson', 'stdlib'):
+            with self.subTest(backend=backend):
+                rendered = self.render(backend, data)
+                self.assertEqual(
+                    rendered, b'{"count":2,"data":[{"job_id": "a"},{"job_id":"b"}],"first":{"job_id": "a"}}',
+                )
+                self.assertEqual(loads(rendered)['data'], [{'job_id': 'a'}, {'job_id': 'b'}])
+        # Without RawJSON values the output is plain encode()
+        self.assertEqual(dumps({'data': [1]}), b'{"data":[1]}')
@@ -0,0 +1,145 @@
+"""
+Token-bucket rate limiting.
+
+Buckets are configured per scope in settings.RATE_LIMITS. A scope is either a
+client-facing limit (enforced by TokenBucketThrottle subclasses, one bucket
+per client) or an upstream budget (enforced by careeradvisor.upstream, one
+bucket per upstream). Bucket state lives in-process ("local") or in a Django
+cache alias ("cache") so several workers share one budget.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+THROTTLED = metrics.counter('throttled_requests_total', 'Requests rejected by a token bucket', ['scope'])
+
+
+def scope_config(scope):
+    return getattr(settings, 'RATE_LIMITS', {}).get('SCOPES', {}).get(scope)
+
+
+def refill(tokens, updated, rate, burst, now):
+    return min(burst, tokens + (now - updated) * rate)
+
+
+class LocalBucketStore:
+    """
+    Per-process buckets guarded by a lock.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = refill(tokens, updated, rate, burst, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets shared through a Django cache. Read-modify-write is not atomic, so
+    concurrent workers may briefly overspend by a token or two; that is an
+    accepted trade-off for not needing a dedicated store.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, rate, burst):
+        cache = caches[self.alias]
+        now = time.time()
+        tokens, updated = cache.get(f'bucket:{key}', (burst, now))
+        tokens = refill(tokens, updated, rate, burst, now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Expire once the bucket would be full again anyway
+        cache.set(f'bucket:{key}', (tokens, now), timeout=math.ceil(burst / rate) + 1)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = getattr(settings, 'RATE_LIMITS', {})
+                if config.get('STORE', 'local') == 'cache':
+                    _store = CacheBucketStore(config.get('CACHE_ALIAS', 'default'))
+                else:
+                    _store = LocalBucketStore()
+    return _store
+
+
+def take_token(scope, ident=''):
+    """
+    Take one token from ``scope``'s bucket for ``ident``.
+    Returns (allowed, seconds_until_next_token). Unconfigured scopes are unlimited.
+    """
+    config = scope_config(scope)
+    if not config:
+        return True, 0
+    allowed, wait = get_store().take(f'{scope}:{ident}', config['RATE'], config['BURST'])
+    if not allowed:
+        THROTTLED.inc(scope=scope)
+    return allowed, wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle backed by a token bucket per authenticated user or client IP.
+    """
+    scope = None
+
+    def get_cache_key(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        allowed, self.wait_seconds = take_token(self.scope, self.get_cache_key(request))
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SearchRateThrottle(TokenBucketThrottle):
+    scope = 'search'
+
+
+class LoginRateThrottle(TokenBucketThrottle):
+    """
+    Login and registration attempts per client IP, so password guessing
+    cannot spend the hashing budget.
+    """
+    scope = 'login'
+
+    def get_cache_key(self, request):
+        return f'ip:{self.get_ident(request)}'
@@ -0,0 +1,199 @@
+"""
+Per-request stage timing and structured logging.
+
+TracingMiddleware opens a trace for every request. Code on the hot path
+wraps its phases in ``stage()``:
+
+    with tracing.stage('parse'):
+        data = json.loads(text)
+
+Stages are ``auth``, ``prompt``, ``upstream``, ``parse``, ``db`` and
+``serialize``; time spent in a repeated stage is summed. careeradvisor.upstream
+adds its call latency with ``record('upstream', seconds)``. Outside a request
+(worker threads, streamed bodies), ``stage()`` does nothing.
+
+Every request lands in the ``http_request_seconds`` histogram and every
+fallback answer in ``fallback_responses_total{kind,reason}``. Stage
+histograms and the JSON ``request`` log line are sampled
+(settings.TRACING['SAMPLE_RATE']) to keep overhead low at high QPS. Requests
+slower than SLOW_REQUEST_SECONDS are always logged.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.1,
+    'SLOW_REQUEST_SECONDS': 2.0,
+}
+
+REQUEST_SECONDS = metrics.histogram('http_request_seconds', 'Request latency by view', ['view', 'method', 'status'])
+STAGE_SECONDS = metrics.histogram('request_stage_seconds', 'Time spent per request stage (sampled)', ['view', 'stage'])
+FALLBACKS = metrics.counter('fallback_responses_total', 'Answers served from a fallback path', ['kind', 'reason'])
+
+logger = logging.getLogger(__name__)
+
+
+def config(name):
+    return getattr(settings, 'TRACING', {}).get(name, DEFAULTS[name])
+
+
+class Trace:
+    __slots__ = ('start', 'stages', 'tags')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.tags = {}
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_current = contextvars.ContextVar('careeradvisor_trace', default=None)
+
+
+@contextmanager
+def stage(name):
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start)
+
+
+def record(name, seconds):
+    """
+    Add an externally measured duration to the current request's stage.
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+def tag(key, value):
+    trace = _current.get()
+    if trace is not None:
+        trace.tags[key] = value
+
+
+def fallback(kind, reason):
+    """
+    Record that a ``kind`` answer (chat, colleges, ...) came from the fallback path.
+    """
+    FALLBACKS.inc(kind=kind, reason=reason)
+    tag('fallback', reason)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def finish(trace, request, response):
+    duration = time.perf_counter() - trace.start
+    view = view_name(request)
+    REQUEST_SECONDS.observe(duration, view=view, method=request.method, status=response.status_code)
+
+    sampled = random.random() < config('SAMPLE_RATE')
+    if sampled:
+        for name, seconds in trace.stages.items():
+            STAGE_SECONDS.observe(seconds, view=view, stage=name)
+    if sampled or duration >= config('SLOW_REQUEST_SECONDS'):
+        logger.info('request', extra={'fields': {
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'stages_ms': {name: round(seconds * 1000, 2) for name, seconds in trace.stages.items()},
+            **trace.tags,
+        }})
+
+
+class TracingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        trace = Trace()
+        token = _current.set(trace)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        finish(trace, request, response)
+        return response
+
+    async def __acall__(self, request):
+        trace = Trace()
+        token = _current.set(trace)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        finish(trace, request, response)
+        return response
+
+
+# ================= Logging =================
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line. Pass structured data with extra={'fields': {...}}.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class BackgroundStreamHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for a listener thread that formats and writes them, so
+    request threads never block on stdout.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.target = logging.StreamHandler(stream)
+        self.listener = logging.handlers.QueueListener(self.queue, self.target)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread
+        return record
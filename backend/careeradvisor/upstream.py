@@ -0,0 +1,407 @@
+"""
+Shared clients for the external APIs (Gemini and RapidAPI JSearch).
+
+Everything here is created lazily once per process and then reused:
+
+* a pooled, keep-alive ``requests.Session`` with connect/read timeouts and
+  bounded retries with jittered exponential backoff,
+* one ``httpx.AsyncClient`` per event loop with the same policy,
+* ``genai.configure`` plus one ``GenerativeModel`` per model name and
+  prompt template (see careeradvisor.prompts): the template's static system
+  part is the model's system_instruction, or cached content when it is
+  large enough for Gemini's context caching. settings.GEMINI_API_ENDPOINT
+  points the SDK's REST transport elsewhere, e.g. at benchmarks/stub_upstream.py.
+
+Every call runs under the upstream's circuit breaker (careeradvisor.circuit),
+which raises CircuitOpen without touching the network while the upstream is
+failing, then takes a token from the upstream's rate-limit bucket
+(settings.RATE_LIMITS) and is timed into the ``upstream_request_seconds``
+histogram, labelled by upstream, so pooling and retry behaviour is visible on
+/metrics. The same time is added to the request's ``upstream`` trace stage.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from datetime import timedelta
+
+import google.generativeai as genai
+import httpx
+import requests
+from django.conf import settings
+from google.api_core import exceptions as google_exceptions
+from google.api_core import retry as google_retry
+from google.api_core import retry_async as google_retry_async
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import circuit, metrics, prompts, tracing
+from .circuit import CircuitOpen  # noqa: F401
+from .throttling import take_token
+
+UPSTREAM_LATENCY = metrics.histogram(
+    'upstream_request_seconds', 'Latency of calls to external APIs', ['upstream', 'outcome'],
+)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 30,
+    'RETRIES': 2,
+    'BACKOFF_FACTOR': 0.3,
+    'BACKOFF_JITTER': 0.3,
+    'POOL_MAXSIZE': 32,
+}
+
+
+class UpstreamNotConfigured(RuntimeError):
+    pass
+
+
+class UpstreamThrottled(RuntimeError):
+    """
+    The upstream's shared request budget is exhausted; retry after ``wait`` seconds.
+    """
+
+    def __init__(self, upstream, wait):
+        super().__init__(f"{upstream} rate limit reached, retry in {wait:.1f}s")
+        self.upstream = upstream
+        self.wait = wait
+
+
+def counts_against_breaker(exc):
+    """
+    Whether a failed call says something about the upstream's health: client
+    errors and our own rate limit do not.
+    """
+    if isinstance(exc, (UpstreamThrottled, UpstreamNotConfigured)):
+        return False
+    if isinstance(exc, google_exceptions.ClientError):
+        return isinstance(exc, google_exceptions.TooManyRequests)
+    return True
+
+
+def acquire(upstream):
+    allowed, wait = take_token(upstream)
+    if not allowed:
+        raise UpstreamThrottled(upstream, wait)
+
+
+def config(name):
+    return getattr(settings, 'UPSTREAM', {}).get(name, DEFAULTS[name])
+
+
+def timeout():
+    return (config('CONNECT_TIMEOUT'), config('READ_TIMEOUT'))
+
+
+def backoff_delay(attempt):
+    """
+    Exponential backoff with additive jitter, matching urllib3's Retry formula.
+    """
+    return config('BACKOFF_FACTOR') * (2 ** attempt) + random.uniform(0, config('BACKOFF_JITTER'))
+
+
+# ================= HTTP (sync) =================
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=config('RETRIES'),
+                    backoff_factor=config('BACKOFF_FACTOR'),
+                    backoff_jitter=config('BACKOFF_JITTER'),
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=['GET'],
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_maxsize=config('POOL_MAXSIZE'), max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def http_get(upstream, url, **kwargs):
+    """
+    GET through the shared session; raises requests exceptions like requests.get.
+    """
+    with circuit.guard(upstream, counts_against_breaker) as call:
+        acquire(upstream)
+        kwargs.setdefault('timeout', timeout())
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = get_session().get(url, **kwargs)
+            outcome = 'ok' if response.ok else 'error'
+            call.failed = response.status_code in RETRY_STATUSES
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            UPSTREAM_LATENCY.observe(elapsed, upstream=upstream, outcome=outcome)
+            tracing.record('upstream', elapsed)
+
+
+# ================= HTTP (async) =================
+# httpx clients hold connections bound to the loop that opened them, so keep
+# one client per running event loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        connect, read = timeout()
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_keepalive_connections=config('POOL_MAXSIZE')),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def ahttp_get(upstream, url, **kwargs):
+    """
+    Async GET with the same retry policy as the sync session.
+    """
+    with circuit.guard(upstream, counts_against_breaker) as call:
+        acquire(upstream)
+        client = get_async_client()
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            for attempt in range(config('RETRIES') + 1):
+                last_attempt = attempt == config('RETRIES')
+                try:
+                    response = await client.get(url, **kwargs)
+                except httpx.TransportError:
+                    if last_attempt:
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUSES or last_attempt:
+                        outcome = 'ok' if response.is_success else 'error'
+                        call.failed = response.status_code in RETRY_STATUSES
+                        return response
+                await asyncio.sleep(backoff_delay(attempt))
+        finally:
+            elapsed = time.perf_counter() - start
+            UPSTREAM_LATENCY.observe(elapsed, upstream=upstream, outcome=outcome)
+            tracing.record('upstream', elapsed)
+
+
+# ================= Gemini =================
+_models = {}
+_models_lock = threading.Lock()
+_configured_key = None
+# Models built on cached content must be rebuilt before the cache expires
+_model_expiry = {}
+
+
+def build_gemini_model(name, template):
+    if template is None:
+        return genai.GenerativeModel(name), None
+    if template.context_cached:
+        ttl = prompts.config('CONTEXT_CACHE_TTL')
+        try:
+            cached = genai.caching.CachedContent.create(
+                model=name, display_name=template.key, system_instruction=template.system,
+                ttl=timedelta(seconds=ttl),
+            )
+            # Refresh a minute early so in-flight calls never hit an expired cache
+            model = genai.GenerativeModel.from_cached_content(cached, generation_config=template.generation_config)
+            return model, time.monotonic() + ttl - 60
+        except Exception as e:
+            logger.warning("Context caching unavailable for %s: %s", template.key, e)
+    model = genai.GenerativeModel(
+        name, system_instruction=template.system, generation_config=template.generation_config,
+    )
+    return model, None
+
+
+def get_gemini_model(name, template=None):
+    """
+    Configure the Gemini SDK once and reuse one model instance per name and prompt template.
+    """
+    global _configured_key
+    api_key = settings.GEMINI_API_KEY
+    if not api_key:
+        raise UpstreamNotConfigured("No GEMINI_API_KEY found in environment variables")
+
+    key = (name, template.key if template is not None else None)
+    model = _models.get(key)
+    expiry = _model_expiry.get(key)
+    if model is None or _configured_key != api_key or (expiry is not None and time.monotonic() >= expiry):
+        with _models_lock:
+            if _configured_key != api_key:
+                endpoint = getattr(settings, 'GEMINI_API_ENDPOINT', None)
+                if endpoint:
+                    genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': endpoint})
+                else:
+                    genai.configure(api_key=api_key)
+                _configured_key = api_key
+                _models.clear()
+                _model_expiry.clear()
+            model = _models.get(key)
+            expiry = _model_expiry.get(key)
+            if model is None or (expiry is not None and time.monotonic() >= expiry):
+                model, expiry = build_gemini_model(name, template)
+                _models[key] = model
+                _model_expiry[key] = expiry
+    return model
+
+
+def _transient(exc):
+    return isinstance(exc, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.InternalServerError,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+    ))
+
+
+def gemini_request_options(retry=True, is_async=False):
+    # None turns off the client's default retry, which would otherwise retry for minutes
+    options = {'timeout': config('READ_TIMEOUT'), 'retry': None}
+    if retry:
+        retry_cls = google_retry_async.AsyncRetry if is_async else google_retry.Retry
+        # api_core retries jitter their exponential backoff internally
+        options['retry'] = retry_cls(
+            predicate=_transient,
+            initial=config('BACKOFF_FACTOR'),
+            multiplier=2,
+            maximum=config('BACKOFF_FACTOR') * (2 ** config('RETRIES')),
+            timeout=config('READ_TIMEOUT'),
+        )
+    return options
+
+
+class StreamOutcome:
+    """
+    A streamed Gemini answer that records its breaker outcome when the stream
+    ends. Its latency is the time to the first chunk, since a long answer is
+    not a slow upstream. Closing it early, or dropping it unread, only
+    releases the call, so an abandoned stream never holds a half-open probe.
+    """
+
+    def __init__(self, call, response):
+        self.call = call
+        self.chunks = iter(response)
+        self.first = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.call.succeed(self.first)
+            raise
+        except Exception as exc:
+            self.call.fail(exc)
+            raise
+        except BaseException:
+            self.call.release()
+            raise
+        if self.first is None:
+            self.first = time.perf_counter() - self.call.start
+        return chunk
+
+    def close(self):
+        self.call.release()
+
+    __del__ = close
+
+
+class AsyncStreamOutcome:
+    """
+    Async counterpart of StreamOutcome; cancellation releases the call.
+    """
+
+    def __init__(self, call, response):
+        self.call = call
+        self.chunks = response.__aiter__()
+        self.first = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = await self.chunks.__anext__()
+        except StopAsyncIteration:
+            self.call.succeed(self.first)
+            raise
+        except Exception as exc:
+            self.call.fail(exc)
+            raise
+        except BaseException:
+            self.call.release()
+            raise
+        if self.first is None:
+            self.first = time.perf_counter() - self.call.start
+        return chunk
+
+    def close(self):
+        self.call.release()
+
+    async def aclose(self):
+        self.close()
+
+    __del__ = close
+
+
+def generate_content(model_name, prompt, **kwargs):
+    stream = kwargs.get('stream', False)
+    kwargs.setdefault('request_options', gemini_request_options(retry=not stream))
+    with circuit.guard('gemini', counts_against_breaker) as call:
+        acquire('gemini')
+        start = time.perf_counter()
+        outcome = 'error'
+        template = getattr(prompt, 'template', None)
+        try:
+            response = get_gemini_model(model_name, template).generate_content(prompt, **kwargs)
+            outcome = 'ok'
+            if stream:
+                call.streaming = True
+                return StreamOutcome(call, response)
+            prompts.record_usage(template, response)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            UPSTREAM_LATENCY.observe(elapsed, upstream='gemini', outcome=outcome)
+            tracing.record('upstream', elapsed)
+
+
+async def agenerate_content(model_name, prompt, **kwargs):
+    stream = kwargs.get('stream', False)
+    kwargs.setdefault('request_options', gemini_request_options(retry=not stream, is_async=True))
+    with circuit.guard('gemini', counts_against_breaker) as call:
+        acquire('gemini')
+        start = time.perf_counter()
+        outcome = 'error'
+        template = getattr(prompt, 'template', None)
+        try:
+            response = await get_gemini_model(model_name, template).generate_content_async(prompt, **kwargs)
+            outcome = 'ok'
+            if stream:
+                call.streaming = True
+                return AsyncStreamOutcome(call, response)
+            prompts.record_usage(template, response)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            UPSTREAM_LATENCY.observe(elapsed, upstream='gemini', outcome=outcome)
+            tracing.record('upstream', elapsed)
@@ -1,12 +1,24 @@
 from django.urls import path
-from .views import Home, RegisterView, CustomLoginView, ChatbotView, ChatHistoryView, job_search, college_search
+from .views import Home, RegisterView, CustomLoginView, ChatbotView, ChatBatchView, ChatHistoryView, ConversationDetailView, ConversationListView, TaskDetailView, job_search, college_search, college_list, health
+from . import async_views
 
 urlpatterns=[
     path('', Home.as_view(),name='home'),
     path('register', RegisterView.as_view(), name='register'),
     path('login', CustomLoginView.as_view(), name='custom-login'),
     path('chat', ChatbotView.as_view(), name='chatbot'),
+    path('chat/batch', ChatBatchView.as_view(), name='chat-batch'),
     path('chat/history', ChatHistoryView.as_view(), name='chat-history'),
+    path('conversations', ConversationListView.as_view(), name='conversation-list'),
+    path('conversations/<int:pk>', ConversationDetailView.as_view(), name='conversation-detail'),
     path('jobs/search', job_search, name='job-search'),
-    path('colleges/search', college_search, name='college-search')
+    path('colleges/search', college_search, name='college-search'),
+    path('colleges', college_list, name='college-list'),
+    path('tasks/<uuid:pk>', TaskDetailView.as_view(), name='task-detail'),
+    path('health', health, name='health'),
+    # Non-blocking variants for ASGI deployments
+    path('async/chat', async_views.chatbot, name='chatbot-async'),
+    path('async/jobs/search', async_views.job_search, name='job-search-async'),
+    path('async/colleges/search', async_views.college_search, name='college-search-async'),
+    path('async/tasks/<uuid:pk>', async_views.task_detail, name='task-detail-async'),
 ]
\ No newline at end of file
@@ -1,23 +1,42 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status, generics
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.settings import api_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import UserSerializer, ChatSerializer
+from .serializers import UserSerializer, ChatSerializer, ChatListSerializer, ConversationSerializer, LLMTaskSerializer
+from .authentication import JWTAuthentication, TokenUserAuthentication
+from .pagination import ChatCursorPagination
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.db.models.functions import Length, Substr
 import requests
-import google.generativeai as genai
-import os
-from .models import Chat
+import logging
+import math
+from .models import Chat, Conversation, LLMTask
+from . import (
+    chat_archive, chat_batch, circuit, college_catalog, college_parser, conversations, hashers, intents, job_index, job_pages, metrics, payloads, prompts,
+    renderers, semantic_cache, tasks, tracing, upstream,
+)
+from .cache import build_cache, make_key, normalize_text
+from .renderers import EventStreamRenderer, NDJSONRenderer
+from .singleflight import SingleFlight
+from .throttling import LoginRateThrottle, SearchRateThrottle
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+
+logger = logging.getLogger(__name__)
 
 
 # ================= JWT Protected Home =================
 class Home(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [TokenUserAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -29,12 +48,29 @@ class Home(APIView):
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
+    throttle_classes = [LoginRateThrottle]
     serializer_class = UserSerializer
 
+    def create(self, request, *args, **kwargs):
+        try:
+            with hashers.hashing_slot():
+                return super().create(request, *args, **kwargs)
+        except hashers.HashingBusy:
+            return hashing_busy_response()
+
 
 # ================= Custom Login with JWT =================
+def hashing_busy_response():
+    return Response(
+        {'error': 'Too many sign-ins right now. Please try again shortly.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '1'},
+    )
+
+
 class CustomLoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle]
 
     def post(self, request):
         username = request.data.get('username')
@@ -45,7 +81,13 @@ class CustomLoginView(APIView):
                 'error': 'Username and password are required'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        user = authenticate(username=username, password=password)
+        # Verifying (and, after a policy change, re-hashing) the password is
+        # the expensive part of a login
+        try:
+            with hashers.hashing_slot():
+                user = authenticate(username=username, password=password)
+        except hashers.HashingBusy:
+            return hashing_busy_response()
 
         if user:
             refresh = RefreshToken.for_user(user)
@@ -66,6 +108,43 @@ class CustomLoginView(APIView):
             }, status=status.HTTP_401_UNAUTHORIZED)
 
 
+# ================= Metrics =================
+def can_scrape_metrics(request):
+    """
+    Scrapers from settings.METRICS_ALLOWED_IPS, or staff users (session or JWT).
+    """
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    if request.user.is_staff:
+        return True
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return False
+    return bool(result and result[0].is_staff)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint.
+    """
+    if not can_scrape_metrics(request):
+        return JsonResponse({'detail': 'You do not have permission to perform this action.'}, status=403)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ================= Health =================
+def health(request):
+    """
+    Circuit breaker state per upstream. The API keeps serving (from its
+    fallbacks) while a circuit is open, so this always answers 200 and reports
+    'degraded' instead.
+    """
+    upstreams = circuit.snapshot()
+    healthy = all(breaker['state'] == circuit.CLOSED for breaker in upstreams.values())
+    return JsonResponse({'status': 'ok' if healthy else 'degraded', 'upstreams': upstreams})
+
+
 # ================= Public Home =================
 @api_view(['GET'])
 def home(request):
@@ -74,86 +153,199 @@ def home(request):
 
 
 # ================= Gemini Chatbot =================
-def get_chatbot_response(message):
+def build_career_prompt(message, context=None):
+    return prompts.CAREER_CHAT.render(message=message, history=conversations.render(context))
+
+
+def extract_response_text(response):
+    """
+    Pull the generated text out of a Gemini response, or None if it is empty.
+    """
+    with tracing.stage('parse'):
+        if hasattr(response, "text") and response.text:
+            logger.debug("Gemini responded successfully")
+            return response.text.strip()
+        elif hasattr(response, "candidates") and response.candidates:
+            logger.debug("Gemini responded (via candidates)")
+            return response.candidates[0].content.parts[0].text.strip()
+    logger.warning("Gemini returned empty response, using fallback")
+    return None
+
+
+def get_chatbot_response(message, context=None):
     """
     Enhanced chatbot response function using Google Gemini API for career-focused responses.
     Falls back to rule-based responses if API fails.
     """
     try:
-        # Configure Gemini API
-        #<gemini api key>
-        if not api_key:
-            print("❌ No GEMINI_API_KEY found in environment variables")
-            return get_fallback_response(message)
+        return generate_chatbot_response(message, context) or get_fallback_response(message)
 
-        genai.configure(api_key=api_key)
+    except Exception as e:
+        return chat_failed(message, e)
 
-        # Career-focused prompt
-        career_prompt = f"""
-        You are CareerCompass AI, a professional career guidance assistant. Your role is to provide helpful, accurate, and actionable career advice. 
 
-        Guidelines:
-        - Focus on career development, job search, skills, resume writing, interview preparation, and professional growth
-        - Provide practical, actionable advice
-        - Be encouraging and supportive
-        - Keep responses concise but informative (2-3 paragraphs max)
-        - If the question is not career-related, gently redirect to career topics
+def generate_chatbot_response(message, context=None):
+    """
+    Semantic-cache or Gemini answer for a message. Returns None when Gemini is
+    not configured or answered with nothing; upstream errors propagate.
+    ``context`` is the conversation history (see careeradvisor.conversations).
+    """
+    cached, prompt = prepare_chat(message, context)
+    if prompt is None:
+        return cached
 
-        User question: {message}
+    # Call Gemini API through the shared, already-configured model
+    response = upstream.generate_content(GEMINI_MODEL_NAME, prompt)
+    return finish_chat(message, context, response)
 
-        Please provide a helpful career-focused response:
-        """
 
-        # Call Gemini API
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(career_prompt)
+def prepare_chat(message, context):
+    """
+    Everything before the Gemini call, shared with the async view: returns
+    (cached answer, None) on a semantic-cache hit, (None, prompt) when Gemini
+    should answer, and (None, None) when it is not configured.
+    """
+    # Near-duplicate questions reuse an earlier Gemini answer. Follow-ups
+    # depend on the conversation, so they always go to Gemini.
+    cached = None if context else semantic_cache.lookup(message)
+    if cached:
+        tracing.tag('semantic_cache', 'hit')
+        return cached, None
 
-        if hasattr(response, "text") and response.text:
-            print("✅ Gemini responded successfully")
-            return response.text.strip()
-        elif hasattr(response, "candidates") and response.candidates:
-            print("✅ Gemini responded (via candidates)")
-            return response.candidates[0].content.parts[0].text.strip()
-        else:
-            print("⚠️ Gemini returned empty response, using fallback")
-            return get_fallback_response(message)
+    if not settings.GEMINI_API_KEY:
+        logger.error("No GEMINI_API_KEY found in environment variables")
+        tracing.fallback('chat', 'no_api_key')
+        return None, None
 
-    except Exception as e:
-        print(f"❌ Gemini API error: {e}")
-        return get_fallback_response(message)
+    with tracing.stage('prompt'):
+        return None, build_career_prompt(message, context)
+
+
+def finish_chat(message, context, response):
+    """
+    The answer text of a Gemini response, or None when it is empty.
+    """
+    text = extract_response_text(response)
+    if not text:
+        tracing.fallback('chat', 'empty_response')
+        return None
+    if not context:
+        semantic_cache.remember(message, text)
+    return text
+
+
+def chat_failed(message, exc):
+    logger.error("Gemini API error: %s", exc)
+    tracing.fallback('chat', upstream_failure_reason(exc))
+    return get_fallback_response(message)
+
+
+def upstream_failure_reason(exc):
+    if isinstance(exc, upstream.UpstreamThrottled):
+        return 'throttled'
+    if isinstance(exc, upstream.CircuitOpen):
+        return 'circuit_open'
+    return 'upstream_error'
 
 
 def get_fallback_response(message):
     """
     Fallback rule-based response system when Gemini API is unavailable.
+    Intents and their keywords are configured in intents.json.
     """
-    message_lower = message.lower()
+    return intents.get_matcher().respond(message)
 
-    if any(word in message_lower for word in ['career', 'guidance', 'advice', 'path', 'direction']):
-        return "I'd be happy to help with career guidance! Career planning involves understanding your interests, skills, and values. Consider exploring different industries, networking with professionals, and gaining relevant experience through internships or projects. What specific area of career guidance interests you most?"
 
-    elif any(word in message_lower for word in ['job', 'search', 'hunting', 'application', 'interview']):
-        return "Here are some effective job search strategies: 1) Tailor your resume for each position, 2) Use professional networks like LinkedIn, 3) Practice common interview questions, 4) Research companies thoroughly, 5) Follow up after applications. Would you like me to elaborate on any of these points?"
+# ================= Background LLM tasks =================
+def wants_background(request):
+    """
+    Opt into queued processing with ?async=1 or {"async": true} in the body.
+    """
+    return request.query_params.get('async') in ('1', 'true') or request.data.get('async') is True
 
-    elif any(word in message_lower for word in ['resume', 'cv', 'curriculum vitae']):
-        return "A strong resume should highlight your achievements with quantifiable results. Key sections include: Contact info, Professional summary, Work experience, Education, and relevant Skills. Use action verbs and keep it concise (1-2 pages). Would you like specific tips for any section?"
 
-    elif any(word in message_lower for word in ['skill', 'learn', 'development', 'training', 'course']):
-        return "Continuous skill development is crucial for career growth! Identify in-demand skills in your field, use online platforms like Coursera, Udemy, or LinkedIn Learning. Practice through projects, seek mentorship, and consider certifications. What skills are you looking to develop?"
+def queue_full_response():
+    return Response(
+        {'error': 'Too many pending requests, please retry shortly.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '5'},
+    )
 
-    elif any(word in message_lower for word in ['interview', 'preparation', 'questions']):
-        return "Interview preparation tips: 1) Research the company and role, 2) Practice STAR method for behavioral questions, 3) Prepare thoughtful questions to ask, 4) Dress appropriately, 5) Arrive early and be confident. Common questions include 'Tell me about yourself' and 'Why do you want this role?' Need help with specific interview scenarios?"
 
-    elif any(word in message_lower for word in ['hello', 'hi', 'hey', 'good morning', 'good afternoon']):
-        return "Hello! Welcome to CareerCompass. I'm here to help with career guidance, job search tips, skill development, and resume advice. What would you like to know?"
+class TaskDetailView(APIView):
+    """
+    Poll a queued task. ``?wait=N`` long-polls up to N seconds for it to
+    finish; waiting holds a worker thread, so the cap is short here and
+    longer on the async view. Tasks created by a signed-in user are only
+    visible to that user.
+    """
+    permission_classes = [AllowAny]
+    max_wait = 5
 
-    else:
-        return "I'm here to help with career guidance, job search tips, skill development, and resume advice. What would you like to know?"
+    def get(self, request, pk):
+        task = generics.get_object_or_404(LLMTask, pk=pk)
+        if task.user_id is not None and task.user_id != request.user.pk:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            wait = min(float(request.query_params.get('wait', 0)), self.max_wait)
+        except ValueError:
+            wait = 0
+        if wait > 0 and not task.finished:
+            task = tasks.wait_for(task.pk, wait)
+
+        return Response(LLMTaskSerializer(task).data)
+
+
+# ================= Conversations =================
+class ConversationListView(generics.ListCreateAPIView):
+    """
+    The user's conversations, most recently active first. POST starts a new one.
+    """
+    serializer_class = ConversationSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Conversation.objects.filter(user=self.request.user).order_by('-updated_at')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class ConversationDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Rename or delete a conversation; deleting it deletes its chats.
+    """
+    serializer_class = ConversationSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Conversation.objects.filter(user=self.request.user)
+
+
+def get_user_conversation(user, conversation_id):
+    """
+    The user's conversation with this id, None if no id was given. Raises Http404.
+    ``user`` may be a TokenUser.
+    """
+    if conversation_id in (None, ''):
+        return None
+    try:
+        conversation_id = int(conversation_id)
+    except (TypeError, ValueError):
+        raise Http404("Unknown conversation.")
+    with tracing.stage('db'):
+        return generics.get_object_or_404(Conversation, pk=conversation_id, user_id=user.pk)
 
 
 # ================= Chatbot API =================
 class ChatbotView(APIView):
+    """
+    Answer a message. Pass {"conversation": <id>} to answer within a
+    conversation: recent turns and its rolling summary go into the prompt.
+    """
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
 
     def post(self, request, *args, **kwargs):
         user_message = request.data.get('message')
@@ -161,63 +353,245 @@ class ChatbotView(APIView):
         if not user_message:
             return Response({'error': 'Message field is required.'}, status=400)
 
-        bot_response = get_chatbot_response(user_message)
+        conversation = get_user_conversation(request.user, request.data.get('conversation'))
 
-        chat = Chat.objects.create(
-            user=request.user,
-            message=user_message,
-            response=bot_response
-        )
+        from .streaming import sse_response, stream_chat_events, wants_stream
+        if wants_stream(request):
+            return sse_response(stream_chat_events(request.user, user_message, conversation))
 
-        serializer = ChatSerializer(chat)
-        return Response(serializer.data)
+        if wants_background(request):
+            try:
+                task = tasks.enqueue_chat(request.user, user_message, conversation)
+            except tasks.QueueFull:
+                return queue_full_response()
+            return Response(LLMTaskSerializer(task).data, status=status.HTTP_202_ACCEPTED)
+
+        context = conversations.build_context(conversation)
+        bot_response = get_chatbot_response(user_message, context)
+
+        with tracing.stage('db'):
+            chat = Chat.objects.create(
+                user=request.user,
+                conversation=conversation,
+                message=user_message,
+                response=bot_response
+            )
+            conversations.after_turn(conversation, context, user_message)
+
+        with tracing.stage('serialize'):
+            serializer = ChatSerializer(chat)
+            data = serializer.data
+        return Response(data)
+
+
+# ================= Chat Batch API =================
+class ChatBatchView(APIView):
+    """
+    Answer many messages in one call: {"messages": ["...", {"message": "..."}]}.
+    Results come back per item, in order; invalid items get an error and are
+    not stored.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        messages = request.data.get('messages')
+        if not isinstance(messages, list) or not messages:
+            return Response({'error': 'messages must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(messages) > chat_batch.config('MAX_MESSAGES'):
+            return Response(
+                {'error': f"A batch can hold at most {chat_batch.config('MAX_MESSAGES')} messages."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = chat_batch.run_batch(request.user, [chat_batch.validate_item(item) for item in messages])
+
+        with tracing.stage('serialize'):
+            for result in results:
+                if result['status'] == 'ok':
+                    result['chat'] = ChatSerializer(result['chat']).data
+        succeeded = sum(1 for result in results if result['status'] == 'ok')
+        return Response({
+            'count': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results,
+        })
 
 
 # ================= Chat History =================
 class ChatHistoryView(generics.ListAPIView):
+    """
+    Cursor-paginated history, newest first. Pass ?truncate=<chars> to receive
+    only a prefix of each response (cut in the database, not in Python), and
+    ?conversation=<id> to list a single conversation. Pages continue into
+    archived chats (careeradvisor.chat_archive) once recent ones run out.
+    Read-only, so the user comes from the token's claims without a query;
+    unchanged pages revalidate with a 304 (careeradvisor.payloads).
+    """
     serializer_class = ChatSerializer
+    authentication_classes = [TokenUserAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = ChatCursorPagination
+    etag = True
 
-    def get_queryset(self):
-        return Chat.objects.filter(user=self.request.user).order_by('-created_at')
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['native_datetimes'] = getattr(self.request.accepted_renderer, 'native_datetimes', False)
+        return context
 
+    def get_truncate_length(self):
+        try:
+            return max(0, int(self.request.query_params['truncate']))
+        except (KeyError, ValueError):
+            return None
 
-# ================= Job Search API =================
-@api_view(['POST'])
-@permission_classes([AllowAny])
-@csrf_exempt
-def job_search(request):
-    job_title = request.data.get('job_title', '').strip()
-    location = request.data.get('location', 'India').strip()
+    def get_serializer_class(self):
+        if self.get_truncate_length() is not None:
+            return ChatListSerializer
+        return ChatSerializer
 
-    if not job_title:
-        return Response({'error': 'Job title is required'}, status=status.HTTP_400_BAD_REQUEST)
+    def get_queryset(self):
+        queryset = Chat.objects.filter(user_id=self.request.user.pk).order_by('-created_at', '-id')
+        self.conversation = get_user_conversation(self.request.user, self.request.query_params.get('conversation'))
+        if self.conversation is not None:
+            queryset = queryset.filter(conversation=self.conversation)
+        limit = self.get_truncate_length()
+        if limit is not None:
+            queryset = queryset.defer('response').annotate(
+                response_preview=Substr('response', 1, limit),
+                response_length=Length('response'),
+            )
+        return queryset
+
+    def get_archived_chats(self, before, limit):
+        chats = chat_archive.archived_chats(
+            self.request.user.pk, before, limit,
+            conversation_id=self.conversation.pk if self.conversation is not None else None,
+        )
+        truncate = self.get_truncate_length()
+        if truncate is not None:
+            for chat in chats:
+                chat.response_preview = chat.response[:truncate]
+                chat.response_length = len(chat.response)
+        return chats
+
+    def list(self, request, *args, **kwargs):
+        with tracing.stage('db'):
+            page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        with tracing.stage('serialize'):
+            data = self.get_serializer(page, many=True).data
+        return self.get_paginated_response(data)
 
-    url = "https://jsearch.p.rapidapi.com/search"
 
+# ================= Job Search API =================
+def build_job_search_request(job_title, location, page=1, num_pages=1):
+    """
+    Query string and headers for a JSearch (RapidAPI) search.
+    """
     querystring = {
         "query": f"{job_title} jobs in {location}",
-        "page": "1",
-        "num_pages": "1",
+        "page": str(page),
+        "num_pages": str(num_pages),
         "country": "in",
         "date_posted": "all"
     }
 
     headers = {
-        "x-rapidapi-host": "jsearch.p.rapidapi.com",
-        "x-rapidapi-key": "0735b4faabmsh42bad049d1ef39dp147b1cjsn55d5602fbba7"
+        "x-rapidapi-host": settings.RAPIDAPI_HOST,
+        "x-rapidapi-key": settings.RAPIDAPI_KEY
     }
+    return querystring, headers
 
-    try:
-        response = requests.get(url, headers=headers, params=querystring)
+
+jobs_flight = SingleFlight('jobs')
+
+
+def fetch_jobs(job_title, location, page=1):
+    """
+    Fetch one page of postings from JSearch. Concurrent identical searches
+    share a single upstream request.
+    """
+    def fetch():
+        querystring, headers = build_job_search_request(job_title, location, page=page)
+        response = upstream.http_get('rapidapi', settings.RAPIDAPI_JSEARCH_URL, headers=headers, params=querystring)
         response.raise_for_status()
-        data = response.json()
-        jobs = data.get("data", [])
-        return Response({
+        with tracing.stage('parse'):
+            try:
+                return renderers.loads(response.content).get("data", [])
+            except ValueError as e:
+                raise requests.exceptions.InvalidJSONError(str(e), response=response)
+
+    return jobs_flight.do(make_key('jobs', job_title, location, page), fetch)
+
+
+def throttled_response(wait):
+    return Response(
+        {'status': 'error', 'message': 'Search capacity exceeded, please retry shortly.'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={'Retry-After': str(math.ceil(wait))},
+    )
+
+
+def circuit_open_response(retry_after):
+    return Response(
+        {'status': 'error', 'message': 'Job search is temporarily unavailable, please retry shortly.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(math.ceil(retry_after))},
+    )
+
+
+def search_params(request):
+    """
+    Search parameters: the JSON body of a POST, or the query string of a GET.
+    The GET form is cacheable: a matching If-None-Match gets a 304.
+    """
+    return request.query_params if request.method == 'GET' else request.data
+
+
+@payloads.conditional
+@api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
+@throttle_classes([SearchRateThrottle])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer])
+@csrf_exempt
+def job_search(request):
+    params = search_params(request)
+    job_title = params.get('job_title', '').strip()
+    location = params.get('location', 'India').strip()
+
+    if not job_title:
+        return Response({'error': 'Job title is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        pages = job_pages.parse_pages(params.get('pages'))
+    except job_pages.InvalidPages as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Several pages are fetched concurrently and optionally streamed as NDJSON
+    if job_pages.wants_ndjson(request):
+        return job_pages.ndjson_response(job_pages.stream_job_pages(job_title, location, pages, fetch_jobs))
+
+    fields = payloads.requested_fields(request, params)
+    try:
+        if pages > 1:
+            jobs, source = job_pages.collect_job_pages(job_title, location, pages, fetch_jobs), 'live'
+        else:
+            # Served from the local job index when it has fresh results,
+            # passed through undecoded unless they are projected
+            jobs, source = job_index.search(job_title, location, fetch_jobs, raw=fields is None)
+        return Response(payloads.project({
             'status': 'success',
             'count': len(jobs),
-            'data': jobs
-        })
+            'data': jobs,
+            'source': source,
+        }, fields))
+
+    except upstream.UpstreamThrottled as e:
+        return throttled_response(e.wait)
+
+    except upstream.CircuitOpen as e:
+        # JSearch is failing and there are no stale results to fall back on
+        return circuit_open_response(e.retry_after)
 
     except requests.exceptions.RequestException as e:
         return Response({
@@ -227,202 +601,248 @@ def job_search(request):
 
 
 # ================= College Search API using Gemini =================
-@api_view(['POST'])
+college_cache = build_cache('colleges')
+
+
+def build_college_prompt(field, location):
+    return prompts.COLLEGE_SEARCH.render(field=field, location=location)
+
+
+def parse_college_text(response_text):
+    """
+    Validated colleges salvaged from Gemini output (see
+    careeradvisor.college_parser), or None if there are none.
+    """
+    return college_parser.parse_colleges(response_text)
+
+
+def generate_colleges(field, location):
+    """
+    Ask Gemini for college recommendations and return the parsed list.
+    Returns None when the API is unavailable or the output cannot be parsed.
+    """
+    try:
+        prompt = prepare_colleges(field, location)
+        if prompt is None:
+            return None
+
+        # Call Gemini API through the shared, already-configured model
+        response = upstream.generate_content(GEMINI_MODEL_NAME, prompt)
+        return finish_colleges(response)
+
+    except Exception as e:
+        return colleges_failed(e)
+
+
+def prepare_colleges(field, location):
+    """
+    The college prompt, or None when Gemini is not configured. Shared with the async view.
+    """
+    if not settings.GEMINI_API_KEY:
+        logger.error("No GEMINI_API_KEY found in environment variables")
+        tracing.fallback('colleges', 'no_api_key')
+        return None
+
+    with tracing.stage('prompt'):
+        return build_college_prompt(field, location)
+
+
+def finish_colleges(response):
+    if hasattr(response, "text") and response.text:
+        colleges = parse_college_text(response.text)
+        if colleges is None:
+            tracing.fallback('colleges', 'parse_error')
+        return colleges
+    logger.warning("No text in Gemini response")
+    tracing.fallback('colleges', 'empty_response')
+    return None
+
+
+def colleges_failed(exc):
+    logger.error("Gemini API error: %s", exc)
+    tracing.fallback('colleges', upstream_failure_reason(exc))
+    return None
+
+
+@payloads.conditional
+@api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
+@throttle_classes([SearchRateThrottle])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer])
 @csrf_exempt
 def college_search(request):
-    field = request.data.get('field', '').strip()
-    location = request.data.get('location', 'India').strip()
+    params = search_params(request)
+    field = params.get('field', '').strip()
+    location = params.get('location', 'India').strip()
 
     if not field:
         return Response({'error': 'Field of study is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        # Configure Gemini API
-        #<rapid api key>
-        if not api_key:
-            return Response({'error': 'Gemini API key not configured'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        genai.configure(api_key=api_key)
-
-        # Create a detailed prompt for college recommendations
-        college_prompt = f"""
-        You are a college advisor AI. Based on the field of study "{field}" and location preference "{location}", 
-        provide a list of 8-10 relevant colleges/universities.
-
-        For each college, provide the following information in JSON format:
-        - name: College/University name
-        - location: City, State/Country
-        - type: (e.g., "Public University", "Private College", "Technical Institute")
-        - ranking: National or regional ranking if known (just the number, e.g., "15")
-        - programs: Array of 3-5 relevant programs/majors they offer
-        - description: Brief 2-3 sentence description of the college
-        - website: Official website URL if known
-        - rating: Rating out of 5 (e.g., 4.2)
-        - student_count: Approximate number of students (e.g., "25,000")
-        - established: Year established
-        - fees: Approximate annual fees (e.g., "$15,000-20,000" or "₹2-3 Lakhs")
-
-        Focus on colleges that are:
-        1. Well-known for the specified field
-        2. Located in or near the specified location (if location is provided)
-        3. Have good reputation and accreditation
-        4. Offer relevant programs
-
-        Return ONLY a valid JSON array with no additional text or formatting. Example format:
-        [
-          {{
-            "name": "Example University",
-            "location": "City, State",
-            "type": "Public University",
-            "ranking": "25",
-            "programs": ["Computer Science", "Software Engineering", "Data Science"],
-            "description": "A leading public university known for its strong engineering and technology programs.",
-            "website": "https://example.edu",
-            "rating": 4.3,
-            "student_count": "30,000",
-            "established": "1965",
-            "fees": "$12,000-18,000"
-          }}
-        ]
-        """
-
-        # Call Gemini API
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(college_prompt)
+    # Colleges are written as NDJSON lines as soon as Gemini completes each one
+    if job_pages.wants_ndjson(request):
+        return job_pages.ndjson_response(college_parser.stream_colleges(field, location))
+
+    # Queueing a task is not a safe GET
+    if request.method == 'POST' and wants_background(request):
+        try:
+            task = tasks.enqueue_college_search(request.user, field, location)
+        except tasks.QueueFull:
+            return queue_full_response()
+        return Response(LLMTaskSerializer(task).data, status=status.HTTP_202_ACCEPTED)
+
+    # Served from the local college catalog when it covers the search; Gemini
+    # answers are cached under the normalized (field, location) pair and
+    # ingested into the catalog.
+    colleges_data, source = college_catalog.search(field, location, lambda: college_cache.get_or_compute(
+        (field, location),
+        lambda: generate_colleges(normalize_text(field), normalize_text(location)),
+    ))
+
+    fields = payloads.requested_fields(request, params)
+    if colleges_data is None:
+        # Return fallback data if Gemini failed or its output was unusable
+        return Response(payloads.project(get_fallback_colleges(field, location).data, fields))
+
+    return Response(payloads.project({
+        'status': 'success',
+        'count': len(colleges_data),
+        'data': colleges_data,
+        'source': source,
+    }, fields))
 
-        if hasattr(response, "text") and response.text:
-            response_text = response.text.strip()
-            
-            # Clean up the response to extract JSON
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
-            try:
-                import json
-                colleges_data = json.loads(response_text)
-                
-                return Response({
-                    'status': 'success',
-                    'count': len(colleges_data),
-                    'data': colleges_data
-                })
-            except json.JSONDecodeError as e:
-                print(f"JSON decode error: {e}")
-                print(f"Response text: {response_text}")
-                # Return fallback data if JSON parsing fails
-                return get_fallback_colleges(field, location)
-        else:
-            print("No text in Gemini response")
-            return get_fallback_colleges(field, location)
 
-    except Exception as e:
-        print(f"Gemini API error: {e}")
-        return get_fallback_colleges(field, location)
+@payloads.conditional
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def college_list(request):
+    """
+    Browse the local college catalog (no Gemini call). Filters: program,
+    city, state, country, location, max_ranking; at most ``limit`` (50) rows.
+    ``fields`` projects the rows.
+    """
+    params = request.query_params
+    try:
+        max_ranking = int(params['max_ranking']) if params.get('max_ranking') else None
+        limit = min(max(int(params.get('limit', 20)), 1), 50)
+    except ValueError:
+        return Response({'error': 'max_ranking and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+    with tracing.stage('db'):
+        colleges = college_catalog.find(
+            program=params.get('program'), city=params.get('city'), state=params.get('state'),
+            country=params.get('country'), location=params.get('location'), max_ranking=max_ranking, limit=limit,
+        )
+    return Response(payloads.project({
+        'status': 'success',
+        'count': len(colleges),
+        'data': colleges,
+    }, payloads.requested_fields(request)))
+
+
+FALLBACK_COLLEGES = [
+    {
+        "name": "Indian Institute of Technology (IIT) Delhi",
+        "location": "New Delhi, India",
+        "type": "Public Technical Institute",
+        "ranking": "1",
+        "programs": ["Computer Science", "Electrical Engineering", "Mechanical Engineering", "Chemical Engineering"],
+        "description": "Premier engineering institute in India, known for excellence in technology and research.",
+        "website": "https://home.iitd.ac.in/",
+        "rating": 4.8,
+        "student_count": "11,000",
+        "established": "1961",
+        "fees": "₹2-3 Lakhs"
+    },
+    {
+        "name": "Indian Institute of Science (IISc) Bangalore",
+        "location": "Bangalore, Karnataka, India",
+        "type": "Public Research Institute",
+        "ranking": "2",
+        "programs": ["Computer Science", "Physics", "Chemistry", "Mathematics", "Biological Sciences"],
+        "description": "Leading research institute in India, focusing on science and engineering research.",
+        "website": "https://www.iisc.ac.in/",
+        "rating": 4.7,
+        "student_count": "4,000",
+        "established": "1909",
+        "fees": "₹1-2 Lakhs"
+    },
+    {
+        "name": "Delhi University",
+        "location": "New Delhi, India",
+        "type": "Public University",
+        "ranking": "8",
+        "programs": ["Arts", "Science", "Commerce", "Law", "Medicine"],
+        "description": "One of India's largest and most prestigious universities with diverse academic programs.",
+        "website": "http://www.du.ac.in/",
+        "rating": 4.2,
+        "student_count": "132,000",
+        "established": "1922",
+        "fees": "₹50,000-1 Lakh"
+    },
+    {
+        "name": "Jawaharlal Nehru University (JNU)",
+        "location": "New Delhi, India",
+        "type": "Public University",
+        "ranking": "12",
+        "programs": ["Social Sciences", "Languages", "International Studies", "Science"],
+        "description": "Renowned for social sciences and liberal arts education with a diverse student body.",
+        "website": "https://www.jnu.ac.in/",
+        "rating": 4.1,
+        "student_count": "8,500",
+        "established": "1969",
+        "fees": "₹30,000-80,000"
+    },
+    {
+        "name": "Indian Institute of Management (IIM) Ahmedabad",
+        "location": "Ahmedabad, Gujarat, India",
+        "type": "Public Business School",
+        "ranking": "3",
+        "programs": ["MBA", "Executive MBA", "PhD in Management", "PGPX"],
+        "description": "Premier business school in India, known for producing top management professionals.",
+        "website": "https://www.iima.ac.in/",
+        "rating": 4.6,
+        "student_count": "1,200",
+        "established": "1961",
+        "fees": "₹23-25 Lakhs"
+    },
+    {
+        "name": "All India Institute of Medical Sciences (AIIMS) Delhi",
+        "location": "New Delhi, India",
+        "type": "Public Medical Institute",
+        "ranking": "1",
+        "programs": ["MBBS", "MD", "MS", "DM", "MCh", "Nursing"],
+        "description": "Premier medical institute in India, known for medical education and healthcare.",
+        "website": "https://www.aiims.edu/",
+        "rating": 4.9,
+        "student_count": "3,000",
+        "established": "1956",
+        "fees": "₹1,500-5,000"
+    }
+]
 
 
 def get_fallback_colleges(field, location):
     """
     Fallback college data when Gemini API fails
     """
-    fallback_colleges = [
-        {
-            "name": "Indian Institute of Technology (IIT) Delhi",
-            "location": "New Delhi, India",
-            "type": "Public Technical Institute",
-            "ranking": "1",
-            "programs": ["Computer Science", "Electrical Engineering", "Mechanical Engineering", "Chemical Engineering"],
-            "description": "Premier engineering institute in India, known for excellence in technology and research.",
-            "website": "https://home.iitd.ac.in/",
-            "rating": 4.8,
-            "student_count": "11,000",
-            "established": "1961",
-            "fees": "₹2-3 Lakhs"
-        },
-        {
-            "name": "Indian Institute of Science (IISc) Bangalore",
-            "location": "Bangalore, Karnataka, India",
-            "type": "Public Research Institute",
-            "ranking": "2",
-            "programs": ["Computer Science", "Physics", "Chemistry", "Mathematics", "Biological Sciences"],
-            "description": "Leading research institute in India, focusing on science and engineering research.",
-            "website": "https://www.iisc.ac.in/",
-            "rating": 4.7,
-            "student_count": "4,000",
-            "established": "1909",
-            "fees": "₹1-2 Lakhs"
-        },
-        {
-            "name": "Delhi University",
-            "location": "New Delhi, India",
-            "type": "Public University",
-            "ranking": "8",
-            "programs": ["Arts", "Science", "Commerce", "Law", "Medicine"],
-            "description": "One of India's largest and most prestigious universities with diverse academic programs.",
-            "website": "http://www.du.ac.in/",
-            "rating": 4.2,
-            "student_count": "132,000",
-            "established": "1922",
-            "fees": "₹50,000-1 Lakh"
-        },
-        {
-            "name": "Jawaharlal Nehru University (JNU)",
-            "location": "New Delhi, India",
-            "type": "Public University",
-            "ranking": "12",
-            "programs": ["Social Sciences", "Languages", "International Studies", "Science"],
-            "description": "Renowned for social sciences and liberal arts education with a diverse student body.",
-            "website": "https://www.jnu.ac.in/",
-            "rating": 4.1,
-            "student_count": "8,500",
-            "established": "1969",
-            "fees": "₹30,000-80,000"
-        },
-        {
-            "name": "Indian Institute of Management (IIM) Ahmedabad",
-            "location": "Ahmedabad, Gujarat, India",
-            "type": "Public Business School",
-            "ranking": "3",
-            "programs": ["MBA", "Executive MBA", "PhD in Management", "PGPX"],
-            "description": "Premier business school in India, known for producing top management professionals.",
-            "website": "https://www.iima.ac.in/",
-            "rating": 4.6,
-            "student_count": "1,200",
-            "established": "1961",
-            "fees": "₹23-25 Lakhs"
-        },
-        {
-            "name": "All India Institute of Medical Sciences (AIIMS) Delhi",
-            "location": "New Delhi, India",
-            "type": "Public Medical Institute",
-            "ranking": "1",
-            "programs": ["MBBS", "MD", "MS", "DM", "MCh", "Nursing"],
-            "description": "Premier medical institute in India, known for medical education and healthcare.",
-            "website": "https://www.aiims.edu/",
-            "rating": 4.9,
-            "student_count": "3,000",
-            "established": "1956",
-            "fees": "₹1,500-5,000"
-        }
-    ]
     
     # Filter colleges based on field if possible
     field_lower = field.lower()
     if any(term in field_lower for term in ['computer', 'engineering', 'technology', 'software']):
-        filtered_colleges = [c for c in fallback_colleges if any(prog.lower().find('computer') != -1 or prog.lower().find('engineering') != -1 for prog in c['programs'])]
+        filtered_colleges = [c for c in FALLBACK_COLLEGES if any(prog.lower().find('computer') != -1 or prog.lower().find('engineering') != -1 for prog in c['programs'])]
     elif any(term in field_lower for term in ['business', 'management', 'mba']):
-        filtered_colleges = [c for c in fallback_colleges if 'IIM' in c['name']]
+        filtered_colleges = [c for c in FALLBACK_COLLEGES if 'IIM' in c['name']]
     elif any(term in field_lower for term in ['medical', 'medicine', 'mbbs']):
-        filtered_colleges = [c for c in fallback_colleges if 'AIIMS' in c['name']]
+        filtered_colleges = [c for c in FALLBACK_COLLEGES if 'AIIMS' in c['name']]
     else:
-        filtered_colleges = fallback_colleges[:4]  # Return first 4 as general results
+        filtered_colleges = FALLBACK_COLLEGES[:4]  # Return first 4 as general results
     
     if not filtered_colleges:
-        filtered_colleges = fallback_colleges[:4]
-    
+        filtered_colleges = FALLBACK_COLLEGES[:4]
+
+    # Same schema as Gemini's colleges (e.g. `established` as an integer year)
+    filtered_colleges = [college_parser.validate_college(c) for c in filtered_colleges]
+
     return Response({
         'status': 'success',
         'count': len(filtered_colleges),